@@ -1,6 +1,7 @@
 # Backend package initialization
 from . import processing
 from . import analysis
+from . import storage
 from . import app
 
-__all__ = ["processing", "analysis", "app"]
\ No newline at end of file
+__all__ = ["processing", "analysis", "storage", "app"]
\ No newline at end of file
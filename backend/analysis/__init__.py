@@ -23,11 +23,64 @@ from .comparative_analysis import (
     generate_pacing_analysis
 )
 
+# Key-driver regression
+from .key_drivers import (
+    generate_key_driver_analysis
+)
+
 # Textual analytics
 from .textual_analytics import (
     generate_one_word_descriptions,
     generate_text_insights,
-    extract_common_words
+    generate_lexicon_sentiment,
+    extract_common_words,
+    score_sentiment
+)
+
+# Near-duplicate comment detection
+from .near_duplicates import (
+    find_near_duplicates
+)
+
+# Segment keyword index
+from .keyword_index import (
+    generate_segment_keywords,
+    query_segment_keywords
+)
+
+# Comment search
+from .comment_search import (
+    search_comments,
+    get_comment_index
+)
+
+# Offline theme clustering
+from .theme_clustering import (
+    generate_theme_clusters
+)
+
+# Pre-aggregated OLAP cube
+from .olap_cube import (
+    query_cube,
+    get_cube
+)
+
+# Packed bitmap indexes for ad-hoc filters
+from .bitmap_index import (
+    get_bitmap_index,
+    filter_rows
+)
+
+# Cohort comparison
+from .cohort_comparison import (
+    compare_cohorts
+)
+
+# Mergeable per-event snapshots
+from .snapshots import (
+    build_snapshot,
+    merge_snapshots,
+    summarize_snapshot
 )
 
 # Marketing analytics
@@ -38,7 +91,9 @@ from .marketing_analytics import (
 # Summative reports 
 from .summative_reports import (
     generate_comprehensive_report,
-    generate_initial_summary
+    generate_initial_summary,
+    generate_report_sections,
+    generate_filtered_report
 )
 
 __all__ = [
@@ -59,15 +114,52 @@ __all__ = [
     "generate_correlation_analysis",
     "generate_pacing_analysis",
     
+    # Key-driver regression
+    "generate_key_driver_analysis",
+    
     # Textual analytics
     "generate_one_word_descriptions",
     "generate_text_insights",
+    "generate_lexicon_sentiment",
     "extract_common_words",
+    "score_sentiment",
+    
+    # Near-duplicate comment detection
+    "find_near_duplicates",
+    
+    # Segment keyword index
+    "generate_segment_keywords",
+    "query_segment_keywords",
+    
+    # Comment search
+    "search_comments",
+    "get_comment_index",
+    
+    # Offline theme clustering
+    "generate_theme_clusters",
+    
+    # Pre-aggregated OLAP cube
+    "query_cube",
+    "get_cube",
+    
+    # Packed bitmap indexes for ad-hoc filters
+    "get_bitmap_index",
+    "filter_rows",
+    
+    # Cohort comparison
+    "compare_cohorts",
+    
+    # Mergeable per-event snapshots
+    "build_snapshot",
+    "merge_snapshots",
+    "summarize_snapshot",
     
     # Marketing analytics
     "generate_discovery_channel_impact",
     
     # Summative reports
     "generate_comprehensive_report",
-    "generate_initial_summary"
+    "generate_initial_summary",
+    "generate_report_sections",
+    "generate_filtered_report"
 ]
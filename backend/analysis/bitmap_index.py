@@ -0,0 +1,186 @@
+"""
+Packed bitmap indexes for ad-hoc row filters.
+
+Every categorical value (channel, pacing, venue, venue modality, time slot, one-word
+description, session) and every score level (satisfaction, recommendation score, aspect ratings)
+gets a bitmap of the rows that have it, packed 8 rows per byte. A filter such as
+"satisfaction <= 2 AND improvement_feedback mentions sound" is answered by OR-ing
+level bitmaps within a condition and AND-ing conditions, a few byte-wise operations
+over n/8 bytes each. Text conditions use the comment search index.
+
+Functions / classes:
+- BitmapIndex: Packed bitmaps per column value with condition evaluation
+- build_bitmap_index: Builds the bitmaps of a dataset in one scatter per column
+- get_bitmap_index: Cached build_bitmap_index for a dataset
+- filter_rows: Row positions matching a list of conditions
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset, aspect_columns
+from .grouped_stats import encode_groups
+from .comment_search import get_comment_index, query_terms
+from .session_analytics import classify_modality
+
+CATEGORICAL_COLUMNS = ['event_discovery', 'pacing', 'preferred_venue', 'preferred_time', 'one_word_desc']
+SESSION_COLUMN = 'sessions'
+# Online / In-Person, derived from preferred_venue like the venue preferences section
+MODALITY_COLUMN = 'modality'
+SCORE_COLUMNS = ['satisfaction', 'recommendation_score']
+# Columns with more distinct values than this get no bitmaps (free-text-like answers)
+MAX_BITMAP_VALUES = 1024
+
+CATEGORICAL_OPS = {'==', '!=', 'in', 'not_in'}
+SCORE_OPS = CATEGORICAL_OPS | {'<', '<=', '>', '>=', 'between'}
+TEXT_OPS = {'contains'}
+
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+
+class BitmapIndex:
+    """
+    `bitmaps[column]` is a (values x ceil(n_rows / 8)) uint8 array; row r of the dataset is
+    bit (7 - r % 8) of byte r // 8 (np.packbits order). `values[column]` holds the value of
+    each bitmap: labels for categorical columns, sorted numeric levels for scores.
+    """
+
+    def __init__(self, n_rows: int, values: Dict[str, np.ndarray], bitmaps: Dict[str, np.ndarray],
+                 score_columns: List[str], dataset):
+        self.n_rows = n_rows
+        self.values = values
+        self.bitmaps = bitmaps
+        self.score_columns = score_columns
+        self.all_rows = np.packbits(np.ones(n_rows, dtype=bool))
+        self._dataset = dataset
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(_POPCOUNT[bits].sum())
+
+    def rows(self, bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def _union(self, column: str, mask: np.ndarray) -> np.ndarray:
+        selected = self.bitmaps[column][mask]
+        return np.bitwise_or.reduce(selected, axis=0) if len(selected) else np.zeros_like(self.all_rows)
+
+    def _text_condition(self, column: str, query: str) -> np.ndarray:
+        index = get_comment_index(self._dataset)
+        terms = query_terms(str(query))
+        if not terms:
+            raise ValueError("Text conditions need at least one word")
+        columns = None if column == 'comments' else [index.column_names.index(column)]
+        ids, _ = index.search(terms, columns)
+        matched = np.zeros(self.n_rows, dtype=bool)
+        matched[index.rows[ids]] = True
+        return np.packbits(matched)
+
+    def condition(self, column: str, op: str, value: Any) -> np.ndarray:
+        """Packed bitmap of the rows satisfying one condition"""
+        if op in TEXT_OPS:
+            if column != 'comments' and column not in get_comment_index(self._dataset).column_names:
+                raise ValueError(f"Unknown text column: {column}")
+            return self._text_condition(column, value)
+
+        if column not in self.bitmaps:
+            raise ValueError(f"Unknown or unindexed column: {column}")
+        is_score = column in self.score_columns
+        if op not in (SCORE_OPS if is_score else CATEGORICAL_OPS):
+            raise ValueError(f"Unsupported operator '{op}' for column {column}")
+
+        values = self.values[column]
+        if is_score:
+            operands = np.asarray(value if isinstance(value, (list, tuple)) else [value], dtype=float)
+        else:
+            operands = np.asarray([str(v).strip() for v in (value if isinstance(value, (list, tuple)) else [value])],
+                                  dtype=object)
+
+        if op in ('==', 'in'):
+            mask = np.isin(values, operands)
+        elif op in ('!=', 'not_in'):
+            # Rows with another (non-missing) value
+            mask = ~np.isin(values, operands)
+        elif op == 'between':
+            if len(operands) != 2:
+                raise ValueError("'between' needs [low, high]")
+            mask = (values >= operands[0]) & (values <= operands[1])
+        else:
+            mask = {'<': values < operands[0], '<=': values <= operands[0],
+                    '>': values > operands[0], '>=': values >= operands[0]}[op]
+
+        return self._union(column, mask)
+
+    def evaluate(self, conditions: List[Dict[str, Any]]) -> np.ndarray:
+        """AND of all conditions ({"column", "op", "value"}); no conditions select every row"""
+        bits = self.all_rows.copy()
+        for condition in conditions:
+            try:
+                column, op, value = condition['column'], condition.get('op', '=='), condition['value']
+            except (KeyError, TypeError):
+                raise ValueError("Each condition needs 'column', 'op' and 'value'")
+            np.bitwise_and(bits, self.condition(column, op, value), out=bits)
+        return bits
+
+
+def _scatter_bitmaps(codes: np.ndarray, rows: np.ndarray, n_values: int, n_rows: int) -> np.ndarray:
+    """Packed bitmaps from (value code, row) pairs in one scatter (codes < 0 are skipped)"""
+    bitmaps = np.zeros((n_values, (n_rows + 7) // 8), dtype=np.uint8)
+    valid = codes >= 0
+    codes, rows = codes[valid], rows[valid]
+    np.bitwise_or.at(bitmaps, (codes, rows >> 3), (0x80 >> (rows & 7)).astype(np.uint8))
+    return bitmaps
+
+
+def build_bitmap_index(data: List[Dict[str, Any]]) -> BitmapIndex:
+    """Builds bitmaps for the categorical, session and score columns of a dataset"""
+    dataset = as_dataset(data)
+    df = dataset.frame
+    n_rows = len(df)
+    all_rows = np.arange(n_rows, dtype=np.int64)
+    values: Dict[str, np.ndarray] = {}
+    bitmaps: Dict[str, np.ndarray] = {}
+
+    for col in [c for c in CATEGORICAL_COLUMNS if c in df.columns]:
+        codes, labels = encode_groups(df[col], strip=True)
+        if len(labels) <= MAX_BITMAP_VALUES:
+            values[col] = np.asarray([str(label) for label in labels], dtype=object)
+            bitmaps[col] = _scatter_bitmaps(codes, all_rows, len(labels), n_rows)
+
+    if 'preferred_venue' in df.columns:
+        codes, labels = encode_groups(df['preferred_venue'], strip=True)
+        modality_labels = np.array(['In-Person', 'Online'], dtype=object)
+        modality_of_label = np.array([classify_modality(str(label)) == 'Online' for label in labels], dtype=np.int64)
+        modality_codes = np.where(codes >= 0, modality_of_label[np.maximum(codes, 0)], -1) if len(labels) else codes
+        values[MODALITY_COLUMN] = modality_labels
+        bitmaps[MODALITY_COLUMN] = _scatter_bitmaps(modality_codes, all_rows, len(modality_labels), n_rows)
+
+    sessions = dataset.sessions
+    values[SESSION_COLUMN] = np.asarray(sessions.categories, dtype=object)
+    bitmaps[SESSION_COLUMN] = _scatter_bitmaps(sessions.codes.astype(np.int64), sessions.row_index,
+                                               len(sessions.categories), n_rows)
+
+    score_columns = [c for c in SCORE_COLUMNS if c in df.columns] + aspect_columns(df)
+    for col in score_columns:
+        scores = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        present = ~np.isnan(scores)
+        levels, level_codes = np.unique(scores[present], return_inverse=True)
+        values[col] = levels
+        bitmaps[col] = _scatter_bitmaps(level_codes.ravel(), all_rows[present], len(levels), n_rows)
+
+    return BitmapIndex(n_rows, values, bitmaps, score_columns, dataset)
+
+
+def get_bitmap_index(data: List[Dict[str, Any]]) -> BitmapIndex:
+    """Returns the bitmap index of a dataset, building it once and caching it on the dataset"""
+    dataset = as_dataset(data)
+    if 'bitmap_index' not in dataset.cache:
+        dataset.cache['bitmap_index'] = build_bitmap_index(dataset)
+    return dataset.cache['bitmap_index']
+
+
+def filter_rows(data: List[Dict[str, Any]], conditions: List[Dict[str, Any]]) -> Tuple[np.ndarray, int]:
+    """Row positions matching every condition, and the dataset size. Raises ValueError on bad conditions."""
+    index = get_bitmap_index(data)
+    return index.rows(index.evaluate(conditions or [])), index.n_rows
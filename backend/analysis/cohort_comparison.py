@@ -0,0 +1,231 @@
+"""
+Side-by-side comparison of two cohorts of one dataset (e.g. online vs in-person).
+
+Each cohort is a list of bitmap-index conditions. Rows are labelled with a membership
+pattern (neither / first only / second only / both), and every per-cohort statistic
+is a bincount over that pattern: count, sum and sum of squares per score, NPS bucket
+counts and category counts. Both cohorts therefore come out of one grouped pass over
+the shared numeric matrix, with overlapping cohorts handled exactly.
+
+Significance: Welch's t test for score means, a two-proportion style z test for NPS
+and a chi-square test of homogeneity for category distributions. Tests assume the
+cohorts do not overlap; overlapping rows are reported.
+
+Functions:
+- cohort_membership: Membership pattern code per row for two cohort definitions
+- compare_cohorts: Per-metric values, deltas and significance for two cohorts
+"""
+
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+from .bitmap_index import get_bitmap_index
+from .distributions import t_two_sided_p, chi2_sf
+from .grouped_stats import encode_groups, SIGNIFICANCE_LEVEL
+
+SCORE_COLUMNS = ['satisfaction', 'recommendation_score']
+CATEGORY_COLUMNS = ['pacing', 'event_discovery', 'preferred_time', 'preferred_venue']
+CONFIDENCE_LEVEL = 0.95
+
+# Membership pattern: bit 0 = first cohort, bit 1 = second cohort
+_PATTERNS = 4
+_IN_FIRST = np.array([False, True, False, True])
+_IN_SECOND = np.array([False, False, True, True])
+
+
+def cohort_membership(data: List[Dict[str, Any]], first: List[Dict[str, Any]],
+                      second: List[Dict[str, Any]]) -> np.ndarray:
+    """Pattern code (0-3) per row from the bitmap index; raises ValueError on bad conditions"""
+    index = get_bitmap_index(data)
+    first_rows = np.unpackbits(index.evaluate(first), count=index.n_rows)
+    second_rows = np.unpackbits(index.evaluate(second), count=index.n_rows)
+    return first_rows.astype(np.int64) + 2 * second_rows.astype(np.int64)
+
+
+def _split(per_pattern: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cohort totals from per-pattern totals (last axis = pattern)"""
+    return per_pattern[..., _IN_FIRST].sum(axis=-1), per_pattern[..., _IN_SECOND].sum(axis=-1)
+
+
+def _round(value: float, digits: int = 4) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def _mean_comparison(n: np.ndarray, total: np.ndarray, squares: np.ndarray) -> Dict[str, Any]:
+    """Welch's t test and normal-approximation interval for the difference of two means"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        variance = (squares - n * mean * mean) / (n - 1)
+    delta = mean[1] - mean[0]
+    result = {
+        "first": {"count": int(n[0]), "average": _round(mean[0], 3)},
+        "second": {"count": int(n[1]), "average": _round(mean[1], 3)},
+        "delta": _round(delta, 3),
+        "p_value": None,
+        "confidence_interval": None,
+        "significant": False
+    }
+    if n.min() < 2:
+        return result
+
+    standard_errors = np.maximum(variance, 0) / n
+    standard_error = np.sqrt(standard_errors.sum())
+    if standard_error > 0:
+        t = delta / standard_error
+        df = standard_errors.sum() ** 2 / np.sum(standard_errors ** 2 / (n - 1))
+        p_value = t_two_sided_p(t, df)
+        z = NormalDist().inv_cdf(0.5 + CONFIDENCE_LEVEL / 2)
+        result.update({
+            "t_statistic": _round(t),
+            "df": _round(df, 2),
+            "p_value": _round(p_value, 6),
+            "confidence_interval": [_round(delta - z * standard_error, 3), _round(delta + z * standard_error, 3)],
+            "significant": bool(p_value < SIGNIFICANCE_LEVEL)
+        })
+    return result
+
+
+def _nps_comparison(buckets: np.ndarray) -> Dict[str, Any]:
+    """NPS per cohort from (cohort x [detractors, passives, promoters]) counts, with a z test"""
+    n = buckets.sum(axis=1).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        promoters, detractors = buckets[:, 2] / n, buckets[:, 0] / n
+        nps = (promoters - detractors) * 100
+        # Variance of (promoter - detractor) indicator per response
+        variance = (promoters + detractors - (promoters - detractors) ** 2) / n * 100 ** 2
+    delta = nps[1] - nps[0]
+    standard_error = np.sqrt(variance.sum())
+    result = {
+        "first": {"count": int(n[0]), "nps_score": _round(nps[0], 1)},
+        "second": {"count": int(n[1]), "nps_score": _round(nps[1], 1)},
+        "delta": _round(delta, 1),
+        "p_value": None,
+        "confidence_interval": None,
+        "significant": False
+    }
+    if n.min() >= 2 and standard_error > 0:
+        z = delta / standard_error
+        p_value = 2 * (1 - NormalDist().cdf(abs(z)))
+        z_critical = NormalDist().inv_cdf(0.5 + CONFIDENCE_LEVEL / 2)
+        result.update({
+            "z_statistic": _round(z),
+            "p_value": _round(p_value, 6),
+            "confidence_interval": [_round(delta - z_critical * standard_error, 1),
+                                    _round(delta + z_critical * standard_error, 1)],
+            "significant": bool(p_value < SIGNIFICANCE_LEVEL)
+        })
+    return result
+
+
+def _distribution_comparison(labels: np.ndarray, counts: np.ndarray) -> Dict[str, Any]:
+    """Shares per category for both cohorts and a chi-square test of homogeneity"""
+    present = counts.sum(axis=0) > 0
+    counts, labels = counts[:, present], labels[present]
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = counts / totals * 100
+
+    result = {
+        "categories": [
+            {
+                "category": str(label),
+                "first": {"count": int(counts[0, i]), "percentage": _round(shares[0, i], 1)},
+                "second": {"count": int(counts[1, i]), "percentage": _round(shares[1, i], 1)},
+                "delta": _round(shares[1, i] - shares[0, i], 1)
+            }
+            for i, label in enumerate(labels)
+        ],
+        "p_value": None,
+        "significant": False
+    }
+    if counts.shape[1] >= 2 and totals.min() > 0:
+        expected = totals * counts.sum(axis=0) / counts.sum()
+        chi_square = float(np.sum((counts - expected) ** 2 / expected))
+        p_value = chi2_sf(chi_square, counts.shape[1] - 1)
+        result.update({
+            "chi_square": _round(chi_square),
+            "df": int(counts.shape[1] - 1),
+            "p_value": _round(p_value, 6),
+            "significant": bool(p_value < SIGNIFICANCE_LEVEL)
+        })
+    return result
+
+
+def compare_cohorts(data: List[Dict[str, Any]], cohorts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compares two cohorts ({"name", "conditions"}) of a dataset: response counts, score means,
+    NPS and category shares, each with the second-minus-first delta and a significance test.
+    """
+    if not isinstance(cohorts, list) or len(cohorts) != 2:
+        return {"error": "Exactly two cohorts are required"}
+
+    dataset = as_dataset(data)
+    df = dataset.frame
+    try:
+        pattern = cohort_membership(dataset, cohorts[0].get('conditions') or [], cohorts[1].get('conditions') or [])
+    except (ValueError, AttributeError) as e:
+        return {"error": str(e)}
+
+    sizes = np.bincount(pattern, minlength=_PATTERNS)
+    first_size, second_size = _split(sizes)
+    if first_size == 0 or second_size == 0:
+        return {"error": "Both cohorts need at least one matching response"}
+
+    # Shared numeric matrix: base scores followed by every aspect rating
+    score_columns = [col for col in SCORE_COLUMNS if col in df.columns]
+    columns = score_columns + dataset.aspects.columns
+    labels = [col.replace('_', ' ').title() for col in score_columns] + dataset.aspects.labels
+    values = np.column_stack(
+        [pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) for col in score_columns]
+        + [dataset.aspects.values]
+    ) if columns else np.empty((len(df), 0))
+
+    # One grouped pass per statistic: (pattern x column) count, sum and sum of squares
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    one_hot = np.eye(_PATTERNS)[pattern]
+    counts, totals, squares = one_hot.T @ present, one_hot.T @ filled, one_hot.T @ (filled * filled)
+
+    metrics = {}
+    for j, (column, label) in enumerate(zip(columns, labels)):
+        n = np.array(_split(counts[:, j]))
+        metric = _mean_comparison(n, np.array(_split(totals[:, j])), np.array(_split(squares[:, j])))
+        metric["label"] = label
+        metrics[column] = metric
+
+    result = {
+        "cohorts": [
+            {"name": cohorts[0].get('name') or 'Cohort A', "responses": int(first_size)},
+            {"name": cohorts[1].get('name') or 'Cohort B', "responses": int(second_size)}
+        ],
+        "overlap": int(sizes[3]),
+        "metrics": metrics,
+        "distributions": {},
+        "significance_level": SIGNIFICANCE_LEVEL
+    }
+
+    if 'recommendation_score' in df.columns:
+        scores = pd.to_numeric(df['recommendation_score'], errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(scores)
+        buckets = np.where(scores[valid] <= 6, 0, np.where(scores[valid] >= 9, 2, 1))
+        per_pattern = np.bincount(pattern[valid] * 3 + buckets, minlength=_PATTERNS * 3).reshape(_PATTERNS, 3)
+        result["nps"] = _nps_comparison(np.array(_split(per_pattern.T)))
+
+    for col in [c for c in CATEGORY_COLUMNS if c in df.columns]:
+        codes, category_labels = encode_groups(df[col], strip=True)
+        valid = codes >= 0
+        per_pattern = np.bincount(pattern[valid] * len(category_labels) + codes[valid],
+                                  minlength=_PATTERNS * len(category_labels)).reshape(_PATTERNS, len(category_labels))
+        result["distributions"][col] = _distribution_comparison(category_labels, np.array(_split(per_pattern.T)))
+
+    significant = [metric["label"] for metric in metrics.values() if metric["significant"]]
+    if result.get("nps", {}).get("significant"):
+        significant.append("NPS")
+    result["significant_differences"] = significant
+    if sizes[3]:
+        result["warning"] = "Cohorts overlap; significance tests assume independent groups"
+    return result
@@ -0,0 +1,240 @@
+"""
+Full-text search over feedback comments with an inverted index.
+
+Every analyzable comment (one text column of one response) is a searchable entry.
+The index is built with one regex pass into CSR postings (term -> sorted comment ids
+with term frequencies), so a query is a few array intersections regardless of corpus
+size. Highlights are computed only for the comments on the requested page.
+
+Functions / classes:
+- CommentIndex: Inverted index with ranked, paginated AND queries
+- build_comment_index: Tokenizes the text columns into a CommentIndex
+- get_comment_index: Cached build_comment_index for a dataset
+- query_terms: Distinct lower-case query terms (trailing * kept for prefix terms)
+- search_comments: Paginated search returning comments, highlights and respondent scores
+"""
+
+import math
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset, aspect_columns
+from .text_processing import TEXT_COLUMNS, PLACEHOLDER_TEXTS
+
+# Respondent scores returned with every hit (when present), followed by every aspect rating
+SCORE_COLUMNS = ['satisfaction', 'recommendation_score']
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+_COMMENT_SEPARATOR = '\x1e'
+_SEARCH_TOKEN = re.compile(r'\x1e|[a-z0-9]+')
+_QUERY_TERM = re.compile(r'[a-z0-9]+\*?')
+
+
+class CommentIndex:
+    """
+    Inverted index over comments. Postings are stored term-major in CSR form:
+    comment ids of term t are `comment_ids[term_ptr[t]:term_ptr[t + 1]]` (ascending),
+    with matching in-comment frequencies in `term_freqs`.
+    """
+
+    def __init__(self, rows: np.ndarray, columns: np.ndarray, column_names: List[str], texts: List[str],
+                 vocabulary: np.ndarray, term_ptr: np.ndarray, comment_ids: np.ndarray,
+                 term_freqs: np.ndarray, lengths: np.ndarray):
+        self.rows = rows                # response row per comment
+        self.columns = columns          # text column code per comment
+        self.column_names = column_names
+        self.texts = texts
+        self.vocabulary = vocabulary    # sorted terms
+        self.term_ptr = term_ptr
+        self.comment_ids = comment_ids
+        self.term_freqs = term_freqs
+        self.lengths = lengths          # tokens per comment
+        self.average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _term_range(self, term: str) -> Tuple[int, int]:
+        """Vocabulary id range of an exact term, or of every term with a prefix ("park*")"""
+        if term.endswith('*'):
+            prefix = term[:-1]
+            start = np.searchsorted(self.vocabulary, prefix, side='left')
+            stop = np.searchsorted(self.vocabulary, prefix + '\U0010ffff', side='left')
+            return int(start), int(stop)
+        position = int(np.searchsorted(self.vocabulary, term))
+        found = position < len(self.vocabulary) and self.vocabulary[position] == term
+        return (position, position + 1) if found else (position, position)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(comment_ids, idf-weighted BM25 term scores) for a query term"""
+        start, stop = self._term_range(term)
+        if start == stop:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        ids = self.comment_ids[self.term_ptr[start]:self.term_ptr[stop]]
+        freqs = self.term_freqs[self.term_ptr[start]:self.term_ptr[stop]]
+        if stop - start > 1:
+            # Prefix terms: merge postings of all matching terms per comment
+            ids, inverse = np.unique(ids, return_inverse=True)
+            freqs = np.bincount(inverse.ravel(), weights=freqs)
+
+        # BM25 (k1=1.2, b=0.75)
+        n = len(self.texts)
+        idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+        norm = 1.2 * (0.25 + 0.75 * self.lengths[ids] / max(self.average_length, 1e-9))
+        return ids, idf * freqs * 2.2 / (freqs + norm)
+
+    def search(self, terms: List[str], column_codes: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Comment ids matching every term (AND), ranked by BM25 score (ties in corpus order).
+        Returns (ids, scores).
+        """
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Intersect starting from the rarest term
+        postings = sorted((self._postings(term) for term in terms), key=lambda p: len(p[0]))
+        ids, scores = postings[0]
+        for other_ids, other_scores in postings[1:]:
+            ids, mine, theirs = np.intersect1d(ids, other_ids, assume_unique=True, return_indices=True)
+            scores = scores[mine] + other_scores[theirs]
+
+        if column_codes is not None:
+            keep = np.isin(self.columns[ids], column_codes)
+            ids, scores = ids[keep], scores[keep]
+
+        order = np.lexsort((ids, -scores))
+        return ids[order], scores[order]
+
+
+def build_comment_index(df: pd.DataFrame, columns: Optional[List[str]] = None) -> CommentIndex:
+    """Tokenizes the analyzable comments of the text columns and builds the postings"""
+    columns = columns if columns is not None else [c for c in TEXT_COLUMNS if c in df.columns]
+
+    rows, column_codes, texts = [], [], []
+    for code, col in enumerate(columns):
+        for row, text in enumerate(df[col].tolist()):
+            if isinstance(text, str) and text.strip() and text not in PLACEHOLDER_TEXTS:
+                rows.append(row)
+                column_codes.append(code)
+                texts.append(text)
+
+    tokens = _SEARCH_TOKEN.findall(
+        _COMMENT_SEPARATOR.join(text.replace(_COMMENT_SEPARATOR, ' ') for text in texts).lower()
+    )
+    token_codes, token_values = pd.factorize(pd.Series(tokens, dtype=object), sort=True)
+    token_values = np.asarray(token_values, dtype=object)
+    n_comments = len(texts)
+
+    # Comment id of every token = number of separators before it; separators sort first
+    has_separator = len(token_values) and token_values[0] == _COMMENT_SEPARATOR
+    is_separator = token_codes == 0 if has_separator else np.zeros(len(tokens), dtype=bool)
+    comment_of_token = np.cumsum(is_separator)[~is_separator]
+    term_of_token = token_codes[~is_separator] - (1 if has_separator else 0)
+    vocabulary = token_values[1:] if has_separator else token_values
+
+    # Term-major postings: unique (term, comment) keys are sorted by term, then comment
+    n_keys = max(1, n_comments)
+    keys, freqs = np.unique(term_of_token.astype(np.int64) * n_keys + comment_of_token, return_counts=True)
+    term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n_keys, minlength=len(vocabulary)), out=term_ptr[1:])
+
+    return CommentIndex(
+        rows=np.asarray(rows, dtype=np.int64),
+        columns=np.asarray(column_codes, dtype=np.int64),
+        column_names=list(columns),
+        texts=texts,
+        vocabulary=vocabulary.astype(str),
+        term_ptr=term_ptr,
+        comment_ids=keys % n_keys,
+        term_freqs=freqs.astype(float),
+        lengths=np.bincount(comment_of_token, minlength=n_comments).astype(float)
+    )
+
+
+def get_comment_index(data: List[Dict[str, Any]]) -> CommentIndex:
+    """Returns the comment index of a dataset, building it once and caching it on the dataset"""
+    dataset = as_dataset(data)
+    if 'comment_index' not in dataset.cache:
+        dataset.cache['comment_index'] = build_comment_index(dataset.frame)
+    return dataset.cache['comment_index']
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct lower-case words of a query, in order; a trailing * marks a prefix term"""
+    return list(dict.fromkeys(_QUERY_TERM.findall(query.lower())))
+
+
+def _highlights(text: str, terms: List[str]) -> List[List[int]]:
+    """[start, end] character spans of the query terms (whole words, or word prefixes for "term*")"""
+    alternatives = [
+        re.escape(term[:-1]) + r'[a-z0-9]*' if term.endswith('*') else re.escape(term) + r'(?![a-z0-9])'
+        for term in terms
+    ]
+    pattern = re.compile(r'(?<![a-z0-9])(?:' + '|'.join(alternatives) + ')', re.IGNORECASE)
+    return [[match.start(), match.end()] for match in pattern.finditer(text)]
+
+
+def _respondent_scores(df: pd.DataFrame, row: int) -> Dict[str, Any]:
+    scores = {}
+    for col in SCORE_COLUMNS + aspect_columns(df):
+        if col in df.columns:
+            value = pd.to_numeric(df[col].iat[row], errors='coerce')
+            scores[col] = None if pd.isna(value) else float(value)
+    return scores
+
+
+def search_comments(data: List[Dict[str, Any]], query: str, page: int = 1,
+                    page_size: int = DEFAULT_PAGE_SIZE, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Searches all comments for responses containing every query term (trailing * = prefix).
+    Returns one page of ranked hits with highlight spans and the respondent's scores.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return {"error": "Search query must contain at least one word"}
+
+    dataset = as_dataset(data)
+    index = get_comment_index(dataset)
+
+    column_codes = None
+    if columns:
+        unknown = [col for col in columns if col not in index.column_names]
+        if unknown:
+            return {"error": f"Unknown text column(s): {', '.join(unknown)}"}
+        column_codes = [index.column_names.index(col) for col in columns]
+
+    page = max(1, int(page))
+    page_size = min(max(1, int(page_size)), MAX_PAGE_SIZE)
+    ids, scores = index.search(terms, column_codes)
+    page_ids = ids[(page - 1) * page_size:page * page_size]
+    page_scores = scores[(page - 1) * page_size:page * page_size]
+
+    df = dataset.frame
+    results = []
+    for comment, score in zip(page_ids.tolist(), page_scores.tolist()):
+        text = index.texts[comment]
+        row = int(index.rows[comment])
+        results.append({
+            "row": row,
+            "column": index.column_names[index.columns[comment]],
+            "text": text,
+            "highlights": _highlights(text, terms),
+            "relevance": round(score, 4),
+            "scores": _respondent_scores(df, row)
+        })
+
+    return {
+        "query": query,
+        "terms": terms,
+        "total": int(len(ids)),
+        "page": page,
+        "page_size": page_size,
+        "pages": math.ceil(len(ids) / page_size),
+        "results": results
+    }
@@ -2,64 +2,83 @@
 Comparative analysis for ratings, correlations, and pacing.
 
 Functions:
-- generate_rating_comparison: Compares aspect ratings (venue, speakers, content) against overall satisfaction
-- generate_correlation_analysis: Analyzes correlation between aspect ratings and overall satisfaction
+- generate_rating_comparison: Compares every aspect rating (venue, speakers, content, ...) against overall satisfaction
+- generate_correlation_analysis: Analyzes correlation between every aspect rating and overall satisfaction
 - generate_pacing_analysis: Analyzes pacing satisfaction correlation
 """
 
 import pandas as pd
 import numpy as np
+from itertools import combinations
 from typing import Dict, Any, List
 
+from backend.processing.dataset import as_dataset, ASPECT_SUFFIX
+from .grouped_stats import encode_groups, compare_groups, significance_summary, SIGNIFICANCE_LEVEL
+from .correlation_engine import get_correlation_matrix
+
+# Aspect-vs-aspect scatter plots sent to the frontend (most correlated pairs when there are more)
+MAX_SCATTER_PAIRS = 10
+
+
+def _aspect_scatter_pairs(df: pd.DataFrame, columns: List[str], engine) -> Dict[str, List[Dict[str, Any]]]:
+    """Points of each aspect pair keyed '<a>_vs_<b>' in aspect order, capped at MAX_SCATTER_PAIRS"""
+    pairs = list(combinations(columns, 2))
+    if len(pairs) > MAX_SCATTER_PAIRS:
+        strength = [abs(np.nan_to_num(engine.pearson[engine.index(a), engine.index(b)])) for a, b in pairs]
+        keep = sorted(np.argsort(strength, kind='stable')[::-1][:MAX_SCATTER_PAIRS])
+        pairs = [pairs[i] for i in keep]
+    return {
+        f"{a[:-len(ASPECT_SUFFIX)]}_vs_{b[:-len(ASPECT_SUFFIX)]}": df[[a, b]].dropna().to_dict('records')
+        for a, b in pairs
+    }
+
 
 def generate_rating_comparison(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Compares different aspect ratings (venue, speakers, content) against overall satisfaction baseline.
+    Compares every aspect rating found at ingestion against the overall satisfaction baseline.
     Creates radar chart data optimized for strengths/weaknesses analysis.
+    Means, counts and distributions come from the shared correlation engine.
     """
-    df = pd.DataFrame(data)
+    dataset = as_dataset(data)
+    df = dataset.frame
+    aspects = dataset.aspects
+    engine = get_correlation_matrix(data)
     
-    rating_columns = ['venue_rating', 'speaker_rating', 'content_rating']
-    available_ratings = [col for col in rating_columns if col in df.columns]
+    available_ratings = aspects.columns
     
     if not available_ratings:
         return {"error": "No rating data found"}
     
     # Calculate overall satisfaction baseline
     overall_satisfaction = 0
-    if 'satisfaction' in df.columns:
-        satisfaction_ratings = pd.to_numeric(df['satisfaction'], errors='coerce').dropna()
-        if len(satisfaction_ratings) > 0:
-            overall_satisfaction = float(satisfaction_ratings.mean())
+    satisfaction_index = engine.index('satisfaction')
+    if satisfaction_index is not None and engine.counts[satisfaction_index] > 0:
+        overall_satisfaction = float(engine.means[satisfaction_index])
+    
+    # Averages and baseline differences for all aspects at once
+    indices = [engine.index(col) for col in available_ratings]
+    averages = engine.means[indices]
+    differences = averages - overall_satisfaction
+    categories = np.where(differences > 0.1, "strength", np.where(differences < -0.1, "weakness", "adequate"))
     
-    # Calculate averages for each aspect
     comparison_data = {}
-    for col in available_ratings:
-        ratings = pd.to_numeric(df[col], errors='coerce').dropna()
-        if len(ratings) > 0:
-            aspect_name = col.replace('_rating', '').title()
-            aspect_avg = float(ratings.mean())
-            comparison_data[aspect_name] = {
-                "average": aspect_avg,
-                "count": len(ratings),
-                "distribution": ratings.value_counts().sort_index().to_dict(),
-                # NEW: Performance relative to overall satisfaction
-                "vs_overall": aspect_avg - overall_satisfaction,
-                "performance_category": "strength" if aspect_avg > overall_satisfaction + 0.1 else "weakness" if aspect_avg < overall_satisfaction - 0.1 else "adequate"
-            }
+    for position in np.flatnonzero(engine.counts[indices] > 0):
+        col_index = indices[position]
+        comparison_data[aspects.labels[position]] = {
+            "average": float(averages[position]),
+            "count": int(engine.counts[col_index]),
+            "distribution": engine.distributions[col_index],
+            # NEW: Performance relative to overall satisfaction
+            "vs_overall": float(differences[position]),
+            "performance_category": str(categories[position])
+        }
     
     print(f"DEBUG: Rating comparison data keys: {list(comparison_data.keys())}")
     print(f"DEBUG: Overall satisfaction baseline: {overall_satisfaction}")
     print(f"DEBUG: Rating comparison data structure: {comparison_data}")
     
     # Prepare data for scatter/line plots comparing two rating aspects
-    scatter_pairs = {}
-    if 'venue_rating' in available_ratings and 'speaker_rating' in available_ratings:
-        scatter_pairs['venue_vs_speaker'] = df[['venue_rating', 'speaker_rating']].dropna().to_dict('records')
-    if 'venue_rating' in available_ratings and 'content_rating' in available_ratings:
-        scatter_pairs['venue_vs_content'] = df[['venue_rating', 'content_rating']].dropna().to_dict('records')
-    if 'speaker_rating' in available_ratings and 'content_rating' in available_ratings:
-        scatter_pairs['speaker_vs_content'] = df[['speaker_rating', 'content_rating']].dropna().to_dict('records')
+    scatter_pairs = _aspect_scatter_pairs(df, available_ratings, engine)
 
     return {
         "chart_type": "rating_comparison",
@@ -107,16 +126,18 @@ def generate_correlation_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Analyzes correlation between aspect ratings and overall satisfaction.
     Identifies which aspects have the strongest impact on overall satisfaction.
+    Coefficients, p-values and intervals come from the shared correlation engine.
     """
-    df = pd.DataFrame(data)
+    dataset = as_dataset(data)
+    df = dataset.frame
+    engine = get_correlation_matrix(data)
     
     # Required columns
     if 'satisfaction' not in df.columns:
         return {"error": "No satisfaction data found for correlation analysis"}
     
-    # Available aspect rating columns
-    rating_columns = ['venue_rating', 'speaker_rating', 'content_rating']
-    available_columns = [col for col in rating_columns if col in df.columns]
+    # Available aspect rating columns (every aspect found at ingestion)
+    available_columns = dataset.aspects.columns
     
     if not available_columns:
         return {"error": "No aspect rating data found for correlation analysis"}
@@ -125,15 +146,14 @@ def generate_correlation_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     correlations = []
     scatter_data = []
     
-    for col in available_columns:
-        # Clean data
-        clean_df = df[[col, 'satisfaction']].dropna()
+    for col, aspect_name in zip(available_columns, dataset.aspects.labels):
+        pair = engine.pair(col, 'satisfaction')
         
-        if len(clean_df) < 10:  # Need minimum sample size
+        if pair['n'] < 10 or pair['pearson'] is None:  # Need minimum sample size
             continue
         
-        # Calculate Pearson correlation
-        correlation = clean_df[col].corr(clean_df['satisfaction'])
+        # Pairwise-complete Pearson correlation
+        correlation = pair['pearson']
         
         # Categorize impact level
         if correlation > 0.7:
@@ -143,17 +163,20 @@ def generate_correlation_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
         else:
             impact_level = 'low'
         
-        # Format aspect name
-        aspect_name = col.replace('_rating', '').replace('_', ' ').title()
-        
         correlations.append({
             "aspect": aspect_name,
             "correlation": float(correlation),
             "impact_level": impact_level,
-            "sample_size": len(clean_df)
+            "sample_size": pair['n'],
+            "p_value": pair['pearson_p_value'],
+            "confidence_interval": pair['pearson_ci'],
+            "spearman": pair['spearman'],
+            "spearman_p_value": pair['spearman_p_value'],
+            "significant": pair['pearson_p_value'] is not None and pair['pearson_p_value'] < SIGNIFICANCE_LEVEL
         })
         
         # Prepare scatter data for visualization
+        clean_df = df[[col, 'satisfaction']].dropna()
         scatter_points = clean_df.rename(columns={
             col: 'aspect_rating',
             'satisfaction': 'satisfaction'
@@ -187,6 +210,8 @@ def generate_correlation_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
             "correlations": correlations,
             "scatter_data": scatter_data,
             "insights": insights,
+            # Full Pearson/Spearman matrix over every numeric survey column (heatmap)
+            "matrix": engine.to_dict(),
             "stats": {
                 "strongest_driver": correlations[0]['aspect'] if correlations else None,
                 "strongest_correlation": correlations[0]['correlation'] if correlations else 0,
@@ -201,7 +226,7 @@ def generate_pacing_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     Analyzes pacing satisfaction correlation.
     Shows how event pacing affects overall satisfaction.
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     required_columns = ['pacing', 'satisfaction']
     missing_columns = [col for col in required_columns if col not in df.columns]
@@ -209,28 +234,25 @@ def generate_pacing_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     if missing_columns:
         return {"error": f"Missing required columns: {missing_columns}"}
     
-    # Clean data - remove null values
-    clean_df = df[['pacing', 'satisfaction']].dropna()
+    # Group satisfaction by the dictionary-encoded pacing codes (null pacing/satisfaction skipped)
+    pacing_codes, pacing_labels = encode_groups(df['pacing'])
+    satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+    comparison = compare_groups(pacing_codes, satisfaction, len(pacing_labels))
+    moments = comparison.moments
+    total_clean = int(moments.count.sum())
     
-    if clean_df.empty:
+    if total_clean == 0:
         return {"error": "No valid pacing/satisfaction data found"}
     
-    # Group by pacing and calculate satisfaction stats
-    pacing_groups = clean_df.groupby('pacing')['satisfaction'].agg([
-        'count', 'mean', 'std'
-    ]).round(2)
-    
     # Prepare chart data
     chart_data = []
     stats_summary = {}
     
-    # Convert pandas groupby result to dictionary for easier type handling
-    pacing_stats = pacing_groups.to_dict('index')
-    
-    for pacing_category, stats in pacing_stats.items():
-        count = int(stats['count'])
-        mean_satisfaction = float(stats['mean'])
-        std_satisfaction = float(stats['std']) if not pd.isna(stats['std']) else 0.0
+    for code in np.flatnonzero(moments.count):
+        pacing_category = pacing_labels[code]
+        count = int(moments.count[code])
+        mean_satisfaction = float(np.round(moments.mean[code], 2))
+        std_satisfaction = float(np.round(moments.std[code], 2)) if not pd.isna(moments.std[code]) else 0.0
         
         chart_data.append({
             "category": pacing_category,
@@ -242,14 +264,14 @@ def generate_pacing_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
         stats_summary[pacing_category] = {
             "count": count,
             "avg_satisfaction": mean_satisfaction,
-            "percentage": round((count / len(clean_df)) * 100, 1)
+            "percentage": round((count / total_clean) * 100, 1)
         }
     
     # Sort by satisfaction (highest first)
     chart_data.sort(key=lambda x: x['value'], reverse=True)
     
     # Calculate overall insights
-    total_responses = len(clean_df)
+    total_responses = total_clean
     best_pacing = max(chart_data, key=lambda x: x['value'])
     worst_pacing = min(chart_data, key=lambda x: x['value'])
     
@@ -282,6 +304,9 @@ def generate_pacing_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "worst_pacing": worst_pacing['category']
             },
             
-            "insights": insights
+            "insights": insights,
+            
+            # ANOVA / Kruskal-Wallis: do pacing groups really differ in satisfaction?
+            "significance": significance_summary(comparison)
         }
     }
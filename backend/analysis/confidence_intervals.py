@@ -0,0 +1,117 @@
+"""
+Confidence intervals for the headline metrics (NPS, average satisfaction).
+
+Both metrics only depend on how many responses fall in each category (NPS bucket or
+rating value), so a bootstrap resample is reduced to a row of category counts: small
+samples draw an index matrix and bincount all resamples in one call, large samples
+draw the counts directly from the equivalent multinomial. An analytic (normal
+approximation) interval is used when the sample is large enough for it to match.
+
+Functions:
+- bootstrap_category_counts: (resamples x categories) count matrix of bootstrap resamples
+- nps_interval: Confidence interval for the Net Promoter Score
+- mean_interval: Confidence interval for the mean of a rating
+"""
+
+from statistics import NormalDist
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+CONFIDENCE_LEVEL = 0.95
+BOOTSTRAP_RESAMPLES = 10000
+SEED = 42
+# Samples at least this large use the analytic interval when method='auto'
+ANALYTIC_MIN_RESPONSES = 1000
+# Largest index matrix (resamples x responses) drawn explicitly; beyond it counts are drawn multinomially
+MAX_INDEX_MATRIX = 1 << 19
+
+
+def bootstrap_category_counts(codes: np.ndarray, n_categories: int, resamples: int = BOOTSTRAP_RESAMPLES,
+                              seed: int = SEED) -> np.ndarray:
+    """
+    Category counts of `resamples` bootstrap resamples of `codes` (integer categories).
+    Resampling responses with replacement only matters through these counts.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(codes)
+    if resamples * n <= MAX_INDEX_MATRIX:
+        sampled = codes[rng.integers(n, size=(resamples, n))]
+        offsets = np.arange(resamples)[:, None] * n_categories
+        return np.bincount((sampled + offsets).ravel(), minlength=resamples * n_categories) \
+            .reshape(resamples, n_categories)
+    shares = np.bincount(codes, minlength=n_categories) / n
+    return rng.multinomial(n, shares, size=resamples)
+
+
+def _interval(estimate: float, lower: float, upper: float, standard_error: float, method: str,
+              level: float, resamples: Optional[int]) -> Dict[str, Any]:
+    return {
+        "lower": round(float(lower), 3),
+        "upper": round(float(upper), 3),
+        "margin_of_error": round(float(max(estimate - lower, upper - estimate)), 3),
+        "standard_error": round(float(standard_error), 4),
+        "level": level,
+        "method": method,
+        "resamples": resamples
+    }
+
+
+def _use_analytic(method: str, n: int) -> bool:
+    return method == 'analytic' or (method == 'auto' and n >= ANALYTIC_MIN_RESPONSES)
+
+
+def nps_interval(scores: np.ndarray, level: float = CONFIDENCE_LEVEL, method: str = 'auto',
+                 resamples: int = BOOTSTRAP_RESAMPLES) -> Optional[Dict[str, Any]]:
+    """
+    Interval for NPS = (% promoters - % detractors). method: 'bootstrap' (percentile),
+    'analytic' (normal approximation of the trinomial) or 'auto' (analytic for large samples).
+    """
+    scores = np.asarray(scores, dtype=float)
+    scores = scores[~np.isnan(scores)]
+    n = len(scores)
+    if n < 2:
+        return None
+
+    # 0 = detractor (0-6), 1 = passive (7-8), 2 = promoter (9-10)
+    buckets = np.where(scores <= 6, 0, np.where(scores >= 9, 2, 1))
+    counts = np.bincount(buckets, minlength=3)
+    promoters, detractors = counts[2] / n, counts[0] / n
+    nps = (promoters - detractors) * 100
+
+    if _use_analytic(method, n):
+        standard_error = np.sqrt((promoters + detractors - (promoters - detractors) ** 2) / n) * 100
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        lower, upper = max(-100.0, nps - z * standard_error), min(100.0, nps + z * standard_error)
+        return _interval(nps, lower, upper, standard_error, 'analytic', level, None)
+
+    samples = bootstrap_category_counts(buckets, 3, resamples)
+    bootstrap_nps = (samples[:, 2] - samples[:, 0]) / n * 100
+    lower, upper = np.quantile(bootstrap_nps, [0.5 - level / 2, 0.5 + level / 2])
+    return _interval(nps, lower, upper, bootstrap_nps.std(ddof=1), 'bootstrap', level, resamples)
+
+
+def mean_interval(values: np.ndarray, level: float = CONFIDENCE_LEVEL, method: str = 'auto',
+                  resamples: int = BOOTSTRAP_RESAMPLES) -> Optional[Dict[str, Any]]:
+    """
+    Interval for the mean of a rating. The bootstrap resamples the distinct rating values
+    (a handful for 1-5 scales); the analytic path is the normal-approximation interval.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n < 2:
+        return None
+    mean = values.mean()
+
+    if _use_analytic(method, n):
+        standard_error = values.std(ddof=1) / np.sqrt(n)
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        return _interval(mean, mean - z * standard_error, mean + z * standard_error, standard_error,
+                         'analytic', level, None)
+
+    distinct, codes = np.unique(values, return_inverse=True)
+    samples = bootstrap_category_counts(codes.ravel(), len(distinct), resamples)
+    bootstrap_means = samples @ distinct / n
+    lower, upper = np.quantile(bootstrap_means, [0.5 - level / 2, 0.5 + level / 2])
+    return _interval(mean, lower, upper, bootstrap_means.std(ddof=1), 'bootstrap', level, resamples)
@@ -0,0 +1,204 @@
+"""
+Vectorized correlation engine for the numeric survey columns.
+
+Computes pairwise-complete (NaN-aware) Pearson and Spearman matrices for every numeric
+column at once with a few matrix products, plus two-sided p-values (Student t via the
+regularized incomplete beta function) and Fisher-z confidence intervals. Per-column
+summaries (count, mean, value distribution) come from the same numeric matrix, and the
+whole result is cached on the dataset so every section reads the same numbers.
+
+Functions / classes:
+- CorrelationMatrix: Column summaries, correlation matrices, p-values and intervals
+- numeric_survey_columns: Numeric survey columns present in a frame (satisfaction, NPS, aspect ratings)
+- pairwise_pearson: NaN-aware Pearson matrix and pairwise sample sizes
+- pairwise_spearman: NaN-aware Spearman matrix (average ranks per pairwise-complete subset)
+- correlation_p_values: Two-sided p-values for correlation coefficients
+- correlation_intervals: Fisher-z confidence intervals for correlation coefficients
+- get_correlation_matrix: Cached engine result for a dataset
+"""
+
+from statistics import NormalDist
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset, aspect_columns
+from .distributions import incomplete_beta
+
+BASE_NUMERIC_COLUMNS = ['satisfaction', 'recommendation_score']
+CONFIDENCE_LEVEL = 0.95
+
+
+class CorrelationMatrix(NamedTuple):
+    columns: List[str]
+    counts: np.ndarray              # non-null values per column
+    means: np.ndarray
+    distributions: List[Dict[Any, int]]  # value -> count per column (sorted by value)
+    n: np.ndarray                   # pairwise-complete sample sizes
+    pearson: np.ndarray
+    spearman: np.ndarray
+    pearson_p: np.ndarray
+    spearman_p: np.ndarray
+    pearson_ci: np.ndarray          # (k, k, 2) lower/upper bounds
+    spearman_ci: np.ndarray
+
+    def index(self, column: str) -> Optional[int]:
+        return self.columns.index(column) if column in self.columns else None
+
+    def pair(self, first: str, second: str) -> Optional[Dict[str, Any]]:
+        """All statistics of one column pair as a JSON-ready dict (None if a column is missing)"""
+        i, j = self.index(first), self.index(second)
+        if i is None or j is None:
+            return None
+        return {
+            "n": int(self.n[i, j]),
+            "pearson": _json_float(self.pearson[i, j]),
+            "pearson_p_value": _json_float(self.pearson_p[i, j]),
+            "pearson_ci": [_json_float(bound) for bound in self.pearson_ci[i, j]],
+            "spearman": _json_float(self.spearman[i, j]),
+            "spearman_p_value": _json_float(self.spearman_p[i, j]),
+            "spearman_ci": [_json_float(bound) for bound in self.spearman_ci[i, j]]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Matrix payload for heatmaps (NaN -> None)"""
+        def matrix(values):
+            return [[_json_float(value) for value in row] for row in values]
+        return {
+            "columns": self.columns,
+            "n": self.n.astype(int).tolist(),
+            "pearson": matrix(self.pearson),
+            "pearson_p_values": matrix(self.pearson_p),
+            "spearman": matrix(self.spearman),
+            "spearman_p_values": matrix(self.spearman_p),
+            "confidence_level": CONFIDENCE_LEVEL
+        }
+
+
+def _json_float(value: float) -> Optional[float]:
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def numeric_survey_columns(df: pd.DataFrame) -> List[str]:
+    """Satisfaction, recommendation score and every aspect rating column present in the frame"""
+    return [col for col in BASE_NUMERIC_COLUMNS if col in df.columns] + aspect_columns(df)
+
+
+def pairwise_pearson(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pearson correlation for every column pair over rows where both are non-null.
+    Returns (r, n). Columns are centered first so the sum-of-products form stays stable.
+    """
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        centered = values - np.nanmean(values, axis=0)
+    filled = np.where(present, centered, 0.0)
+    mask = present.astype(float)
+
+    n = mask.T @ mask
+    sums = filled.T @ mask                 # sums[i, j]: sum of x_i where x_j is present too
+    squares = (filled * filled).T @ mask
+    products = filled.T @ filled
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products - sums * sums.T / n
+        variance = squares - sums * sums / n
+        r = covariance / np.sqrt(variance * variance.T)
+    r[n < 2] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _average_ranks(values: np.ndarray) -> np.ndarray:
+    """Column-wise average ranks (ties share the mean rank); NaN stays NaN"""
+    return pd.DataFrame(values).rank(method='average').to_numpy(dtype=float)
+
+
+def pairwise_spearman(values: np.ndarray) -> np.ndarray:
+    """
+    Spearman correlation = Pearson on average ranks. Ranks are computed once per column;
+    pairs whose complete-case rows differ from either column's own rows are re-ranked on
+    their shared rows so results match pairwise deletion exactly.
+    """
+    present = ~np.isnan(values)
+    rho, n = pairwise_pearson(_average_ranks(values))
+    own = present.sum(axis=0)
+
+    for i, j in zip(*np.nonzero(np.triu((n != own[:, None]) | (n != own[None, :]), k=1))):
+        shared = present[:, i] & present[:, j]
+        if shared.sum() < 2:
+            continue
+        pair_r, _ = pairwise_pearson(_average_ranks(values[shared][:, [i, j]]))
+        rho[i, j] = rho[j, i] = pair_r[0, 1]
+    return rho
+
+
+def correlation_p_values(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Two-sided p-values of H0: rho = 0 using t = r * sqrt((n - 2) / (1 - r^2)) with n - 2 df"""
+    df = np.asarray(n, dtype=float) - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_squared = r * r * df / np.maximum(1 - r * r, 1e-300)
+        p = incomplete_beta(df / 2, np.full_like(df, 0.5), df / (df + t_squared))
+    p[df < 1] = np.nan
+    return p
+
+
+def correlation_intervals(r: np.ndarray, n: np.ndarray, spearman: bool = False,
+                          level: float = CONFIDENCE_LEVEL) -> np.ndarray:
+    """
+    Fisher-z confidence intervals (k, k, 2). Spearman uses the Fieller et al. standard
+    error sqrt(1.06 / (n - 3)).
+    """
+    z_critical = NormalDist().inv_cdf(0.5 + level / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.arctanh(np.clip(r, -0.999999, 0.999999))
+        se = np.sqrt((1.06 if spearman else 1.0) / (np.asarray(n, dtype=float) - 3))
+        bounds = np.stack([np.tanh(z - z_critical * se), np.tanh(z + z_critical * se)], axis=-1)
+    bounds[np.asarray(n) <= 3] = np.nan
+    return bounds
+
+
+def _distribution(values: np.ndarray, integer_valued: bool) -> Dict[Any, int]:
+    present = values[~np.isnan(values)]
+    uniques, counts = np.unique(present, return_counts=True)
+    keys = uniques.astype(int).tolist() if integer_valued else uniques.tolist()
+    return dict(zip(keys, counts.tolist()))
+
+
+def build_correlation_matrix(df: pd.DataFrame, columns: Optional[List[str]] = None) -> CorrelationMatrix:
+    """Runs the engine over the numeric survey columns of a frame (non-numeric values -> NaN)"""
+    columns = columns if columns is not None else numeric_survey_columns(df)
+    numeric = [pd.to_numeric(df[col], errors='coerce') for col in columns]
+    values = np.column_stack([series.to_numpy(dtype=float) for series in numeric]) if columns \
+        else np.empty((len(df), 0))
+
+    pearson, n = pairwise_pearson(values)
+    spearman = pairwise_spearman(values)
+    counts = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(values, axis=0) / counts
+
+    return CorrelationMatrix(
+        columns=list(columns),
+        counts=counts,
+        means=means,
+        distributions=[
+            _distribution(values[:, i], pd.api.types.is_integer_dtype(series.dtype))
+            for i, series in enumerate(numeric)
+        ],
+        n=n,
+        pearson=pearson,
+        spearman=spearman,
+        pearson_p=correlation_p_values(pearson, n),
+        spearman_p=correlation_p_values(spearman, n),
+        pearson_ci=correlation_intervals(pearson, n),
+        spearman_ci=correlation_intervals(spearman, n, spearman=True)
+    )
+
+
+def get_correlation_matrix(data: List[Dict[str, Any]]) -> CorrelationMatrix:
+    """Returns the correlation engine result for a dataset, computed once and cached on it"""
+    dataset = as_dataset(data)
+    if 'correlation_matrix' not in dataset.cache:
+        dataset.cache['correlation_matrix'] = build_correlation_matrix(dataset.frame)
+    return dataset.cache['correlation_matrix']
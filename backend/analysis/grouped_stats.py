@@ -0,0 +1,187 @@
+"""
+Grouped statistics over dictionary-encoded (integer code) columns.
+
+Functions:
+- encode_groups: Returns integer group codes and labels for a categorical/object column
+- group_moments: Computes count, mean and sample std per group in one bincount pass
+- compare_groups: Group moments plus one-way ANOVA and Kruskal-Wallis tests in one grouped pass
+- significance_summary: JSON-ready test results of a GroupComparison
+- value_count_order: Orders present groups like pandas value_counts (count desc, first appearance)
+"""
+
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .distributions import f_sf, chi2_sf
+
+SIGNIFICANCE_LEVEL = 0.05
+
+
+class GroupMoments(NamedTuple):
+    count: np.ndarray  # non-null values per group
+    mean: np.ndarray   # NaN for empty groups
+    std: np.ndarray    # sample std (ddof=1), NaN for groups with fewer than 2 values
+
+
+class GroupTest(NamedTuple):
+    statistic: float    # F (ANOVA) or H (Kruskal-Wallis); NaN when the test is undefined
+    df: Tuple[int, ...] # (between, within) for ANOVA, (groups - 1,) for Kruskal-Wallis
+    p_value: float
+    effect_size: float  # eta squared (ANOVA) or epsilon squared (Kruskal-Wallis)
+
+
+class GroupComparison(NamedTuple):
+    moments: GroupMoments
+    mean_rank: np.ndarray  # mean rank of the values per group (NaN for empty groups)
+    anova: GroupTest
+    kruskal: GroupTest
+
+
+def encode_groups(series: pd.Series, fill_value: Optional[str] = None,
+                  strip: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (codes, labels) for a column, reusing categorical codes when available.
+    Labels are sorted (matching groupby order); missing values get code -1, or the
+    `fill_value` label if given. With `strip`, labels are stringified and stripped,
+    and labels that collapse to the same text share one code. Label cleanup runs on
+    the distinct values only, never per row.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy(dtype=np.int64)
+        labels = np.asarray(series.cat.categories, dtype=object)
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+        codes = codes.astype(np.int64)
+        labels = np.asarray(uniques, dtype=object)
+
+    if fill_value is not None:
+        labels = np.append(labels, np.array([fill_value], dtype=object))
+        codes = np.where(codes < 0, len(labels) - 1, codes)
+
+    if strip and len(labels):
+        labels = np.array([str(label).strip() for label in labels], dtype=object)
+
+        # Merge labels that became identical and restore sorted label order
+        merged, inverse = np.unique(labels, return_inverse=True)
+        codes = np.where(codes >= 0, inverse.ravel()[codes], -1)
+        labels = merged.astype(object)
+
+    return codes, labels
+
+
+def group_moments(codes: np.ndarray, values: np.ndarray, n_groups: int) -> GroupMoments:
+    """
+    Count, mean and sample std of `values` per group code, skipping code -1 and NaN values.
+    Uses a two-pass (mean, then squared deviations) bincount for numerical stability.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = (codes >= 0) & ~np.isnan(values)
+    group_codes, group_values = codes[valid], values[valid]
+
+    count = np.bincount(group_codes, minlength=n_groups)
+    total = np.bincount(group_codes, weights=group_values, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        deviations = group_values - mean[group_codes]
+        squares = np.bincount(group_codes, weights=deviations * deviations, minlength=n_groups)
+        std = np.where(count > 1, np.sqrt(squares / (count - 1)), np.nan)
+
+    return GroupMoments(count, mean, std)
+
+
+def _average_ranks(values: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Average ranks (1-based, ties share the mean rank) and the tie correction sum(t^3 - t)"""
+    distinct, inverse, ties = np.unique(values, return_inverse=True, return_counts=True)
+    upper = np.cumsum(ties)
+    rank_of_value = upper - (ties - 1) / 2
+    return rank_of_value[inverse.ravel()], float(np.sum(ties.astype(float) ** 3 - ties))
+
+
+def compare_groups(codes: np.ndarray, values: np.ndarray, n_groups: int) -> GroupComparison:
+    """
+    Count, mean and std per group plus one-way ANOVA (F test) and Kruskal-Wallis (H test,
+    tie-corrected) of whether the groups differ. Code -1 and NaN values are skipped; empty
+    groups do not count towards the degrees of freedom. All per-group sums are bincounts.
+    """
+    values = np.asarray(values, dtype=float)
+    moments = group_moments(codes, values, n_groups)
+    valid = (codes >= 0) & ~np.isnan(values)
+    group_codes, group_values = codes[valid], values[valid]
+
+    n = len(group_values)
+    k = int(np.count_nonzero(moments.count))
+    present = moments.count > 0
+    undefined = GroupTest(float('nan'), (), float('nan'), float('nan'))
+    if k < 2 or n <= k:
+        return GroupComparison(moments, np.full(n_groups, np.nan), undefined, undefined)
+
+    # One-way ANOVA from the group moments
+    grand_mean = group_values.mean()
+    count, mean = moments.count[present], moments.mean[present]
+    variance = np.nan_to_num(moments.std[present] ** 2)
+    ss_between = float(np.sum(count * (mean - grand_mean) ** 2))
+    ss_within = float(np.sum((count - 1) * variance))
+    df_between, df_within = k - 1, n - k
+    if ss_within > 0:
+        f = (ss_between / df_between) / (ss_within / df_within)
+        anova = GroupTest(float(f), (df_between, df_within), f_sf(f, df_between, df_within),
+                          ss_between / (ss_between + ss_within))
+    else:
+        anova = undefined
+
+    # Kruskal-Wallis on the ranks of all values
+    ranks, tie_sum = _average_ranks(group_values)
+    rank_sums = np.bincount(group_codes, weights=ranks, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_rank = rank_sums / moments.count
+    tie_correction = 1 - tie_sum / (n ** 3 - n)
+    if tie_correction > 0:
+        h = (12 / (n * (n + 1)) * np.sum(rank_sums[present] ** 2 / count) - 3 * (n + 1)) / tie_correction
+        kruskal = GroupTest(float(h), (df_between,), float(chi2_sf(h, df_between)), float(h / (n - 1)))
+    else:
+        kruskal = undefined
+
+    return GroupComparison(moments, mean_rank, anova, kruskal)
+
+
+def _json_float(value: float, digits: int) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def significance_summary(comparison: GroupComparison, score: str = 'satisfaction') -> Dict[str, Any]:
+    """Test results for a section payload: statistics, p-values and a significant flag"""
+    anova, kruskal = comparison.anova, comparison.kruskal
+    p_values = [p for p in (anova.p_value, kruskal.p_value) if not np.isnan(p)]
+    return {
+        "score": score,
+        "groups": int(np.count_nonzero(comparison.moments.count)),
+        "anova": {
+            "f_statistic": _json_float(anova.statistic, 4),
+            "df": list(anova.df),
+            "p_value": _json_float(anova.p_value, 6),
+            "eta_squared": _json_float(anova.effect_size, 4)
+        },
+        "kruskal_wallis": {
+            "h_statistic": _json_float(kruskal.statistic, 4),
+            "df": list(kruskal.df),
+            "p_value": _json_float(kruskal.p_value, 6),
+            "epsilon_squared": _json_float(kruskal.effect_size, 4)
+        },
+        # Both tests must agree, so skewed rating scales do not produce a false positive
+        "significant": bool(p_values) and max(p_values) < SIGNIFICANCE_LEVEL,
+        "significance_level": SIGNIFICANCE_LEVEL
+    }
+
+
+def value_count_order(codes: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (present_codes, counts) ordered by count descending, ties broken by first appearance.
+    Matches the ordering of pandas value_counts on the decoded column.
+    """
+    valid_codes = codes[codes >= 0]
+    counts = np.bincount(valid_codes, minlength=n_groups)
+    present, first_seen = np.unique(valid_codes, return_index=True)
+    order = np.lexsort((first_seen, -counts[present]))
+    return present[order], counts[present[order]]
@@ -0,0 +1,216 @@
+"""
+Key-driver analysis: which aspects explain satisfaction and recommendation scores.
+
+Pairwise correlations overstate collinear aspects (venue, speakers and content move
+together), so each target is regressed on all aspect ratings at once. The report
+gives standardized coefficients and Shapley relative-importance weights (LMG; equal
+to general dominance weights), which split the model R² between the aspects. The R²
+of every aspect subset comes from the correlation matrix with one batched solve per
+subset size, so the 2^k enumeration stays fast for 10+ aspects. Solves go through a
+symmetric eigendecomposition that drops near-zero eigenvalues, so exactly collinear
+aspects (e.g. a duplicated question) share their R² instead of inflating it.
+
+Functions:
+- variance_inflation_factors: VIF per predictor (inf for exactly collinear predictors)
+- subset_r_squared: R² of every predictor subset (indexed by bitmask) from a correlation matrix
+- shapley_weights: Shapley/dominance decomposition of R² from the subset R² table
+- fit_key_drivers: Regression and relative importance of the aspects for one target
+- generate_key_driver_analysis: Key-driver section for satisfaction and recommendation score
+"""
+
+from itertools import combinations
+from math import factorial
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+
+TARGET_COLUMNS = ['satisfaction', 'recommendation_score']
+MIN_RESPONSES = 10
+# 2^16 subsets per target; above this only the regression is reported
+MAX_DOMINANCE_ASPECTS = 16
+# Eigenvalues below this fraction of a block's largest are treated as zero (rank deficiency)
+RANK_TOLERANCE = 1e-10
+# Above this condition number the subset solves switch from LU to the eigendecomposition
+MAX_CONDITION_NUMBER = 1e8
+
+
+def _pinv_solve(blocks: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """
+    Batched minimum-norm solution of symmetric systems blocks @ x = rhs (shapes m x s x s, m x s).
+    Equals the regular solve for well-conditioned blocks and the pseudo-inverse otherwise.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(blocks)
+    cutoff = RANK_TOLERANCE * np.abs(eigenvalues).max(axis=-1, keepdims=True)
+    kept = eigenvalues > cutoff
+    inverse = np.where(kept, 1.0 / np.where(kept, eigenvalues, 1.0), 0.0)
+    projected = np.einsum('mji,mj->mi', eigenvectors, rhs) * inverse
+    return np.einsum('mij,mj->mi', eigenvectors, projected)
+
+
+def variance_inflation_factors(predictor_corr: np.ndarray) -> np.ndarray:
+    """
+    VIF_j = 1 / (1 - R²_j), R²_j from regressing predictor j on the others. Predictors that are
+    an exact linear combination of others get inf.
+    """
+    k = len(predictor_corr)
+    if k == 1:
+        return np.ones(1)
+    others = np.array([[i for i in range(k) if i != j] for j in range(k)], dtype=np.int64)
+    blocks = predictor_corr[others[:, :, None], others[:, None, :]]
+    rhs = predictor_corr[np.arange(k)[:, None], others]
+    explained = np.einsum('mi,mi->m', rhs, _pinv_solve(blocks, rhs))
+    unexplained = 1.0 - explained
+    with np.errstate(divide='ignore'):
+        return np.where(unexplained > np.sqrt(RANK_TOLERANCE), 1.0 / np.maximum(unexplained, 1e-300), np.inf)
+
+
+def subset_r_squared(predictor_corr: np.ndarray, target_corr: np.ndarray) -> np.ndarray:
+    """
+    R² of the regression on every predictor subset, indexed by bitmask (bit j = predictor j).
+    Uses R²(S) = r_S' R_SS^+ r_S; all subsets of one size are solved in a single batched call.
+    """
+    k = len(target_corr)
+    r_squared = np.zeros(1 << k)
+    bits = 1 << np.arange(k)
+    # Principal submatrices are never worse conditioned than the full matrix (eigenvalue
+    # interlacing), so one check decides whether every block can take the faster LU solve
+    eigenvalues = np.linalg.eigvalsh(predictor_corr)
+    well_conditioned = eigenvalues[0] > eigenvalues[-1] / MAX_CONDITION_NUMBER
+    for size in range(1, k + 1):
+        subsets = np.array(list(combinations(range(k), size)), dtype=np.int64)
+        blocks = predictor_corr[subsets[:, :, None], subsets[:, None, :]]
+        rhs = target_corr[subsets]
+        if well_conditioned:
+            solved = np.linalg.solve(blocks, rhs[:, :, None])[:, :, 0]
+        else:
+            solved = _pinv_solve(blocks, rhs)
+        r_squared[bits[subsets].sum(axis=1)] = np.einsum('mi,mi->m', rhs, solved)
+    return np.clip(r_squared, 0.0, 1.0)
+
+
+def shapley_weights(r_squared: np.ndarray, k: int) -> np.ndarray:
+    """
+    Average R² gain of adding each predictor over all orderings (Shapley / LMG). Weights sum
+    to the full-model R².
+    """
+    masks = np.arange(1 << k)
+    sizes = np.array([bin(mask).count('1') for mask in range(1 << k)])
+    # Weight of a subset S of size s not containing j: s! (k - s - 1)! / k!
+    size_weights = np.array([factorial(s) * factorial(k - s - 1) / factorial(k) if s < k else 0.0
+                             for s in range(k + 1)])
+    weights = np.empty(k)
+    for j in range(k):
+        without = masks[(masks >> j) & 1 == 0]
+        gains = r_squared[without | (1 << j)] - r_squared[without]
+        weights[j] = np.dot(size_weights[sizes[without]], gains)
+    return weights
+
+
+def fit_key_drivers(target: np.ndarray, aspects: np.ndarray, labels: List[str]) -> Dict[str, Any]:
+    """
+    Regresses one target on the aspect matrix (listwise-complete rows).
+    Returns coefficients, fit statistics and relative-importance weights per aspect.
+    """
+    complete = ~np.isnan(target) & ~np.isnan(aspects).any(axis=1)
+    y, X = target[complete], aspects[complete]
+
+    # Aspects without variation carry no information for the regression
+    varying = X.std(axis=0) > 0 if len(X) else np.zeros(X.shape[1], dtype=bool)
+    X, labels = X[:, varying], [label for label, keep in zip(labels, varying) if keep]
+    n, k = X.shape
+    if k == 0 or n < max(MIN_RESPONSES, k + 2) or y.std() == 0:
+        return {"error": f"Not enough complete responses with varying ratings (found {n})"}
+
+    # Standardized regression from the correlation matrix of [X, y]
+    joined = np.column_stack([X, y])
+    z = (joined - joined.mean(axis=0)) / joined.std(axis=0, ddof=1)
+    corr = z.T @ z / (n - 1)
+    predictor_corr, target_corr = corr[:k, :k], corr[:k, k]
+    betas = _pinv_solve(predictor_corr[None], target_corr[None])[0]
+    r_squared = float(np.clip(target_corr @ betas, 0.0, 1.0))
+    adjusted = 1 - (1 - r_squared) * (n - 1) / (n - k - 1)
+
+    # Raw-scale coefficients for "one point on aspect X moves the target by b"
+    coefficients = betas * y.std(ddof=1) / X.std(axis=0, ddof=1)
+    intercept = float(y.mean() - coefficients @ X.mean(axis=0))
+    # Variance inflation factors flag aspects that are largely predicted by the others
+    vif = variance_inflation_factors(predictor_corr)
+
+    importance = None
+    if k <= MAX_DOMINANCE_ASPECTS:
+        importance = shapley_weights(subset_r_squared(predictor_corr, target_corr), k)
+
+    drivers = []
+    for j, label in enumerate(labels):
+        driver = {
+            "aspect": label,
+            "standardized_coefficient": float(betas[j]),
+            "coefficient": float(coefficients[j]),
+            "correlation": float(target_corr[j]),
+            # inf is not valid JSON: exactly collinear aspects report null plus a flag
+            "vif": float(vif[j]) if np.isfinite(vif[j]) else None,
+            "perfectly_collinear": bool(not np.isfinite(vif[j]))
+        }
+        if importance is not None:
+            driver["importance"] = float(importance[j])
+            driver["relative_importance"] = round(float(importance[j] / r_squared * 100), 1) if r_squared > 0 else 0.0
+        drivers.append(driver)
+
+    sort_key = "importance" if importance is not None else "standardized_coefficient"
+    drivers.sort(key=lambda d: abs(d[sort_key]), reverse=True)
+
+    return {
+        "drivers": drivers,
+        "r_squared": r_squared,
+        "adjusted_r_squared": float(adjusted),
+        "intercept": intercept,
+        "sample_size": int(n),
+        "importance_method": "shapley" if importance is not None else None
+    }
+
+
+def generate_key_driver_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Key drivers of satisfaction and recommendation score over every aspect rating.
+    Ranks aspects by their Shapley share of R² instead of pairwise correlation.
+    """
+    dataset = as_dataset(data)
+    df = dataset.frame
+    aspects = dataset.aspects
+
+    if not aspects.columns:
+        return {"error": "No aspect rating data found for key-driver analysis"}
+
+    targets = {}
+    for target in TARGET_COLUMNS:
+        if target in df.columns:
+            values = pd.to_numeric(df[target], errors='coerce').to_numpy(dtype=float)
+            targets[target] = fit_key_drivers(values, aspects.values, aspects.labels)
+
+    if not any("error" not in result for result in targets.values()):
+        return {"error": "Not enough complete responses for key-driver analysis"}
+
+    insights = []
+    satisfaction = targets.get('satisfaction', {})
+    if satisfaction.get('drivers') and satisfaction.get('importance_method'):
+        top = satisfaction['drivers'][0]
+        insights.append(
+            f"{top['aspect']} explains {top['relative_importance']:.0f}% of the explained variance in satisfaction "
+            f"(model R² {satisfaction['r_squared']:.2f})"
+        )
+        collinear = [d['aspect'] for d in satisfaction['drivers'] if d['perfectly_collinear'] or d['vif'] > 5]
+        if collinear:
+            insights.append(f"High overlap with other aspects (VIF > 5): {', '.join(collinear)}; "
+                            "pairwise correlations overstate their impact")
+
+    return {
+        "chart_type": "key_drivers",
+        "data": {
+            "targets": targets,
+            "aspects": aspects.labels,
+            "insights": insights
+        }
+    }
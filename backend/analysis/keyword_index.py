@@ -0,0 +1,254 @@
+"""
+Sparse TF-IDF keyword index over respondents' comments, sliceable by segment.
+
+Each response (all of its text columns together) is one document. The term matrix is
+built once per dataset in CSR form (numpy arrays, no per-segment re-tokenization) and
+segments defined on the survey columns are just row sets, so "what did people who
+attended X / came from Y write" becomes a bincount over the matching matrix entries.
+
+Functions / classes:
+- TermIndex: CSR term-count and L2-normalized TF-IDF matrix with segment term queries
+- build_term_index: Tokenizes the text columns into a TermIndex
+- get_term_index: Cached build_term_index for a dataset
+- segment_rows: Response rows of every segment of a column
+- generate_segment_keywords: Most distinctive terms per session, channel, pacing and venue segment
+- query_segment_keywords: Most distinctive terms for one segment
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+from .grouped_stats import encode_groups
+from .text_processing import TEXT_COLUMNS, PLACEHOLDER_TEXTS, STOP_WORDS
+
+SEGMENT_COLUMNS = ['sessions_attended', 'event_discovery', 'pacing', 'preferred_venue']
+
+# Segments smaller than this are skipped in the report (too few comments to be distinctive)
+MIN_SEGMENT_SIZE = 3
+# A term must appear in at least this many of the segment's responses
+MIN_SEGMENT_DOCS = 2
+
+_DOCUMENT_SEPARATOR = '\x1e'
+_INDEX_TOKEN = re.compile(r'\x1e|\b[a-z]{3,}\b')
+
+
+class TermIndex:
+    """
+    Document-term matrix in CSR form (rows = responses, columns = vocabulary terms).
+    `counts` holds raw term frequencies, `weights` the L2-normalized TF-IDF values.
+    """
+
+    def __init__(self, n_documents: int, vocabulary: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, counts: np.ndarray):
+        self.n_documents = n_documents
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        # Row of every stored entry (COO view of the CSR matrix)
+        self.entry_rows = np.repeat(np.arange(n_documents), np.diff(indptr))
+
+        # Smoothed idf (as in scikit-learn): log((1 + n) / (1 + df)) + 1
+        self.doc_freq = np.bincount(indices, minlength=len(vocabulary))
+        self.idf = np.log((1 + n_documents) / (1 + self.doc_freq)) + 1
+        weights = counts * self.idf[indices]
+        norms = np.sqrt(np.bincount(self.entry_rows, weights=weights * weights, minlength=n_documents))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.weights = weights / norms[self.entry_rows]
+
+        self._term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+    @property
+    def text_documents(self) -> int:
+        """Responses with at least one indexed term"""
+        return int(np.count_nonzero(np.diff(self.indptr)))
+
+    def term_id(self, term: str) -> Optional[int]:
+        return self._term_ids.get(term.lower())
+
+    def top_terms(self, rows: np.ndarray, limit: int = 10,
+                  min_docs: int = MIN_SEGMENT_DOCS) -> List[Dict[str, Any]]:
+        """
+        Terms most distinctive of the given response rows: mean TF-IDF inside the segment
+        minus mean TF-IDF in the remaining responses (only terms used more inside).
+        """
+        n_terms = len(self.vocabulary)
+        in_segment = np.zeros(self.n_documents, dtype=bool)
+        in_segment[rows] = True
+        segment_size = int(in_segment.sum())
+        rest_size = self.n_documents - segment_size
+        if segment_size == 0 or n_terms == 0:
+            return []
+
+        entry_in = in_segment[self.entry_rows]
+        weight_in = np.bincount(self.indices[entry_in], weights=self.weights[entry_in], minlength=n_terms)
+        docs_in = np.bincount(self.indices[entry_in], minlength=n_terms)
+        count_in = np.bincount(self.indices[entry_in], weights=self.counts[entry_in], minlength=n_terms)
+        weight_out = np.bincount(self.indices[~entry_in], weights=self.weights[~entry_in], minlength=n_terms)
+
+        score = weight_in / segment_size - (weight_out / rest_size if rest_size else 0.0)
+        candidates = np.flatnonzero((docs_in >= min_docs) & (score > 0))
+        # Highest score first, ties alphabetical (vocabulary ids are in sorted order)
+        ranked = candidates[np.lexsort((candidates, -score[candidates]))][:limit]
+
+        return [
+            {
+                "term": self.vocabulary[term],
+                "score": round(float(score[term]), 4),
+                "count": int(count_in[term]),
+                "responses": int(docs_in[term])
+            }
+            for term in ranked
+        ]
+
+
+def _row_documents(df: pd.DataFrame, columns: Sequence[str]) -> List[str]:
+    """One lowercased document per response joining its analyzable comments"""
+    parts = []
+    for col in columns:
+        values = df[col].tolist()
+        parts.append([
+            text.lower() if isinstance(text, str) and text not in PLACEHOLDER_TEXTS else ''
+            for text in values
+        ])
+    return [' '.join(texts).replace(_DOCUMENT_SEPARATOR, ' ') for texts in zip(*parts)] if parts else [''] * len(df)
+
+
+def build_term_index(df: pd.DataFrame, columns: Optional[List[str]] = None) -> TermIndex:
+    """
+    Tokenizes every response's comments with one regex pass and builds the CSR term matrix.
+    Tokens are letters-only words of 3+ characters with stop words removed.
+    """
+    columns = columns if columns is not None else [c for c in TEXT_COLUMNS if c in df.columns]
+    documents = _row_documents(df, columns)
+    n_documents = len(documents)
+
+    tokens = _INDEX_TOKEN.findall(_DOCUMENT_SEPARATOR.join(documents))
+    token_codes, token_values = pd.factorize(pd.Series(tokens, dtype=object), sort=True)
+    token_values = np.asarray(token_values, dtype=object)
+
+    # Document id of every token = number of separators before it
+    separator_code = np.flatnonzero(token_values == _DOCUMENT_SEPARATOR)
+    is_separator = token_codes == separator_code[0] if len(separator_code) else np.zeros(len(tokens), dtype=bool)
+    doc_ids = np.cumsum(is_separator)
+
+    # Drop separators and stop words, then re-number the remaining vocabulary densely
+    keep_value = np.array([value != _DOCUMENT_SEPARATOR and value not in STOP_WORDS for value in token_values],
+                          dtype=bool)
+    keep = keep_value[token_codes] if len(tokens) else np.zeros(0, dtype=bool)
+    term_remap = np.cumsum(keep_value) - 1
+    vocabulary = token_values[keep_value]
+    doc_ids, term_ids = doc_ids[keep], term_remap[token_codes[keep]]
+
+    # Aggregate (document, term) pairs into counts; keys sort by document, then term
+    keys, counts = np.unique(doc_ids * max(1, len(vocabulary)) + term_ids, return_counts=True)
+    entry_docs = keys // max(1, len(vocabulary))
+    indices = keys % max(1, len(vocabulary))
+    indptr = np.zeros(n_documents + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entry_docs, minlength=n_documents), out=indptr[1:])
+
+    return TermIndex(n_documents, vocabulary, indptr, indices.astype(np.int64), counts.astype(float))
+
+
+def get_term_index(data: List[Dict[str, Any]]) -> TermIndex:
+    """Returns the term index of a dataset, building it once and caching it on the dataset"""
+    dataset = as_dataset(data)
+    if 'term_index' not in dataset.cache:
+        dataset.cache['term_index'] = build_term_index(dataset.frame)
+    return dataset.cache['term_index']
+
+
+def segment_rows(data: List[Dict[str, Any]], column: str) -> Dict[str, np.ndarray]:
+    """
+    Maps each segment value of a column to the response rows in it.
+    sessions_attended is multi-valued: a response belongs to every session it attended.
+    """
+    dataset = as_dataset(data)
+    df = dataset.frame
+    if column not in df.columns:
+        return {}
+
+    if column == 'sessions_attended':
+        sessions = dataset.sessions
+        order = np.argsort(sessions.codes, kind='stable')
+        bounds = np.searchsorted(sessions.codes[order], np.arange(len(sessions.categories) + 1))
+        return {
+            name: np.unique(sessions.row_index[order[bounds[i]:bounds[i + 1]]])
+            for i, name in enumerate(sessions.categories)
+        }
+
+    codes, labels = encode_groups(df[column], strip=True)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return {
+        str(label): order[bounds[i]:bounds[i + 1]]
+        for i, label in enumerate(labels)
+        if bounds[i + 1] > bounds[i]
+    }
+
+
+def generate_segment_keywords(data: List[Dict[str, Any]], columns: Optional[List[str]] = None,
+                              limit: int = 10) -> Dict[str, Any]:
+    """
+    Finds the most distinctive comment terms for every session, discovery channel,
+    pacing answer and preferred venue (segments with at least MIN_SEGMENT_SIZE responses).
+    """
+    # Wrap once so the term index and segment encodings are cached on the same dataset
+    data = as_dataset(data)
+    df = data.frame
+    if not any(col in df.columns for col in TEXT_COLUMNS):
+        return {"error": "No text feedback found"}
+
+    index = get_term_index(data)
+    if not len(index.vocabulary):
+        return {"error": "No analyzable comment text found"}
+
+    segments = {}
+    for column in columns or SEGMENT_COLUMNS:
+        column_segments = []
+        for segment, rows in segment_rows(data, column).items():
+            if len(rows) < MIN_SEGMENT_SIZE:
+                continue
+            column_segments.append({
+                "segment": segment,
+                "responses": int(len(rows)),
+                "terms": index.top_terms(rows, limit)
+            })
+        if column_segments:
+            segments[column] = sorted(column_segments, key=lambda s: s["responses"], reverse=True)
+
+    return {
+        "chart_type": "segment_keywords",
+        "data": {
+            "segments": segments,
+            "vocabulary_size": len(index.vocabulary),
+            "documents": index.text_documents,
+            "method": "tfidf_mean_difference"
+        }
+    }
+
+
+def query_segment_keywords(data: List[Dict[str, Any]], column: str, segment: str,
+                           limit: int = 10) -> Dict[str, Any]:
+    """Most distinctive terms for a single segment (e.g. column='event_discovery', segment='Email')"""
+    if column not in SEGMENT_COLUMNS:
+        return {"error": f"Unsupported segment column '{column}'. Use one of: {', '.join(SEGMENT_COLUMNS)}"}
+
+    data = as_dataset(data)
+    # Segment names match case-insensitively ("email newsletter" finds "Email Newsletter")
+    segments = {name.casefold(): (name, rows) for name, rows in segment_rows(data, column).items()}
+    match = segments.get(segment.strip().casefold())
+    if match is None:
+        return {"error": f"Segment '{segment}' not found in {column}"}
+    name, rows = match
+
+    return {
+        "column": column,
+        "segment": name,
+        "responses": int(len(rows)),
+        "terms": get_term_index(data).top_terms(rows, limit)
+    }
@@ -6,8 +6,12 @@ Functions:
 """
 
 import pandas as pd
+import numpy as np
 from typing import Dict, Any, List
 
+from backend.processing.dataset import as_dataset
+from .grouped_stats import encode_groups, compare_groups, significance_summary
+
 
 def generate_discovery_channel_impact(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -19,7 +23,7 @@ def generate_discovery_channel_impact(data: List[Dict[str, Any]]) -> Dict[str, A
     - Attendance counts per channel
     - Channel effectiveness ranking
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     # Validate required columns
     if 'event_discovery' not in df.columns:
@@ -28,26 +32,25 @@ def generate_discovery_channel_impact(data: List[Dict[str, Any]]) -> Dict[str, A
     if 'satisfaction' not in df.columns:
         return {"error": "No satisfaction data found"}
     
-    # Clean and filter data
-    df_clean = df[['event_discovery', 'satisfaction']].copy()
-    df_clean = df_clean.dropna()
-    
-    # Convert satisfaction to numeric
-    df_clean['satisfaction'] = pd.to_numeric(df_clean['satisfaction'], errors='coerce')
-    df_clean = df_clean.dropna()
+    # Dictionary-encoded channels + numeric satisfaction (nulls/non-numeric skipped)
+    channel_codes, channel_labels = encode_groups(df['event_discovery'])
+    satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+    valid = (channel_codes >= 0) & ~np.isnan(satisfaction)
     
-    if len(df_clean) == 0:
+    if not valid.any():
         return {"error": "No valid discovery channel data found"}
     
-    # Group by discovery channel
-    channel_analysis = df_clean.groupby('event_discovery').agg({
-        'satisfaction': ['mean', 'count', 'std']
+    # Group by discovery channel code
+    comparison = compare_groups(channel_codes, satisfaction, len(channel_labels))
+    moments = comparison.moments
+    present = np.flatnonzero(moments.count)
+    channel_analysis = pd.DataFrame({
+        'event_discovery': channel_labels[present],
+        'avg_satisfaction': moments.mean[present],
+        'count': moments.count[present],
+        'std_dev': moments.std[present]
     }).round(2)
     
-    # Flatten column names
-    channel_analysis.columns = ['avg_satisfaction', 'count', 'std_dev']
-    channel_analysis = channel_analysis.reset_index()
-    
     # Calculate effectiveness score (weighted by count and satisfaction)
     # Channels with high satisfaction AND reasonable sample size get higher scores
     max_count = channel_analysis['count'].max()
@@ -64,14 +67,15 @@ def generate_discovery_channel_impact(data: List[Dict[str, Any]]) -> Dict[str, A
     
     # Calculate correlation between channel and satisfaction (if enough data)
     correlation = None
-    if len(df_clean) >= 30:  # Minimum sample size for meaningful correlation
-        # Encode channels numerically by their average satisfaction
+    if valid.sum() >= 30:  # Minimum sample size for meaningful correlation
+        # Encode channels numerically by their effectiveness rank
         channel_mapping = dict(zip(
             channel_analysis['event_discovery'],
             range(len(channel_analysis))
         ))
-        df_clean['channel_encoded'] = df_clean['event_discovery'].map(channel_mapping)
-        correlation = df_clean[['channel_encoded', 'satisfaction']].corr().iloc[0, 1]
+        rank_by_code = np.array([channel_mapping.get(label, -1) for label in channel_labels])
+        channel_encoded = pd.Series(rank_by_code[channel_codes[valid]], dtype=float)
+        correlation = channel_encoded.corr(pd.Series(satisfaction[valid]))
     
     # No hardcoded insights - instruct user to generate AI insights
     insights = [
@@ -83,9 +87,11 @@ def generate_discovery_channel_impact(data: List[Dict[str, Any]]) -> Dict[str, A
         "stats": {
             "total_channels": len(channels_list),
             "total_responses": int(channel_analysis['count'].sum()),
-            "overall_avg_satisfaction": round(float(df_clean['satisfaction'].mean()), 2),
+            "overall_avg_satisfaction": round(float(satisfaction[valid].mean()), 2),
             "channel_satisfaction_correlation": round(float(correlation), 3) if correlation is not None and pd.notna(correlation) else None  # type: ignore
         },
+        # ANOVA / Kruskal-Wallis: do channels really differ in satisfaction?
+        "significance": significance_summary(comparison),
         "insights": insights,
         "recommendations": []  # Remove hardcoded recommendations
     }
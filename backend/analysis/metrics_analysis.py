@@ -11,13 +11,16 @@ Functions:
 import pandas as pd
 from typing import Dict, Any, List
 
+from backend.processing.dataset import as_dataset
+from .confidence_intervals import nps_interval, mean_interval
+
 
 def generate_satisfaction_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Analyzes satisfaction ratings and prepares chart data.
     Returns data formatted for bar charts, pie charts, and trend analysis.
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     if 'satisfaction' not in df.columns:
         return {"error": "No satisfaction data found"}
@@ -43,7 +46,11 @@ def generate_satisfaction_analysis(data: List[Dict[str, Any]]) -> Dict[str, Any]
                 "average": float(df['satisfaction'].mean()),
                 "median": float(df['satisfaction'].median()),
                 "mode": float(df['satisfaction'].mode().iloc[0] if not df['satisfaction'].mode().empty else 0),
-                "total_responses": len(df)
+                "total_responses": len(df),
+                # Bootstrap (small samples) or analytic interval for the average
+                "average_confidence_interval": mean_interval(
+                    pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+                )
             }
         },
         "recommendations": generate_satisfaction_insights(df['satisfaction'])
@@ -55,7 +62,7 @@ def generate_recommendation_analysis(data: List[Dict[str, Any]]) -> Dict[str, An
     Analyzes NPS (Net Promoter Score) data.
     Categorizes responses into Detractors, Passives, and Promoters.
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     if 'recommendation_score' not in df.columns:
         return {"error": "No recommendation score data found"}
@@ -91,6 +98,10 @@ def generate_recommendation_analysis(data: List[Dict[str, Any]]) -> Dict[str, An
             # NPS score display
             "nps_score": round(nps, 1),
             "nps_category": categorize_nps(nps),
+            # Bootstrap (small samples) or analytic interval: how much of a swing is noise
+            "nps_confidence_interval": nps_interval(
+                pd.to_numeric(scores, errors='coerce').to_numpy(dtype=float)
+            ),
             
             # Distribution for histogram
             "score_distribution": scores.value_counts().sort_index().to_dict()
@@ -0,0 +1,221 @@
+"""
+Near-duplicate comment detection with MinHash signatures and LSH banding.
+
+Exports often contain copy-pasted or templated answers ("Great event!", "great event!!").
+Comments are normalized, exact repeats are collapsed first, and the distinct texts are
+reduced to MinHash signatures over character shingles. Signatures are split into bands;
+texts sharing a band bucket become candidate pairs, which are kept when their estimated
+Jaccard similarity reaches the threshold. Everything runs in (near) linear time.
+
+Functions / classes:
+- DuplicateClusters: Cluster label per text plus cluster sizes and representatives
+- normalize_text: Lowercases and strips punctuation/extra whitespace before shingling
+- minhash_signatures: MinHash signature matrix for a list of normalized texts
+- find_near_duplicates: Clusters near-identical texts
+- get_near_duplicates: Cached find_near_duplicates over a dataset's text columns
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+from .text_processing import TEXT_COLUMNS, iter_column_texts
+
+SHINGLE_SIZE = 5          # characters per shingle
+NUM_PERMUTATIONS = 64     # signature length
+LSH_BANDS = 16            # 16 bands x 4 rows: candidate threshold around 0.5 Jaccard
+SIMILARITY_THRESHOLD = 0.7
+
+# Cap on signature-matrix entries computed at once (shingles x permutations)
+_BLOCK_ENTRIES = 1 << 22
+_HIGH_BITS = np.uint64(32)
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+class DuplicateClusters:
+    """Near-duplicate clusters over a list of texts"""
+
+    def __init__(self, texts: List[str], labels: np.ndarray):
+        self.texts = texts
+        self.labels = labels  # cluster id per text, numbered by first appearance
+        self.sizes = np.bincount(labels) if len(labels) else np.empty(0, dtype=np.int64)
+        # First text of each cluster is its representative
+        _, self.representative_index = np.unique(labels, return_index=True)
+
+    @property
+    def cluster_count(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def duplicate_count(self) -> int:
+        """Texts that repeat an earlier text of their cluster"""
+        return len(self.labels) - self.cluster_count
+
+    def representatives(self) -> List[str]:
+        return [self.texts[i] for i in self.representative_index]
+
+    def top_clusters(self, limit: Optional[int] = 10, min_size: int = 2) -> List[Dict[str, Any]]:
+        """Largest clusters as {"representative", "size", "examples"} (examples are other variants)"""
+        order = np.lexsort((np.arange(self.cluster_count), -self.sizes))
+        clusters = []
+        for cluster in order[:limit]:
+            if self.sizes[cluster] < min_size:
+                break
+            members = np.flatnonzero(self.labels == cluster)
+            representative = self.texts[members[0]]
+            variants = list(dict.fromkeys(self.texts[i] for i in members[1:] if self.texts[i] != representative))
+            clusters.append({
+                "representative": representative,
+                "size": int(self.sizes[cluster]),
+                "examples": variants[:3]
+            })
+        return clusters
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases and collapses punctuation/whitespace so trivial variants compare equal"""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def _shingle_codes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flat array of byte-shingle codes for all texts and the offset where each text's shingles start.
+    The SHINGLE_SIZE bytes of a shingle are packed into one integer (exact, no hash collisions);
+    texts shorter than a shingle are space-padded to one.
+    """
+    encoded = [text.encode('utf-8').ljust(SHINGLE_SIZE) for text in texts]
+    lengths = np.fromiter((len(raw) for raw in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    window_count = len(buffer) - SHINGLE_SIZE + 1
+    codes = np.zeros(window_count, dtype=np.uint64)
+    for j in range(SHINGLE_SIZE):
+        codes = (codes << np.uint64(8)) | buffer[j:j + window_count]
+
+    # Keep windows that start and end inside the same text
+    text_ids = np.repeat(np.arange(len(encoded)), lengths)
+    codes = codes[text_ids[:window_count] == text_ids[SHINGLE_SIZE - 1:]]
+
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths - SHINGLE_SIZE + 1, out=offsets[1:])
+    return codes, offsets
+
+
+def minhash_signatures(texts: Sequence[str], num_permutations: int = NUM_PERMUTATIONS,
+                       seed: int = 1) -> np.ndarray:
+    """
+    Returns a (len(texts), num_permutations) MinHash matrix for non-empty normalized texts.
+    Uses multiply-shift hashing (high 32 bits of a * x + b mod 2^64, a odd) on packed
+    shingle codes, computed in blocks of texts and reduced per text with np.minimum.reduceat.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=(num_permutations, 1), dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=(num_permutations, 1), dtype=np.uint64, endpoint=True)
+
+    codes, offsets = _shingle_codes(texts)
+    signatures = np.empty((len(texts), num_permutations), dtype=np.uint64)
+
+    # Process whole texts per block so each reduceat segment is complete
+    mean_shingles = max(1, len(codes) // max(1, len(texts)))
+    block_texts = max(1, _BLOCK_ENTRIES // (num_permutations * mean_shingles))
+    for start in range(0, len(texts), block_texts):
+        stop = min(start + block_texts, len(texts))
+        block = codes[offsets[start]:offsets[stop]]
+        # uint64 arithmetic wraps, which is exactly the mod 2^64 of multiply-shift hashing
+        permuted = (a * block + b) >> _HIGH_BITS
+        signatures[start:stop] = np.minimum.reduceat(permuted, offsets[start:stop] - offsets[start], axis=1).T
+    return signatures
+
+
+def _connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Smallest node index of each node's component (min-label propagation with pointer jumping)"""
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        pair_min = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, left, pair_min)
+        np.minimum.at(labels, right, pair_min)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = SIMILARITY_THRESHOLD,
+                         bands: int = LSH_BANDS) -> DuplicateClusters:
+    """
+    Clusters near-identical texts (estimated Jaccard similarity >= threshold on character
+    shingles). Exact repeats after normalization are merged before any hashing.
+    """
+    texts = list(texts)
+    if not texts:
+        return DuplicateClusters(texts, np.empty(0, dtype=np.int64))
+
+    # Normalize each distinct raw text once, then merge texts that normalize identically
+    raw_codes, raw_distinct = pd.factorize(pd.Series(texts, dtype=object), sort=False)
+    normalized = [normalize_text(text) for text in raw_distinct]
+    # Texts that normalize to nothing (punctuation only, e.g. '!!!' and '???') have no shingles:
+    # they keep their raw text as key (the '#' prefix cannot occur in normalized text) so they
+    # are only grouped with exact repeats
+    keys = [text if text else '#' + raw for text, raw in zip(normalized, raw_distinct)]
+    normalized_codes, distinct = pd.factorize(pd.Series(keys, dtype=object), sort=False)
+    exact_codes = normalized_codes[raw_codes]
+    distinct = list(distinct)
+    n = len(distinct)
+
+    # Only texts with shingles go through MinHash / LSH
+    hashable = np.flatnonzero([not text.startswith('#') for text in distinct])
+    left_parts, right_parts = [], []
+
+    if len(hashable) > 1:
+        signatures = minhash_signatures([distinct[i] for i in hashable])
+        rows = signatures.shape[1] // bands
+
+        for band in range(bands):
+            band_keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            _, buckets = np.unique(band_keys.view(np.dtype((np.void, band_keys.dtype.itemsize * rows))),
+                                   return_inverse=True)
+            buckets = buckets.ravel()
+            # Pair every member of a bucket with the bucket's first member
+            order = np.argsort(buckets, kind='stable')
+            sorted_buckets = buckets[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(sorted_buckets)) + 1]
+            leaders = order[starts][np.searchsorted(sorted_buckets[starts], sorted_buckets)]
+            candidates = leaders != order
+            left_parts.append(leaders[candidates])
+            right_parts.append(order[candidates])
+
+        if left_parts:
+            left = np.concatenate(left_parts)
+            right = np.concatenate(right_parts)
+            # Verify candidates on the estimated Jaccard similarity
+            similarity = (signatures[left] == signatures[right]).mean(axis=1)
+            keep = similarity >= threshold
+            left_parts, right_parts = [hashable[left[keep]]], [hashable[right[keep]]]
+
+    left = np.concatenate(left_parts) if left_parts else np.empty(0, dtype=np.int64)
+    right = np.concatenate(right_parts) if right_parts else np.empty(0, dtype=np.int64)
+    components = _connected_components(n, left, right)
+
+    # Renumber clusters by first appearance in the original text order
+    text_components = components[exact_codes]
+    _, labels = np.unique(text_components, return_inverse=True)
+    _, first_seen = np.unique(labels, return_index=True)
+    rank = np.empty(len(first_seen), dtype=np.int64)
+    rank[np.argsort(first_seen, kind='stable')] = np.arange(len(first_seen))
+    return DuplicateClusters(texts, rank[labels.ravel()])
+
+
+def get_near_duplicates(data: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> DuplicateClusters:
+    """Near-duplicate clusters over all comments of the text columns, computed once per dataset"""
+    dataset = as_dataset(data)
+    df = dataset.frame
+    columns = columns if columns is not None else [c for c in TEXT_COLUMNS if c in df.columns]
+    cache_key = ('near_duplicates', tuple(columns))
+    if cache_key not in dataset.cache:
+        texts = [str(text) for col in columns for text in iter_column_texts(df[col])]
+        dataset.cache[cache_key] = find_near_duplicates(texts)
+    return dataset.cache[cache_key]
@@ -0,0 +1,251 @@
+"""
+Pre-aggregated OLAP cube for slice-and-dice of the headline scores.
+
+Responses are aggregated once into sparse cells keyed by their dimension values
+(discovery channel, pacing, venue preference, time slot and the set of sessions
+attended). Every cell stores a histogram per measure (satisfaction, recommendation
+score, each aspect rating), so counts, means, spreads and NPS for any filter
+combination are sums of cell histograms; no response row is read at query time.
+
+Sessions are multi-valued, so the cube keys cells by the attended session set: a
+filter on sessions selects every set containing one of the requested sessions
+(each response is counted once), and grouping by session adds each set's
+histograms to all of its sessions with one matrix product.
+
+Functions / classes:
+- OLAPCube: Cells, histograms and the query method
+- build_cube: Aggregates a frame into an OLAPCube
+- get_cube: Cached build_cube for a dataset
+- summarize_histogram: Count, mean, spread and NPS of one measure histogram
+- query_cube: Filter/group-by query returning JSON-ready measure summaries
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset, aspect_columns
+from .grouped_stats import encode_groups
+
+# Single-valued dimensions (missing answers are their own 'Not Specified' value)
+DIMENSION_COLUMNS = ['event_discovery', 'pacing', 'preferred_venue', 'preferred_time']
+SESSION_DIMENSION = 'sessions'
+BASE_MEASURES = ['satisfaction', 'recommendation_score']
+NOT_SPECIFIED = 'Not Specified'
+
+
+class OLAPCube:
+    """
+    Sparse cube: `cell_codes[c, d]` is the value code of dimension d in cell c (the last
+    dimension is the session set code), `histograms[measure][c, b]` counts responses of
+    cell c whose measure equals `bins[measure][b]`.
+    """
+
+    def __init__(self, dimensions: List[str], labels: Dict[str, List[str]], cell_codes: np.ndarray,
+                 cell_sizes: np.ndarray, session_sets: np.ndarray, bins: Dict[str, np.ndarray],
+                 histograms: Dict[str, np.ndarray]):
+        self.dimensions = dimensions
+        self.labels = labels                # value labels per dimension (sessions: session names)
+        self.cell_codes = cell_codes
+        self.cell_sizes = cell_sizes        # responses per cell
+        self.session_sets = session_sets    # (session sets x sessions) membership
+        self.bins = bins
+        self.histograms = histograms
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.cell_sizes)
+
+    def _value_codes(self, dimension: str, values: List[str]) -> np.ndarray:
+        labels = self.labels[dimension]
+        unknown = [value for value in values if value not in labels]
+        if unknown:
+            raise ValueError(f"Unknown value(s) for {dimension}: {', '.join(map(str, unknown))}")
+        return np.array([labels.index(value) for value in values], dtype=np.int64)
+
+    def select(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """Boolean cell mask for filters {dimension: [values]} (OR within, AND across dimensions)"""
+        selected = np.ones(self.n_cells, dtype=bool)
+        for dimension, values in filters.items():
+            if dimension not in self.labels:
+                raise ValueError(f"Unknown dimension: {dimension}")
+            values = [values] if isinstance(values, str) else list(values)
+            codes = self._value_codes(dimension, values)
+            axis = self.dimensions.index(dimension)
+            if dimension == SESSION_DIMENSION:
+                # Session sets that contain any of the requested sessions
+                matching_sets = self.session_sets[:, codes].any(axis=1)
+                selected &= matching_sets[self.cell_codes[:, axis]]
+            else:
+                selected &= np.isin(self.cell_codes[:, axis], codes)
+        return selected
+
+    def aggregate(self, selected: np.ndarray, group_by: Optional[str] = None):
+        """
+        Sums cell histograms of the selected cells: returns (sizes, {measure: histogram}),
+        with a leading group axis when `group_by` is given.
+        """
+        histograms = {measure: counts[selected] for measure, counts in self.histograms.items()}
+        sizes = self.cell_sizes[selected]
+        if group_by is None:
+            return sizes.sum(), {measure: counts.sum(axis=0) for measure, counts in histograms.items()}
+
+        if group_by not in self.labels:
+            raise ValueError(f"Unknown dimension: {group_by}")
+        codes = self.cell_codes[selected, self.dimensions.index(group_by)]
+        if group_by == SESSION_DIMENSION:
+            membership = self.session_sets[codes].T.astype(np.int64)   # (sessions x selected cells)
+            return membership @ sizes, {measure: membership @ counts for measure, counts in histograms.items()}
+
+        n_values = len(self.labels[group_by])
+        grouped_sizes = np.bincount(codes, weights=sizes, minlength=n_values).astype(np.int64)
+        grouped = {}
+        for measure, counts in histograms.items():
+            totals = np.zeros((n_values, counts.shape[1]), dtype=np.int64)
+            np.add.at(totals, codes, counts)
+            grouped[measure] = totals
+        return grouped_sizes, grouped
+
+
+def _session_sets(dataset, n_rows: int):
+    """Session set code per response and the (sets x sessions) membership matrix"""
+    sessions = dataset.sessions
+    n_sessions = len(sessions.categories)
+    attended = np.zeros((n_rows, max(n_sessions, 1)), dtype=bool)
+    attended[sessions.row_index, sessions.codes] = True
+    packed = np.packbits(attended, axis=1)
+    unique_sets, set_codes = np.unique(packed, axis=0, return_inverse=True)
+    membership = np.unpackbits(unique_sets, axis=1, count=attended.shape[1]).astype(bool)[:, :n_sessions]
+    return set_codes.ravel(), membership, list(sessions.categories)
+
+
+def build_cube(data: List[Dict[str, Any]]) -> OLAPCube:
+    """Aggregates the responses of a dataset into sparse cells with per-measure histograms"""
+    dataset = as_dataset(data)
+    df = dataset.frame
+    n_rows = len(df)
+
+    dimensions, labels, code_columns = [], {}, []
+    for col in DIMENSION_COLUMNS:
+        if col in df.columns:
+            codes, values = encode_groups(df[col], fill_value=NOT_SPECIFIED, strip=True)
+            dimensions.append(col)
+            labels[col] = [str(value) for value in values]
+            code_columns.append(codes)
+
+    set_codes, membership, session_names = _session_sets(dataset, n_rows)
+    dimensions.append(SESSION_DIMENSION)
+    labels[SESSION_DIMENSION] = session_names
+    code_columns.append(set_codes)
+
+    # Cell id per response: unique combinations of the dimension codes
+    cardinalities = [len(labels[col]) for col in dimensions[:-1]] + [len(membership)]
+    if np.prod([float(c) for c in cardinalities]) < 2 ** 62:
+        keys = np.zeros(n_rows, dtype=np.int64)
+        for codes, cardinality in zip(code_columns, cardinalities):
+            keys = keys * cardinality + codes
+        _, first_rows, cell_of_row = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first_rows, cell_of_row = np.unique(np.column_stack(code_columns), axis=0,
+                                               return_index=True, return_inverse=True)
+    cell_of_row = cell_of_row.ravel()
+    n_cells = len(first_rows)
+    cell_codes = np.column_stack(code_columns)[first_rows] if n_rows else np.empty((0, len(dimensions)), dtype=np.int64)
+
+    bins, histograms = {}, {}
+    for measure in [col for col in BASE_MEASURES if col in df.columns] + aspect_columns(df):
+        values = pd.to_numeric(df[measure], errors='coerce').to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        measure_bins, bin_codes = np.unique(values[present], return_inverse=True)
+        counts = np.bincount(cell_of_row[present] * len(measure_bins) + bin_codes.ravel(),
+                             minlength=n_cells * len(measure_bins))
+        bins[measure] = measure_bins
+        histograms[measure] = counts.reshape(n_cells, len(measure_bins))
+
+    return OLAPCube(
+        dimensions=dimensions,
+        labels=labels,
+        cell_codes=cell_codes.astype(np.int64),
+        cell_sizes=np.bincount(cell_of_row, minlength=n_cells),
+        session_sets=membership,
+        bins=bins,
+        histograms=histograms
+    )
+
+
+def get_cube(data: List[Dict[str, Any]]) -> OLAPCube:
+    """Returns the OLAP cube of a dataset, building it once and caching it on the dataset"""
+    dataset = as_dataset(data)
+    if 'olap_cube' not in dataset.cache:
+        dataset.cache['olap_cube'] = build_cube(dataset)
+    return dataset.cache['olap_cube']
+
+
+def summarize_histogram(measure: str, bins: np.ndarray, counts: np.ndarray) -> Dict[str, Any]:
+    """Count, mean, std and distribution of one histogram (plus NPS for recommendation scores)"""
+    n = int(counts.sum())
+    summary: Dict[str, Any] = {"count": n, "average": None, "std_dev": None}
+    if n:
+        mean = float(counts @ bins / n)
+        summary["average"] = round(mean, 2)
+        if n > 1:
+            summary["std_dev"] = round(float(np.sqrt(counts @ (bins - mean) ** 2 / (n - 1))), 2)
+    summary["distribution"] = {
+        (int(value) if float(value).is_integer() else float(value)): int(count)
+        for value, count in zip(bins, counts) if count
+    }
+    if measure == 'recommendation_score':
+        detractors = int(counts[bins <= 6].sum())
+        promoters = int(counts[bins >= 9].sum())
+        summary["detractors"] = detractors
+        summary["passives"] = n - detractors - promoters
+        summary["promoters"] = promoters
+        summary["nps_score"] = round((promoters - detractors) / n * 100, 1) if n else None
+    return summary
+
+
+def query_cube(data: List[Dict[str, Any]], filters: Optional[Dict[str, Any]] = None,
+               group_by: Optional[str] = None, measures: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Answers a slice (filters) and optional group-by from the cube of a dataset.
+    filters: {dimension: value or [values]}; measures default to every measure in the cube.
+    """
+    cube = get_cube(data)
+    filters = filters or {}
+    measures = measures or list(cube.histograms)
+    unknown = [measure for measure in measures if measure not in cube.histograms]
+    if unknown:
+        return {"error": f"Unknown measure(s): {', '.join(unknown)}"}
+
+    try:
+        selected = cube.select(filters)
+        responses, totals = cube.aggregate(selected)
+        grouped = cube.aggregate(selected, group_by) if group_by else None
+    except ValueError as e:
+        return {"error": str(e)}
+
+    result = {
+        "filters": filters,
+        "responses": int(responses),
+        "measures": {
+            measure: summarize_histogram(measure, cube.bins[measure], totals[measure]) for measure in measures
+        },
+        "dimensions": cube.labels,
+        "cells": cube.n_cells
+    }
+    if grouped is not None:
+        sizes, histograms = grouped
+        result["group_by"] = group_by
+        result["groups"] = [
+            {
+                "value": label,
+                "responses": int(sizes[code]),
+                "measures": {
+                    measure: summarize_histogram(measure, cube.bins[measure], histograms[measure][code])
+                    for measure in measures
+                }
+            }
+            for code, label in enumerate(cube.labels[group_by]) if sizes[code]
+        ]
+    return result
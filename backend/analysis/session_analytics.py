@@ -6,12 +6,23 @@ Functions:
 - generate_session_performance_matrix: Creates performance matrix based on attendance and satisfaction
 - generate_time_slot_preferences: Analyzes preferred time slots for sessions
 - generate_venue_modality_preferences: Analyzes preferred venue/modality types
+- classify_modality: Online / In-Person classification of a venue label (helper)
 """
 
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List
-from collections import Counter
+
+from backend.processing.dataset import as_dataset
+from .grouped_stats import encode_groups, group_moments, value_count_order, compare_groups, significance_summary
+
+# Venue answers containing any of these words count as online attendance
+ONLINE_VENUE_KEYWORDS = ['online', 'virtual', 'remote', 'webinar', 'zoom']
+
+
+def classify_modality(venue_type: str) -> str:
+    """'Online' if the venue label mentions an online keyword, otherwise 'In-Person'"""
+    return 'Online' if any(keyword in venue_type.lower() for keyword in ONLINE_VENUE_KEYWORDS) else 'In-Person'
 
 
 def generate_session_popularity(data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -19,32 +30,36 @@ def generate_session_popularity(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     Analyzes which sessions were most popular.
     Prepares data for horizontal bar charts and session comparison.
     """
-    df = pd.DataFrame(data)
+    dataset = as_dataset(data)
+    df = dataset.frame
     
     if 'sessions_attended' not in df.columns:
         return {"error": "No session attendance data found"}
     
-    # Flatten all sessions into a single list
-    all_sessions = []
-    for sessions in df['sessions_attended']:
-        if isinstance(sessions, list):
-            all_sessions.extend([s.strip() for s in sessions if s.strip()])
+    # Count session attendance on the flat session encoding (blank names skipped)
+    sessions = dataset.sessions
+    names = np.asarray(sessions.categories, dtype=object)
+    named = np.array([bool(name) for name in names], dtype=bool)
+    keep = named[sessions.codes] if len(sessions.codes) else np.zeros(0, dtype=bool)
+    counts = np.bincount(sessions.codes[keep], minlength=len(names))
     
-    if not all_sessions:
+    if not counts.any():
         return {"error": "No session data found"}
     
-    # Count session attendance
-    session_counts = Counter(all_sessions)
-    top_sessions = session_counts.most_common(10)  # Top 10 sessions
+    # Top 10 sessions: count descending, ties in first-appearance order (like Counter.most_common)
+    order = [code for code in np.argsort(-counts, kind='stable') if counts[code] > 0]
+    session_counts = {names[code]: int(counts[code]) for code in order}
+    top_sessions = list(session_counts.items())[:10]
 
-    # Calculate average satisfaction for each of the top sessions for grouped charts
+    # Average satisfaction of the attendees of each top session (each response counted once per session)
     session_satisfaction = {}
     if 'satisfaction' in df.columns:
-        for session_name, _ in top_sessions:
-            # Filter rows where the session was attended
-            mask = df['sessions_attended'].apply(lambda x: isinstance(x, list) and session_name in x)
-            if mask.any():
-                session_satisfaction[session_name] = df.loc[mask, 'satisfaction'].mean()
+        satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+        pairs = np.unique(sessions.row_index[keep] * len(names) + sessions.codes[keep])
+        moments = group_moments(pairs % len(names), satisfaction[pairs // len(names)], len(names))
+        for code in order[:10]:
+            if not np.isnan(moments.mean[code]):
+                session_satisfaction[names[code]] = moments.mean[code]
     
     return {
         "chart_type": "session_popularity",
@@ -82,7 +97,8 @@ def generate_session_performance_matrix(data: List[Dict[str, Any]]) -> Dict[str,
     - Bubble size: Proportional to attendance
     - Color: Based on quadrant category
     """
-    df = pd.DataFrame(data)
+    dataset = as_dataset(data)
+    df = dataset.frame
     
     # Validate required columns
     if 'sessions_attended' not in df.columns:
@@ -91,46 +107,30 @@ def generate_session_performance_matrix(data: List[Dict[str, Any]]) -> Dict[str,
     if 'satisfaction' not in df.columns:
         return {"error": "No satisfaction data found"}
     
-    # Flatten sessions and collect satisfaction ratings
-    session_data = {}
-    for idx, row in df.iterrows():
-        sessions = row.get('sessions_attended', [])
-        satisfaction = row.get('satisfaction')
-        
-        # Handle sessions (could be list or comma-separated string)
-        if isinstance(sessions, str):
-            sessions = [s.strip() for s in sessions.split(',') if s.strip()]
-        elif not isinstance(sessions, list):
-            continue
-            
-        # Map satisfaction to each attended session
-        if sessions and pd.notna(satisfaction):
-            satisfaction_numeric = pd.to_numeric(satisfaction, errors='coerce')
-            if pd.notna(satisfaction_numeric):
-                for session in sessions:
-                    session = session.strip()
-                    if session not in session_data:
-                        session_data[session] = {
-                            'satisfaction_scores': [],
-                            'attendance': 0
-                        }
-                    session_data[session]['satisfaction_scores'].append(satisfaction_numeric)
-                    session_data[session]['attendance'] += 1
-    
-    if not session_data:
+    # Map each response's satisfaction onto its (dictionary-encoded) attended sessions
+    sessions = dataset.sessions
+    satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+    entry_satisfaction = satisfaction[sessions.row_index]
+    valid = ~np.isnan(entry_satisfaction)
+    session_codes = sessions.codes[valid]
+    
+    if len(session_codes) == 0:
         return {"error": "No valid session performance data found"}
     
-    # Calculate metrics for each session
+    # Calculate metrics for each session (attendance counts only responses with a satisfaction score)
+    n_sessions = len(sessions.categories)
+    attendance_counts = np.bincount(session_codes, minlength=n_sessions)
+    satisfaction_totals = np.bincount(session_codes, weights=entry_satisfaction[valid], minlength=n_sessions)
+    present, first_seen = np.unique(session_codes, return_index=True)
+    
     sessions_list = []
-    for session_name, metrics in session_data.items():
-        if metrics['attendance'] > 0 and metrics['satisfaction_scores']:
-            avg_satisfaction = np.mean(metrics['satisfaction_scores'])
-            sessions_list.append({
-                'session': session_name,
-                'attendance': metrics['attendance'],
-                'avg_satisfaction': round(float(avg_satisfaction), 2),
-                'response_count': len(metrics['satisfaction_scores'])
-            })
+    for code in present[np.argsort(first_seen, kind='stable')]:
+        sessions_list.append({
+            'session': sessions.categories[code],
+            'attendance': int(attendance_counts[code]),
+            'avg_satisfaction': round(float(satisfaction_totals[code] / attendance_counts[code]), 2),
+            'response_count': int(attendance_counts[code])
+        })
     
     if not sessions_list:
         return {"error": "No sessions with sufficient data"}
@@ -203,7 +203,7 @@ def generate_time_slot_preferences(data: List[Dict[str, Any]]) -> Dict[str, Any]
     - Time slot vs satisfaction correlation
     - Peak preference times
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     # Check for preferred time slot column
     time_col = None
@@ -215,12 +215,12 @@ def generate_time_slot_preferences(data: List[Dict[str, Any]]) -> Dict[str, Any]
     if not time_col:
         return {"error": "No preferred time slot data found"}
     
-    # Clean and normalize time slot data
-    df[time_col] = df[time_col].fillna('Not Specified')
-    df[time_col] = df[time_col].astype(str).str.strip()
+    # Clean and normalize time slot labels on the encoded categories (not per row)
+    time_codes, time_labels = encode_groups(df[time_col], fill_value='Not Specified', strip=True)
     
     # Count preferences
-    time_counts = df[time_col].value_counts().to_dict()
+    ordered_codes, ordered_counts = value_count_order(time_codes, len(time_labels))
+    time_counts = {time_labels[code]: int(count) for code, count in zip(ordered_codes, ordered_counts)}
     
     # Remove 'Not Specified' from main analysis if present
     total_responses = len(df)
@@ -241,13 +241,16 @@ def generate_time_slot_preferences(data: List[Dict[str, Any]]) -> Dict[str, Any]
     
     # Calculate satisfaction correlation if available
     satisfaction_by_time = {}
+    significance = None
     if 'satisfaction' in df.columns:
-        for time_slot in time_counts.keys():
-            if time_slot != 'Not Specified':
-                mask = df[time_col] == time_slot
-                if mask.any():
-                    avg_sat = df.loc[mask, 'satisfaction'].mean()
-                    satisfaction_by_time[time_slot] = round(float(avg_sat), 2)
+        satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+        # 'Not Specified' responses are not a group of their own in the tests
+        specified_codes = np.where(time_labels[time_codes] == 'Not Specified', -1, time_codes)
+        comparison = compare_groups(specified_codes, satisfaction, len(time_labels))
+        for code in ordered_codes:
+            if time_labels[code] != 'Not Specified':
+                satisfaction_by_time[time_labels[code]] = round(float(comparison.moments.mean[code]), 2)
+        significance = significance_summary(comparison)
     
     # Identify most and least popular slots
     most_popular = time_distribution[0] if time_distribution else None
@@ -258,6 +261,7 @@ def generate_time_slot_preferences(data: List[Dict[str, Any]]) -> Dict[str, Any]
         "data": {
             "distribution": time_distribution,
             "satisfaction_by_time": satisfaction_by_time,
+            "significance": significance,
             "stats": {
                 "total_responses": total_responses,
                 "specified_responses": specified_responses,
@@ -278,7 +282,7 @@ def generate_venue_modality_preferences(data: List[Dict[str, Any]]) -> Dict[str,
     - Modality breakdown (online vs physical venues)
     - Venue satisfaction correlation
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
     # Check for preferred venue column
     venue_col = None
@@ -290,16 +294,14 @@ def generate_venue_modality_preferences(data: List[Dict[str, Any]]) -> Dict[str,
     if not venue_col:
         return {"error": "No preferred venue data found"}
     
-    # Clean and normalize venue data
-    df[venue_col] = df[venue_col].fillna('Not Specified')
-    df[venue_col] = df[venue_col].astype(str).str.strip()
+    # Clean and normalize venue labels on the encoded categories (not per row)
+    venue_codes, venue_labels = encode_groups(df[venue_col], fill_value='Not Specified', strip=True)
     
     # Count preferences
-    venue_counts = df[venue_col].value_counts().to_dict()
+    ordered_codes, ordered_counts = value_count_order(venue_codes, len(venue_labels))
+    venue_counts = {venue_labels[code]: int(count) for code, count in zip(ordered_codes, ordered_counts)}
     
     # Classify venues as Online or In-Person
-    online_keywords = ['online', 'virtual', 'remote', 'webinar', 'zoom']
-    
     modality_breakdown = {
         'online': 0,
         'in_person': 0,
@@ -310,7 +312,7 @@ def generate_venue_modality_preferences(data: List[Dict[str, Any]]) -> Dict[str,
     total_responses = len(df)
     
     for venue_type, count in venue_counts.items():
-        is_online = any(keyword in venue_type.lower() for keyword in online_keywords)
+        is_online = classify_modality(venue_type) == 'Online'
         
         if venue_type == 'Not Specified':
             modality_breakdown['not_specified'] += count
@@ -332,13 +334,16 @@ def generate_venue_modality_preferences(data: List[Dict[str, Any]]) -> Dict[str,
     
     # Calculate satisfaction correlation if available
     satisfaction_by_venue = {}
+    significance = None
     if 'satisfaction' in df.columns:
-        for venue_type in venue_counts.keys():
-            if venue_type != 'Not Specified':
-                mask = df[venue_col] == venue_type
-                if mask.any():
-                    avg_sat = df.loc[mask, 'satisfaction'].mean()
-                    satisfaction_by_venue[venue_type] = round(float(avg_sat), 2)
+        satisfaction = pd.to_numeric(df['satisfaction'], errors='coerce').to_numpy(dtype=float)
+        # 'Not Specified' responses are not a group of their own in the tests
+        specified_codes = np.where(venue_labels[venue_codes] == 'Not Specified', -1, venue_codes)
+        comparison = compare_groups(specified_codes, satisfaction, len(venue_labels))
+        for code in ordered_codes:
+            if venue_labels[code] != 'Not Specified':
+                satisfaction_by_venue[venue_labels[code]] = round(float(comparison.moments.mean[code]), 2)
+        significance = significance_summary(comparison)
     
     # Calculate modality percentages
     specified_responses = total_responses - modality_breakdown['not_specified']
@@ -368,6 +373,7 @@ def generate_venue_modality_preferences(data: List[Dict[str, Any]]) -> Dict[str,
             "venue_distribution": venue_details,
             "modality_breakdown": modality_distribution,
             "satisfaction_by_venue": satisfaction_by_venue,
+            "significance": significance,
             "stats": {
                 "total_responses": total_responses,
                 "specified_responses": specified_responses,
@@ -0,0 +1,103 @@
+"""
+Memory-bounded frequency sketches.
+
+Functions / classes:
+- SpaceSaving: Mergeable heavy-hitters summary (Space-Saving) with a fixed number of counters
+"""
+
+from typing import Dict, Any, Hashable, List, Mapping, Optional, Tuple
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters summary keeping at most `capacity` counters.
+    Counts are overestimates by at most the stored per-item error; any item with a true
+    frequency above total / capacity is guaranteed to be tracked. Summaries can be
+    merged, so exact per-chunk Counters (or per-event snapshots) fold in cheaply.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("SpaceSaving capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def min_count(self) -> int:
+        """Smallest tracked count once full (the error bound for untracked items), else 0"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    @property
+    def is_exact(self) -> bool:
+        return not any(self.errors.values())
+
+    def update(self, item: Hashable, count: int = 1) -> None:
+        """Adds `count` occurrences of a single item (classic Space-Saving step)"""
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(evicted)
+            self.errors.pop(evicted)
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+
+    def update_counts(self, counts: Mapping[Hashable, int]) -> None:
+        """Folds exact counts (e.g. a per-chunk Counter) into the summary"""
+        self._merge(dict(counts), {}, 0, sum(counts.values()))
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Merges another summary into this one (in place) and returns self"""
+        self._merge(other.counts, other.errors, other.min_count, other.total)
+        return self
+
+    def _merge(self, counts: Mapping[Hashable, int], errors: Mapping[Hashable, int],
+               other_floor: int, other_total: int) -> None:
+        # Items missing from a full summary may have occurred up to its min count times
+        own_floor = self.min_count
+        merged_counts, merged_errors = {}, {}
+        # Ordered union (own items first) keeps tie-breaking deterministic
+        for item in list(self.counts) + [item for item in counts if item not in self.counts]:
+            merged_counts[item] = self.counts.get(item, own_floor) + counts.get(item, other_floor)
+            merged_errors[item] = self.errors.get(item, own_floor) + errors.get(item, other_floor)
+
+        if len(merged_counts) > self.capacity:
+            ranked = sorted(merged_counts, key=merged_counts.__getitem__, reverse=True)
+            ranked = ranked[:self.capacity]
+            # Dropped counters bound the error of everything we no longer track
+            merged_counts = {item: merged_counts[item] for item in ranked}
+            merged_errors = {item: merged_errors[item] for item in ranked}
+
+        self.counts, self.errors = merged_counts, merged_errors
+        self.total += other_total
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[Hashable, int, int]]:
+        """Returns up to n (item, estimated_count, max_error) tuples, highest counts first"""
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return [(item, count, self.errors[item]) for item, count in ranked[:n]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state (items must be strings)"""
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "items": [[item, count, self.errors[item]] for item, count in self.counts.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'SpaceSaving':
+        sketch = cls(state.get("capacity", 1000))
+        sketch.total = state.get("total", 0)
+        for item, count, error in state.get("items", []):
+            sketch.counts[item] = count
+            sketch.errors[item] = error
+        return sketch
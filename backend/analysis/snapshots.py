@@ -0,0 +1,367 @@
+"""
+Mergeable per-event aggregate snapshots for longitudinal reports.
+
+A snapshot is the additive state behind the report sections of one dataset: score
+histograms, per-segment histograms (sessions, channels, pacing, time slots, venues),
+pairwise co-moment sums for the correlation matrix and Space-Saving sketches for
+comment words, phrases and one-word descriptions. Snapshots are plain JSON of a few
+KB and merge by adding counts (sketches merge as Space-Saving summaries), so a report
+over many events or a rolling window is O(events) merges instead of a pass over every
+response.
+
+Functions:
+- build_snapshot: Snapshot of a dataset (one state per section in SNAPSHOT_SECTIONS)
+- merge_snapshots: Merges any number of snapshots into one
+- summarize_snapshot: Report sections (averages, NPS, rankings, correlations, top words) from a snapshot
+- rolling_summaries: Headline metrics per event over a trailing window of events
+"""
+
+from functools import reduce
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+from .grouped_stats import encode_groups
+from .olap_cube import summarize_histogram
+from .sketches import SpaceSaving
+from .text_processing import get_text_stats
+from .word_normalization import normalized_word_counts, fold_word_counts
+
+# Bumped when the state layout changes; stored snapshots of other versions are rebuilt
+SNAPSHOT_VERSION = 2
+SCORE_COLUMNS = ['satisfaction', 'recommendation_score']
+# Counters kept per heavy-hitter sketch (words, phrases, one-word descriptions)
+SKETCH_CAPACITY = 200
+TOP_ITEMS = 20
+
+
+# --- State helpers ---
+
+def _level_key(value: float) -> str:
+    """JSON key of a score level ('5', '4.5')"""
+    return str(int(value)) if float(value).is_integer() else str(float(value))
+
+
+def _histogram(values: np.ndarray) -> Dict[str, int]:
+    levels, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+    return {_level_key(level): int(count) for level, count in zip(levels, counts)}
+
+
+def _scores(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) if col in df.columns \
+        else np.full(len(df), np.nan)
+
+
+def _grouped_histograms(codes: np.ndarray, labels: List[Any], rows: np.ndarray,
+                        measures: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """
+    {group: {"responses": n, measure: histogram}} for entries with group `codes` (-1 = missing)
+    belonging to response `rows`, with one bincount per measure.
+    """
+    valid_codes = codes >= 0
+    sizes = np.bincount(codes[valid_codes], minlength=len(labels))
+    groups = {str(label): {"responses": int(sizes[code])} for code, label in enumerate(labels) if sizes[code]}
+    for measure, values in measures.items():
+        entry_values = values[rows]
+        valid = valid_codes & ~np.isnan(entry_values)
+        levels, level_codes = np.unique(entry_values[valid], return_inverse=True)
+        counts = np.bincount(codes[valid] * len(levels) + level_codes.ravel(),
+                             minlength=len(labels) * len(levels)).reshape(len(labels), len(levels))
+        for code, label in enumerate(labels):
+            if sizes[code]:
+                groups[str(label)][measure] = {
+                    _level_key(level): int(count) for level, count in zip(levels, counts[code]) if count
+                }
+    return groups
+
+
+def _sketch(counts) -> Dict[str, Any]:
+    sketch = SpaceSaving(SKETCH_CAPACITY)
+    sketch.update_counts({str(item): int(count) for item, count in counts.items()})
+    return sketch.to_dict()
+
+
+def _is_sketch(state: Any) -> bool:
+    return isinstance(state, dict) and set(state) == {"capacity", "total", "items"}
+
+
+# --- Per-section states ---
+
+def _score_measures(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {col: _scores(df, col) for col in SCORE_COLUMNS if col in df.columns}
+
+
+def _segment_state(column: str):
+    def build(dataset) -> Dict[str, Any]:
+        df = dataset.frame
+        if column not in df.columns:
+            return {"groups": {}}
+        codes, labels = encode_groups(df[column], strip=True)
+        return {"groups": _grouped_histograms(codes, list(labels), np.arange(len(df)), _score_measures(df))}
+    return build
+
+
+def _satisfaction_state(dataset) -> Dict[str, Any]:
+    return {"histogram": _histogram(_scores(dataset.frame, 'satisfaction'))}
+
+
+def _nps_state(dataset) -> Dict[str, Any]:
+    return {"histogram": _histogram(_scores(dataset.frame, 'recommendation_score'))}
+
+
+def _ratings_state(dataset) -> Dict[str, Any]:
+    aspects = dataset.aspects
+    return {
+        "labels": dict(zip(aspects.columns, aspects.labels)),
+        "histograms": {col: _histogram(aspects.values[:, j]) for j, col in enumerate(aspects.columns)}
+    }
+
+
+def _sessions_state(dataset) -> Dict[str, Any]:
+    sessions = dataset.sessions
+    return {"groups": _grouped_histograms(sessions.codes.astype(np.int64), sessions.categories,
+                                          sessions.row_index, _score_measures(dataset.frame))}
+
+
+def _one_word_state(dataset) -> Dict[str, Any]:
+    """
+    Counts per normalized spelling; spell-folding and stemming depend on the whole word
+    distribution, so they run on the merged counts when summarizing
+    """
+    df = dataset.frame
+    if 'one_word_desc' not in df.columns:
+        return {"sketch": _sketch({})}
+    return {"sketch": _sketch(normalized_word_counts(df['one_word_desc']))}
+
+
+def _feedback_state(dataset) -> Dict[str, Any]:
+    stats = get_text_stats(dataset)
+    phrases = SpaceSaving(SKETCH_CAPACITY).merge(stats.phrase_sketches[2])
+    return {
+        "comments": {col: int(count) for col, count in stats.response_counts.items()},
+        "words": _sketch(stats.word_counts),
+        "phrases": phrases.to_dict()
+    }
+
+
+def _correlation_state(dataset) -> Dict[str, Any]:
+    """
+    Pairwise-complete co-moments [n, sum_a, sum_b, sum_a², sum_b², sum_ab] per column pair
+    ("a|b"), the same pairwise deletion as the correlation section.
+    """
+    df = dataset.frame
+    aspects = dataset.aspects
+    score_columns = [col for col in SCORE_COLUMNS if col in df.columns]
+    columns = score_columns + aspects.columns
+    if len(columns) < 2:
+        return {"labels": {}, "pairs": {}}
+    values = np.column_stack([_scores(df, col) for col in score_columns] + [aspects.values])
+    present = (~np.isnan(values)).astype(float)
+    filled = np.where(present > 0, values, 0.0)
+    counts, sums, squares, products = present.T @ present, filled.T @ present, (filled * filled).T @ present, \
+        filled.T @ filled
+
+    pairs = {}
+    for i in range(len(columns)):
+        for j in range(i + 1, len(columns)):
+            pairs[f"{columns[i]}|{columns[j]}"] = [
+                float(counts[i, j]), float(sums[i, j]), float(sums[j, i]),
+                float(squares[i, j]), float(squares[j, i]), float(products[i, j])
+            ]
+    labels = {col: col.replace('_', ' ').title() for col in score_columns}
+    labels.update(zip(aspects.columns, aspects.labels))
+    return {"labels": labels, "pairs": pairs}
+
+
+# --- Summaries ---
+
+def _summarize(measure: str, histogram: Dict[str, int]) -> Dict[str, Any]:
+    bins = np.array([float(level) for level in histogram], dtype=float)
+    counts = np.array(list(histogram.values()), dtype=np.int64)
+    order = np.argsort(bins)
+    return summarize_histogram(measure, bins[order], counts[order])
+
+
+def _summarize_groups(state: Dict[str, Any], total: int, name: str) -> List[Dict[str, Any]]:
+    summaries = []
+    for group, measures in state.get("groups", {}).items():
+        summary = {
+            name: group,
+            "responses": measures["responses"],
+            "percentage": round(measures["responses"] / total * 100, 1) if total else 0.0,
+            "average_satisfaction": None,
+            "nps_score": None
+        }
+        if measures.get("satisfaction"):
+            summary["average_satisfaction"] = _summarize('satisfaction', measures["satisfaction"])["average"]
+        if measures.get("recommendation_score"):
+            summary["nps_score"] = _summarize('recommendation_score', measures["recommendation_score"])["nps_score"]
+        summaries.append(summary)
+    # Ties are ordered by name so merged and single-pass snapshots agree
+    summaries.sort(key=lambda summary: (-summary["responses"], str(summary[name])))
+    return summaries
+
+
+def _ranked(counts: Dict[str, int], key: str, limit: int = TOP_ITEMS) -> List[Dict[str, Any]]:
+    # Ties are ranked alphabetically so merged and single-pass snapshots list the same items
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [{key: item, "count": count} for item, count in ranked[:limit]]
+
+
+def _top_items(state: Dict[str, Any], key: str, limit: int = TOP_ITEMS) -> List[Dict[str, Any]]:
+    return _ranked(SpaceSaving.from_dict(state).counts, key, limit)
+
+
+def _summarize_correlation(state: Dict[str, Any], total: int) -> Dict[str, Any]:
+    labels = state.get("labels", {})
+    pairs = []
+    for key, (n, sum_a, sum_b, squares_a, squares_b, products) in state.get("pairs", {}).items():
+        a, b = key.split('|')
+        denominator = (n * squares_a - sum_a ** 2) * (n * squares_b - sum_b ** 2)
+        if n < 3 or denominator <= 0:
+            continue
+        pairs.append({
+            "a": labels.get(a, a),
+            "b": labels.get(b, b),
+            "correlation": round(float((n * products - sum_a * sum_b) / np.sqrt(denominator)), 3),
+            "sample_size": int(n)
+        })
+    pairs.sort(key=lambda pair: abs(pair["correlation"]), reverse=True)
+    return {"pairs": pairs}
+
+
+def _summarize_satisfaction(state: Dict[str, Any], total: int) -> Dict[str, Any]:
+    return _summarize('satisfaction', state["histogram"])
+
+
+def _summarize_nps(state: Dict[str, Any], total: int) -> Dict[str, Any]:
+    return _summarize('recommendation_score', state["histogram"])
+
+
+def _summarize_ratings(state: Dict[str, Any], total: int) -> List[Dict[str, Any]]:
+    return [
+        {"aspect": state["labels"].get(col, col), "column": col, **_summarize(col, histogram)}
+        for col, histogram in state["histograms"].items()
+    ]
+
+
+def _segment_summary(name: str):
+    def summarize(state: Dict[str, Any], total: int) -> List[Dict[str, Any]]:
+        return _summarize_groups(state, total, name)
+    return summarize
+
+
+def _summarize_one_word(state: Dict[str, Any], total: int) -> List[Dict[str, Any]]:
+    # Same normalization as generate_one_word_descriptions ("amazing!!", "Amazingg" -> Amazing)
+    return _ranked(fold_word_counts(SpaceSaving.from_dict(state["sketch"]).counts), "word")
+
+
+def _summarize_feedback(state: Dict[str, Any], total: int) -> Dict[str, Any]:
+    return {
+        "comments": state["comments"],
+        "top_words": _top_items(state["words"], "word"),
+        "top_phrases": _top_items(state["phrases"], "phrase")
+    }
+
+
+# Section key (as in the comprehensive report) -> (state builder, summarizer)
+SNAPSHOT_SECTIONS = {
+    "satisfaction": (_satisfaction_state, _summarize_satisfaction),
+    "nps": (_nps_state, _summarize_nps),
+    "ratings": (_ratings_state, _summarize_ratings),
+    "sessions": (_sessions_state, _segment_summary("session")),
+    "discovery_channels": (_segment_state('event_discovery'), _segment_summary("channel")),
+    "pacing": (_segment_state('pacing'), _segment_summary("pacing")),
+    "time_preferences": (_segment_state('preferred_time'), _segment_summary("time_slot")),
+    "venue_preferences": (_segment_state('preferred_venue'), _segment_summary("venue")),
+    "one_word_descriptions": (_one_word_state, _summarize_one_word),
+    "feedback": (_feedback_state, _summarize_feedback),
+    "correlation": (_correlation_state, _summarize_correlation)
+}
+
+
+# --- Public API ---
+
+def build_snapshot(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mergeable aggregate state of a dataset: {"version", "responses", "events", "sections"}"""
+    dataset = as_dataset(data)
+    sections = {}
+    for key, (build, _) in SNAPSHOT_SECTIONS.items():
+        try:
+            sections[key] = build(dataset)
+        except Exception as e:
+            print(f"DEBUG: Error building {key} snapshot: {e}")
+    return {
+        "version": SNAPSHOT_VERSION,
+        "responses": len(dataset),
+        "events": 1,
+        "sections": sections
+    }
+
+
+def _merge_state(first: Any, second: Any) -> Any:
+    """Counts and sums add, sketches merge, labels keep the first value"""
+    if _is_sketch(first) and _is_sketch(second):
+        return SpaceSaving.from_dict(first).merge(SpaceSaving.from_dict(second)).to_dict()
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_state(first[key], value) if key in first else value
+        return merged
+    if isinstance(first, list) and isinstance(second, list):
+        return [a + b for a, b in zip(first, second)]
+    if isinstance(first, (int, float)) and isinstance(second, (int, float)):
+        return first + second
+    return first
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Merges snapshots of any number of events (None for an empty list)"""
+    if not snapshots:
+        return None
+    return {
+        "version": SNAPSHOT_VERSION,
+        "responses": sum(snapshot["responses"] for snapshot in snapshots),
+        "events": sum(snapshot.get("events", 1) for snapshot in snapshots),
+        "sections": reduce(_merge_state, (snapshot["sections"] for snapshot in snapshots))
+    }
+
+
+def summarize_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Report sections computed from a (merged) snapshot"""
+    total = snapshot["responses"]
+    report = {"responses": total, "events": snapshot.get("events", 1)}
+    for key, (_, summarize) in SNAPSHOT_SECTIONS.items():
+        if key in snapshot["sections"]:
+            try:
+                report[key] = summarize(snapshot["sections"][key], total)
+            except Exception as e:
+                report[key] = {"error": f"Failed to summarize {key}: {str(e)}"}
+    return report
+
+
+def rolling_summaries(events: List[Dict[str, Any]], window: int = 3) -> List[Dict[str, Any]]:
+    """
+    Headline metrics per event over that event and the `window - 1` before it.
+    `events` are {"event_id", "name", "event_date", "snapshot"} in chronological order.
+    """
+    window = max(int(window), 1)
+    rolling = []
+    for i, event in enumerate(events):
+        merged = merge_snapshots([e["snapshot"] for e in events[max(0, i - window + 1):i + 1]])
+        sections = merged["sections"]
+        satisfaction = _summarize('satisfaction', sections["satisfaction"]["histogram"]) \
+            if "satisfaction" in sections else {}
+        nps = _summarize('recommendation_score', sections["nps"]["histogram"]) if "nps" in sections else {}
+        rolling.append({
+            "event_id": event["event_id"],
+            "name": event["name"],
+            "event_date": event["event_date"],
+            "window_events": merged["events"],
+            "responses": merged["responses"],
+            "average_satisfaction": satisfaction.get("average"),
+            "nps_score": nps.get("nps_score")
+        })
+    return rolling
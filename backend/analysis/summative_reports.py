@@ -4,12 +4,16 @@ High-level report orchestrators that combine multiple analysis modules.
 Functions:
 - generate_comprehensive_report: Generates complete analysis report combining all insights
 - generate_initial_summary: Generates lightweight summary for immediate frontend display
+- generate_report_sections: Runs selected report sections (by key) with per-section error handling
+- generate_filtered_report: Recomputes report sections on the rows matching bitmap-index conditions
 """
 
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from collections import Counter
 
+from backend.processing.dataset import as_dataset, subset_dataset, LEGACY_ASPECT_COLUMNS
+
 # Import from modularized analysis modules
 from .metrics_analysis import generate_satisfaction_analysis, generate_recommendation_analysis
 from .session_analytics import (
@@ -19,8 +23,41 @@ from .session_analytics import (
     generate_venue_modality_preferences
 )
 from .comparative_analysis import generate_rating_comparison, generate_correlation_analysis, generate_pacing_analysis
-from .textual_analytics import generate_one_word_descriptions, generate_text_insights
+from .key_drivers import generate_key_driver_analysis
+from .textual_analytics import generate_one_word_descriptions, generate_text_insights, generate_lexicon_sentiment
 from .marketing_analytics import generate_discovery_channel_impact
+from .keyword_index import generate_segment_keywords
+from .theme_clustering import generate_theme_clusters
+from .bitmap_index import filter_rows
+
+# Report sections in output order: (key, generator, name used in debug logs)
+REPORT_SECTIONS = [
+    ("satisfaction", generate_satisfaction_analysis, "Satisfaction analysis"),
+    ("nps", generate_recommendation_analysis, "NPS analysis"),
+    ("sessions", generate_session_popularity, "Sessions analysis"),
+    ("ratings", generate_rating_comparison, "Ratings analysis"),
+    ("feedback", generate_text_insights, "Feedback analysis"),
+    ("lexicon_sentiment", generate_lexicon_sentiment, "Lexicon sentiment analysis"),
+    ("one_word_descriptions", generate_one_word_descriptions, "One-word descriptions analysis"),
+    ("pacing", generate_pacing_analysis, "Pacing analysis"),
+    ("correlation", generate_correlation_analysis, "Correlation analysis"),
+    # Key drivers: multivariate regression + Shapley importance over all aspects
+    ("key_drivers", generate_key_driver_analysis, "Key driver analysis"),
+    ("session_matrix", generate_session_performance_matrix, "Session performance matrix"),
+    ("discovery_channels", generate_discovery_channel_impact, "Discovery channel impact analysis"),
+    ("time_preferences", generate_time_slot_preferences, "Time slot preferences analysis"),
+    ("venue_preferences", generate_venue_modality_preferences, "Venue modality preferences analysis"),
+    # Offline themes over all comments (hashing vectorizer + mini-batch k-means)
+    ("themes", generate_theme_clusters, "Theme clustering"),
+    # Distinctive comment terms per session / channel / pacing / venue segment
+    ("segment_keywords", generate_segment_keywords, "Segment keyword analysis"),
+]
+SECTION_GENERATORS = {key: (generator, name) for key, generator, name in REPORT_SECTIONS}
+
+# Sections recomputed for filtered drill-downs when none are requested
+DEFAULT_FILTER_SECTIONS = ["satisfaction", "nps", "sessions", "ratings", "pacing", "discovery_channels"]
+# Matching row positions returned with a filtered report
+FILTER_ROW_LIMIT = 100
 
 
 def generate_comprehensive_report(data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -31,8 +68,12 @@ def generate_comprehensive_report(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     print(f"DEBUG: Starting comprehensive report generation for {len(data)} records")
     
+    # Share one dictionary-encoded frame across all analyzers
+    data = as_dataset(data)
+    
     # Generate individual data points for scatter plots
     scatter_data = []
+    extra_aspects = [col for col in data.aspects.columns if col not in LEGACY_ASPECT_COLUMNS]
     for response in data:
         if 'satisfaction' in response and 'recommendation_score' in response:
             # Only include responses that have both satisfaction and recommendation data
@@ -48,7 +89,8 @@ def generate_comprehensive_report(data: List[Dict[str, Any]]) -> Dict[str, Any]:
                         'recommendation_score': recommendation,
                         'venue_rating': float(response.get('venue_rating', 0)) if response.get('venue_rating') else None,
                         'speaker_rating': float(response.get('speaker_rating', 0)) if response.get('speaker_rating') else None,
-                        'content_rating': float(response.get('content_rating', 0)) if response.get('content_rating') else None
+                        'content_rating': float(response.get('content_rating', 0)) if response.get('content_rating') else None,
+                        **{col: float(response[col]) if pd.notna(response.get(col)) else None for col in extra_aspects}
                     })
             except (ValueError, TypeError) as e:
                 print(f"DEBUG: Skipping invalid data point: {e}")
@@ -65,93 +107,7 @@ def generate_comprehensive_report(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
     
     # Generate each analysis with individual error handling
-    try:
-        analysis_result["satisfaction"] = generate_satisfaction_analysis(data)
-        print("DEBUG: Satisfaction analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Satisfaction analysis failed: {e}")
-        analysis_result["satisfaction"] = {"error": str(e)}
-    
-    try:
-        analysis_result["nps"] = generate_recommendation_analysis(data)
-        print("DEBUG: NPS analysis completed")
-    except Exception as e:
-        print(f"DEBUG: NPS analysis failed: {e}")
-        analysis_result["nps"] = {"error": str(e)}
-    
-    try:
-        analysis_result["sessions"] = generate_session_popularity(data)
-        print("DEBUG: Sessions analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Sessions analysis failed: {e}")
-        analysis_result["sessions"] = {"error": str(e)}
-    
-    try:
-        analysis_result["ratings"] = generate_rating_comparison(data)
-        print("DEBUG: Ratings analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Ratings analysis failed: {e}")
-        analysis_result["ratings"] = {"error": str(e)}
-    
-    try:
-        analysis_result["feedback"] = generate_text_insights(data)
-        print("DEBUG: Feedback analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Feedback analysis failed: {e}")
-        analysis_result["feedback"] = {"error": str(e)}
-    
-    try:
-        analysis_result["one_word_descriptions"] = generate_one_word_descriptions(data)
-        print("DEBUG: One-word descriptions analysis completed")
-    except Exception as e:
-        print(f"DEBUG: One-word descriptions analysis failed: {e}")
-        analysis_result["one_word_descriptions"] = {"error": str(e)}
-    
-    try:
-        analysis_result["pacing"] = generate_pacing_analysis(data)
-        print("DEBUG: Pacing analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Pacing analysis failed: {e}")
-        analysis_result["pacing"] = {"error": str(e)}
-    
-    try:
-        analysis_result["correlation"] = generate_correlation_analysis(data)
-        print("DEBUG: Correlation analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Correlation analysis failed: {e}")
-        analysis_result["correlation"] = {"error": str(e)}
-    
-    # NEW: Session Performance Matrix
-    try:
-        analysis_result["session_matrix"] = generate_session_performance_matrix(data)
-        print("DEBUG: Session performance matrix completed")
-    except Exception as e:
-        print(f"DEBUG: Session performance matrix failed: {e}")
-        analysis_result["session_matrix"] = {"error": str(e)}
-    
-    # NEW: Discovery Channel Impact
-    try:
-        analysis_result["discovery_channels"] = generate_discovery_channel_impact(data)
-        print("DEBUG: Discovery channel impact analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Discovery channel impact failed: {e}")
-        analysis_result["discovery_channels"] = {"error": str(e)}
-    
-    # NEW: Time Slot Preferences
-    try:
-        analysis_result["time_preferences"] = generate_time_slot_preferences(data)
-        print("DEBUG: Time slot preferences analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Time slot preferences failed: {e}")
-        analysis_result["time_preferences"] = {"error": str(e)}
-    
-    # NEW: Venue Modality Preferences
-    try:
-        analysis_result["venue_preferences"] = generate_venue_modality_preferences(data)
-        print("DEBUG: Venue modality preferences analysis completed")
-    except Exception as e:
-        print(f"DEBUG: Venue modality preferences failed: {e}")
-        analysis_result["venue_preferences"] = {"error": str(e)}
+    analysis_result.update(generate_report_sections(data, [key for key, _, _ in REPORT_SECTIONS]))
     
     # Add scatter data
     analysis_result["scatter_data"] = {
@@ -203,3 +159,53 @@ def generate_initial_summary(data: List[Dict[str, Any]]) -> Dict[str, Any]:
             ]
     
     return summary
+
+
+def generate_report_sections(data: List[Dict[str, Any]], sections: List[str]) -> Dict[str, Any]:
+    """
+    Runs the requested sections of the comprehensive report (keys of REPORT_SECTIONS).
+    A failing section yields {"error": ...} instead of aborting the others.
+    """
+    results = {}
+    for key in sections:
+        generator, name = SECTION_GENERATORS[key]
+        try:
+            results[key] = generator(data)
+            print(f"DEBUG: {name} completed")
+        except Exception as e:
+            print(f"DEBUG: {name} failed: {e}")
+            results[key] = {"error": str(e)}
+    return results
+
+
+def generate_filtered_report(data: List[Dict[str, Any]], conditions: List[Dict[str, Any]],
+                             sections: Optional[List[str]] = None, row_limit: int = FILTER_ROW_LIMIT) -> Dict[str, Any]:
+    """
+    Selects rows with the packed bitmap index (AND of all conditions) and recomputes the
+    requested report sections on just those rows.
+    """
+    sections = sections or DEFAULT_FILTER_SECTIONS
+    unknown = [key for key in sections if key not in SECTION_GENERATORS]
+    if unknown:
+        return {"error": f"Unknown section(s): {', '.join(unknown)}"}
+
+    dataset = as_dataset(data)
+    try:
+        rows, total = filter_rows(dataset, conditions)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    result = {
+        "filter": {
+            "conditions": conditions,
+            "matched_responses": int(len(rows)),
+            "total_responses": int(total),
+            "rows": rows[:row_limit].tolist()
+        }
+    }
+    if len(rows) == 0:
+        result["analysis"] = {key: {"error": "No responses match the filter"} for key in sections}
+        return result
+
+    result["analysis"] = generate_report_sections(subset_dataset(dataset, rows), sections)
+    return result
@@ -0,0 +1,185 @@
+"""
+Single-pass text processing engine for feedback comments.
+
+Tokenizes every feedback column once with precompiled patterns and produces word
+counts (overall and per column), bigram/trigram key-phrase sketches, per-comment
+lengths and sample comments together.
+Texts are processed in chunks that are joined, lowercased and tokenized with one
+regex call each, so memory stays bounded by the chunk size plus the vocabulary.
+
+Functions / classes:
+- TextStats: Word counts, phrase sketches, lengths and per-column counts from one pass
+- word_pattern: Cached compiled word regex for a minimum word length
+- count_words: Stop-word-filtered word counts for a list of texts
+- count_phrases: Bigram/trigram counts within clauses of lowercased text
+- iter_column_texts: Yields the analyzable comments of a text column
+- analyze_text_columns: Runs the single pass over several text columns
+- get_text_stats: Cached analyze_text_columns result for a dataset
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import as_dataset
+from .sketches import SpaceSaving
+
+TEXT_COLUMNS = ['positive_feedback', 'improvement_feedback', 'additional_comments']
+
+# Placeholders inserted during ingestion (or by form tools) for empty answers
+PLACEHOLDER_TEXTS = frozenset({'No comment', 'No comment provided'})
+
+# Common stop words to exclude from word counts
+STOP_WORDS = frozenset({
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'a', 'an', 'is', 'was', 'are', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'it',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they'
+})
+
+# Key phrases must not start or end with these (they may appear inside: "lack of seats")
+PHRASE_EDGE_STOP_WORDS = STOP_WORDS | frozenset({
+    'my', 'our', 'your', 'their', 'its', 'me', 'us', 'them', 'so', 'very', 'really',
+    'just', 'also', 'as', 'if', 'than', 'then', 'there', 'from', 'about', 'into', 'up', 'not'
+})
+
+# Phrase lengths tracked and counters kept per length (bounds memory on huge comment sets)
+PHRASE_SIZES = (2, 3)
+PHRASE_SKETCH_CAPACITY = 2000
+
+# Number of comments joined into one string per regex call
+CHUNK_SIZE = 5000
+
+# Phrases never span sentence punctuation or comment boundaries
+_CLAUSE_SPLIT = re.compile(r'[.!?,;:()"\n]+')
+_PHRASE_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class TextStats:
+    """Results of one tokenization pass over the text columns"""
+
+    def __init__(self):
+        self.word_counts: Counter = Counter()
+        self.column_word_counts: Dict[str, Counter] = {}
+        self.response_counts: Dict[str, int] = {}
+        self.samples: Dict[str, List[str]] = {}
+        self.lengths: np.ndarray = np.empty(0, dtype=np.int64)  # whitespace-separated words per comment
+        self.phrase_sketches: Dict[int, SpaceSaving] = {
+            size: SpaceSaving(PHRASE_SKETCH_CAPACITY) for size in PHRASE_SIZES
+        }
+
+    @property
+    def total_texts(self) -> int:
+        return len(self.lengths)
+
+    def top_words(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Word frequency list in the {"word", "count"} format used by the charts"""
+        return [{"word": word, "count": count} for word, count in self.word_counts.most_common(limit)]
+
+    def top_phrases(self, size: int, limit: Optional[int] = None, min_count: int = 1) -> List[Dict[str, Any]]:
+        """Most frequent phrases of the given length as {"phrase", "count"} (counts are sketch estimates)"""
+        return [
+            {"phrase": phrase, "count": count}
+            for phrase, count, _ in self.phrase_sketches[size].top(limit)
+            if count >= min_count
+        ]
+
+
+@lru_cache(maxsize=None)
+def word_pattern(min_length: int = 3) -> re.Pattern:
+    """Compiled word regex (letters only, minimum length), built once per length"""
+    return re.compile(r'\b[a-zA-Z]{' + str(min_length) + r',}\b')
+
+
+def _chunks(texts: List[str], size: int = CHUNK_SIZE) -> Iterator[List[str]]:
+    for start in range(0, len(texts), size):
+        yield texts[start:start + size]
+
+
+def _remove_stop_words(counts: Counter) -> Counter:
+    for word in STOP_WORDS.intersection(counts):
+        del counts[word]
+    return counts
+
+
+def count_words(texts: Iterable[Any], min_length: int = 3) -> Counter:
+    """
+    Counts words (lowercased, letters only, at least min_length long) across texts,
+    excluding stop words. Non-string values are ignored.
+    """
+    pattern = word_pattern(min_length)
+    counts: Counter = Counter()
+    for chunk in _chunks([text for text in texts if isinstance(text, str)]):
+        counts.update(pattern.findall('\n'.join(chunk).lower()))
+    return _remove_stop_words(counts)
+
+
+def count_phrases(lowered_text: str, sizes: Sequence[int] = PHRASE_SIZES) -> Dict[int, Counter]:
+    """
+    Counts n-grams of the given sizes in already-lowercased text.
+    N-grams stay within a clause and must not start or end with a stop word.
+    """
+    counters = {size: Counter() for size in sizes}
+    for clause in _CLAUSE_SPLIT.split(lowered_text):
+        tokens = _PHRASE_TOKEN.findall(clause)
+        for size in sizes:
+            if len(tokens) >= size:
+                counters[size].update(
+                    ' '.join(gram) for gram in zip(*(tokens[i:] for i in range(size)))
+                    if gram[0] not in PHRASE_EDGE_STOP_WORDS and gram[-1] not in PHRASE_EDGE_STOP_WORDS
+                )
+    return counters
+
+
+def iter_column_texts(series: pd.Series) -> List[Any]:
+    """Returns the analyzable comments of a column (nulls and placeholders removed)"""
+    return [text for text in series.dropna().tolist() if text not in PLACEHOLDER_TEXTS]
+
+
+def analyze_text_columns(df: pd.DataFrame, columns: Optional[List[str]] = None,
+                         min_length: int = 3, sample_size: int = 3) -> TextStats:
+    """
+    Tokenizes the given text columns in a single pass.
+    Produces overall and per-column word counts, bigram/trigram sketches, per-comment
+    lengths, per-column response counts and the first `sample_size` comments of each column.
+    Phrase counts are exact per chunk and folded into fixed-size Space-Saving sketches.
+    """
+    pattern = word_pattern(min_length)
+    stats = TextStats()
+    lengths: List[int] = []
+
+    for col in columns if columns is not None else [c for c in TEXT_COLUMNS if c in df.columns]:
+        texts = [text if isinstance(text, str) else str(text) for text in iter_column_texts(df[col])]
+        column_counts: Counter = Counter()
+
+        for chunk in _chunks(texts):
+            lowered = '\n'.join(chunk).lower()
+            column_counts.update(pattern.findall(lowered))
+            lengths.extend(len(text.split()) for text in chunk)
+            for size, phrase_counts in count_phrases(lowered).items():
+                stats.phrase_sketches[size].update_counts(phrase_counts)
+
+        _remove_stop_words(column_counts)
+        stats.word_counts.update(column_counts)
+        stats.column_word_counts[col] = column_counts
+        stats.response_counts[col] = len(texts)
+        stats.samples[col] = texts[:sample_size]
+
+    stats.lengths = np.asarray(lengths, dtype=np.int64)
+    return stats
+
+
+def get_text_stats(data: List[Dict[str, Any]], columns: Optional[List[str]] = None,
+                   min_length: int = 3) -> TextStats:
+    """Returns analyze_text_columns for a dataset, computed once and cached on it"""
+    dataset = as_dataset(data)
+    df = dataset.frame
+    columns = columns if columns is not None else [c for c in TEXT_COLUMNS if c in df.columns]
+    cache_key = ('text_stats', tuple(columns), min_length)
+    if cache_key not in dataset.cache:
+        dataset.cache[cache_key] = analyze_text_columns(df, columns, min_length)
+    return dataset.cache[cache_key]
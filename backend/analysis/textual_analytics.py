@@ -2,59 +2,127 @@
 Text analysis and NLP for feedback comments.
 
 Functions:
-- generate_one_word_descriptions: Analyzes one-word descriptions for WordCloud visualization
-- generate_text_insights: Analyzes text feedback for common themes and sentiment
+- generate_one_word_descriptions: Analyzes normalized one-word descriptions for WordCloud visualization
+- generate_text_insights: Analyzes text feedback for common themes, key phrases, near-duplicates and sentiment
+- generate_lexicon_sentiment: Scores every comment with the offline lexicon sentiment model
 - extract_common_words: Extract common words from text feedback (helper)
+- score_sentiment: Vectorized lexicon-and-rules sentiment scores for a list of texts (helper)
+- summarize_sentiment_scores: Label counts/percentages and mean score for sentiment scores (helper)
 """
 
+import re
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
-from collections import Counter
-import re
+from typing import Dict, Any, List, NamedTuple
+
+from backend.processing.dataset import as_dataset
+from .text_processing import TEXT_COLUMNS, PLACEHOLDER_TEXTS, count_words, get_text_stats
+from .near_duplicates import find_near_duplicates, get_near_duplicates
+from .word_normalization import count_normalized_words
+
+# --- Offline sentiment lexicon (VADER-style valences, -4..4, tuned to event feedback) ---
+SENTIMENT_LEXICON = {
+    # Positive
+    'amazing': 3.1, 'awesome': 3.1, 'excellent': 3.2, 'fantastic': 3.3, 'outstanding': 3.3,
+    'perfect': 3.0, 'best': 3.0, 'brilliant': 3.0, 'superb': 3.1, 'wonderful': 3.1,
+    'great': 2.6, 'love': 3.0, 'loved': 2.9, 'enjoyed': 2.3, 'enjoy': 2.2, 'enjoyable': 2.4,
+    'good': 1.9, 'nice': 1.8, 'fun': 2.3, 'helpful': 2.0, 'useful': 1.9, 'valuable': 2.1,
+    'informative': 2.0, 'insightful': 2.2, 'engaging': 2.2, 'interesting': 1.7, 'inspiring': 2.6,
+    'practical': 1.5, 'clear': 1.4, 'organized': 1.6, 'friendly': 2.0, 'comfortable': 1.6,
+    'knowledgeable': 1.9, 'recommend': 1.5, 'thanks': 1.9, 'thank': 1.5, 'happy': 2.7,
+    'glad': 2.0, 'impressive': 2.4, 'impressed': 2.3, 'smooth': 1.5, 'relevant': 1.2,
+    'easy': 1.4, 'worth': 1.4, 'well': 1.1, 'satisfied': 1.8, 'exciting': 2.2, 'excited': 2.1,
+    # Negative
+    'bad': -2.5, 'terrible': -3.1, 'awful': -3.1, 'horrible': -3.2, 'worst': -3.1,
+    'poor': -2.1, 'boring': -2.2, 'bored': -2.0, 'disappointing': -2.4, 'disappointed': -2.3,
+    'waste': -2.2, 'useless': -2.4, 'hate': -2.9, 'annoying': -2.1, 'frustrating': -2.3,
+    'confusing': -1.8, 'confused': -1.6, 'disorganized': -2.0, 'unclear': -1.4, 'messy': -1.7,
+    'slow': -1.2, 'rushed': -1.4, 'late': -1.2, 'delayed': -1.4, 'crowded': -1.4, 'cramped': -1.6,
+    'noisy': -1.5, 'loud': -0.9, 'uncomfortable': -1.8, 'cold': -0.9, 'hot': -0.7,
+    'expensive': -1.3, 'difficult': -1.3, 'hard': -0.8, 'basic': -0.9, 'lacking': -1.6,
+    'lack': -1.3, 'issue': -1.1, 'issues': -1.1, 'problem': -1.4, 'problems': -1.4,
+    'broken': -1.9, 'unprofessional': -2.2, 'irrelevant': -1.6, 'repetitive': -1.4,
+    'long': -0.4, 'dull': -1.8, 'tedious': -1.9, 'unfortunately': -1.5, 'sadly': -1.6,
+}
+SENTIMENT_NEGATORS = frozenset({
+    'not', 'no', 'never', 'none', 'nothing', 'nobody', 'neither', 'nor', 'without', 'hardly',
+    'barely', 'cannot', 'cant', 'dont', 'didnt', 'wasnt', 'isnt', 'arent', 'werent', 'wont', 'couldnt'
+})
+SENTIMENT_BOOSTERS = frozenset({
+    'very', 'really', 'extremely', 'so', 'super', 'incredibly', 'absolutely', 'truly',
+    'highly', 'totally', 'especially', 'quite', 'too'
+})
+
+_NEGATION_SCALAR = -0.74       # flips and dampens valence after a negator (within 3 tokens)
+_BOOSTER_INCREMENT = 0.293     # magnitude added by a preceding booster word
+_EXCLAMATION_INCREMENT = 0.292 # per "!" (up to 4), added in the direction of the sentiment
+_BUT_BEFORE, _BUT_AFTER = 0.5, 1.5  # "good talk but terrible sound": the clause after "but" dominates
+_NORMALIZATION_ALPHA = 15.0
+POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD = 0.05, -0.05
+AMBIGUOUS_THRESHOLD = 0.35     # |compound| below this (or mixed polarity) is worth a closer AI read
+
+# Comments are joined with a record separator so one regex call tokenizes a whole batch;
+# clause punctuation is kept as tokens so negation does not cross sentence boundaries
+_RECORD_SEPARATOR = '\x1e'
+_CLAUSE_PUNCTUATION = frozenset({'.', '!', '?', ';', ','})
+_SENTIMENT_TOKEN = re.compile(r"\x1e|[.!?;,]|[a-z]+(?:'[a-z]+)?")
+
+
+class SentimentScores(NamedTuple):
+    compound: np.ndarray   # normalized score in [-1, 1] per comment
+    labels: np.ndarray     # 'positive' / 'neutral' / 'negative' per comment
+    ambiguous: np.ndarray  # weak or mixed-polarity comments
 
 
-def generate_one_word_descriptions(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def generate_one_word_descriptions(data: List[Dict[str, Any]], stem: bool = True,
+                                   fold_spelling: bool = True) -> Dict[str, Any]:
     """
     Analyzes one-word descriptions from feedback data.
+    Variants ("Amazing", "amazing!!", "Amazingg") are normalized into one entry.
     Prepares data for WordCloud visualization.
     """
-    df = pd.DataFrame(data)
+    dataset = as_dataset(data)
+    df = dataset.frame
     
     if 'one_word_desc' not in df.columns:
         return {"error": "No one-word description data found"}
     
-    # Extract and clean one-word descriptions
-    descriptions = df['one_word_desc'].dropna()
-    descriptions = descriptions[descriptions != '']
-    descriptions = descriptions[descriptions != 'No comment']
+    # Normalized counts are computed once per dataset (normalization tables are shared process-wide)
+    cache_key = ('one_word_counts', stem, fold_spelling)
+    if cache_key not in dataset.cache:
+        dataset.cache[cache_key] = count_normalized_words(df['one_word_desc'], stem, fold_spelling)
+    normalized = dataset.cache[cache_key]
     
-    if descriptions.empty:
+    if normalized is None:
         return {"error": "No valid one-word descriptions found"}
     
-    # Count occurrences and prepare for WordCloud
-    description_counts = Counter(descriptions.str.strip().str.title())
+    description_counts = list(zip(normalized.labels, normalized.counts.tolist()))
     
     # Format for WordCloud component (Carbon Charts format)
     word_cloud_data = [
         {"word": word, "count": count}
-        for word, count in description_counts.most_common()
+        for word, count in description_counts
     ]
     
     # Calculate statistics
-    total_descriptions = len(descriptions)
+    total_descriptions = int(normalized.counts.sum())
     unique_descriptions = len(description_counts)
     
     return {
         "chart_type": "one_word_descriptions",
         "data": {
             "word_cloud": word_cloud_data,
-            "top_descriptions": description_counts.most_common(10),
+            "top_descriptions": description_counts[:10],
             "stats": {
                 "total_responses": total_descriptions,
                 "unique_words": unique_descriptions,
-                "most_common": description_counts.most_common(1)[0] if description_counts else None,
+                "most_common": description_counts[0] if description_counts else None,
                 "response_rate": round((total_descriptions / len(df)) * 100, 1)
+            },
+            "normalization": {
+                "merged_variants": normalized.variants,
+                "spell_folded_responses": normalized.spell_folded,
+                "stemming": stem
             }
         }
     }
@@ -63,77 +131,216 @@ def generate_one_word_descriptions(data: List[Dict[str, Any]]) -> Dict[str, Any]
 def generate_text_insights(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Analyzes text feedback for common themes and sentiment.
-    Prepares word frequency and theme data.
+    Prepares word frequency and theme data from a single tokenization pass.
     """
-    df = pd.DataFrame(data)
+    df = as_dataset(data).frame
     
-    text_columns = ['positive_feedback', 'improvement_feedback', 'additional_comments']
-    available_text = [col for col in text_columns if col in df.columns]
+    available_text = [col for col in TEXT_COLUMNS if col in df.columns]
     
     if not available_text:
         return {"error": "No text feedback found"}
     
-    # Combine all text feedback
-    all_feedback = []
-    feedback_by_type = {}
-    
-    for col in available_text:
-        texts = df[col].dropna()
-        # Filter out placeholder text
-        texts = texts[texts != 'No comment provided']
-        texts = texts[texts != 'No comment']
-        
-        feedback_by_type[col] = texts.tolist()
-        all_feedback.extend(texts.tolist())
-    
-    # Simple word frequency analysis (you might want to add more sophisticated NLP)
-    common_words = extract_common_words(all_feedback)
+    # One pass over all text columns: word counts, lengths and per-column counts together
+    text_stats = get_text_stats(data, available_text)
+    duplicates = get_near_duplicates(data, available_text)
     
     return {
         "chart_type": "text_insights",
         "data": {
             "feedback_counts": {
-                col.replace('_', ' ').title(): len(texts) 
-                for col, texts in feedback_by_type.items()
+                col.replace('_', ' ').title(): count 
+                for col, count in text_stats.response_counts.items()
             },
             
             # Word cloud data
-            "word_frequency": common_words[:20],  # Top 20 words
+            "word_frequency": text_stats.top_words(20),  # Top 20 words
+            # Same, counting each near-duplicate cluster (copy-pasted/templated answers) once
+            "word_frequency_deduplicated": extract_common_words(duplicates.representatives())[:20],
             
-            # Sample comments for display
-            "sample_feedback": {
-                col: texts[:3] if len(texts) > 0 else []
-                for col, texts in feedback_by_type.items()
+            # Near-identical comments grouped with MinHash/LSH
+            "near_duplicates": {
+                "clusters": duplicates.top_clusters(10),
+                "distinct_comments": duplicates.cluster_count,
+                "duplicate_comments": duplicates.duplicate_count
+            },
+            
+            # Key phrases ("more food" vs "food") from bounded-memory heavy-hitter sketches
+            "key_phrases": {
+                "bigrams": text_stats.top_phrases(2, limit=15, min_count=2),
+                "trigrams": text_stats.top_phrases(3, limit=15, min_count=2),
+                "approximate": not all(sketch.is_exact for sketch in text_stats.phrase_sketches.values())
             },
             
+            # Sample comments for display
+            "sample_feedback": text_stats.samples,
+            
             "stats": {
-                "total_text_responses": len(all_feedback),
-                "avg_response_length": np.mean([len(text.split()) for text in all_feedback]) if all_feedback else 0
+                "total_text_responses": text_stats.total_texts,
+                "avg_response_length": np.mean(text_stats.lengths) if text_stats.total_texts else 0
             }
         }
     }
 
 
-def extract_common_words(texts: List[str], min_length: int = 3) -> List[Dict[str, Any]]:
-    """Extract common words from text feedback (simple implementation)"""
-    # Simple word extraction - you might want to use NLTK or spaCy for production
-    
-    # Common stop words to exclude
-    stop_words = {
-        'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 
-        'by', 'a', 'an', 'is', 'was', 'are', 'were', 'be', 'been', 'have', 
-        'has', 'had', 'do', 'did', 'will', 'would', 'could', 'should', 'it',
-        'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'we', 'they'
+def score_sentiment(texts: List[str]) -> SentimentScores:
+    """
+    Vectorized lexicon-and-rules sentiment scoring (VADER-style).
+    All comments are tokenized into one flat array and factorized; negation, boosters
+    and the "but" rule are applied with shifted array masks and summed per comment with bincount.
+    """
+    n_texts = len(texts)
+    if n_texts == 0:
+        empty = np.empty(0)
+        return SentimentScores(empty, empty.astype(object), empty.astype(bool))
+
+    cleaned = [str(text).replace(_RECORD_SEPARATOR, ' ').replace('\u2019', "'") for text in texts]
+    tokens = _SENTIMENT_TOKEN.findall(_RECORD_SEPARATOR.join(cleaned).lower())
+
+    # Factorize once; every per-token flag is a lookup on the (small) vocabulary
+    token_codes, vocabulary = pd.factorize(pd.Series(tokens, dtype=object), sort=False)
+    vocabulary = list(vocabulary)
+    normalized = [token.replace("'", '') for token in vocabulary]
+    vocab_separator = np.array([token == _RECORD_SEPARATOR for token in vocabulary], dtype=bool)
+    vocab_boundary = np.array([token == _RECORD_SEPARATOR or token in _CLAUSE_PUNCTUATION for token in vocabulary], dtype=bool)
+    vocab_valence = np.array([SENTIMENT_LEXICON.get(word, 0.0) for word in normalized], dtype=float)
+    vocab_negator = np.array([token.endswith("n't") or word in SENTIMENT_NEGATORS
+                              for token, word in zip(vocabulary, normalized)], dtype=bool)
+    vocab_booster = np.array([word in SENTIMENT_BOOSTERS for word in normalized], dtype=bool)
+    vocab_but = np.array([word == 'but' for word in normalized], dtype=bool)
+
+    # Comment id and clause id per token, then drop the boundary tokens
+    is_separator = vocab_separator[token_codes] if len(tokens) else np.zeros(0, dtype=bool)
+    is_boundary = vocab_boundary[token_codes] if len(tokens) else np.zeros(0, dtype=bool)
+    doc_ids = np.cumsum(is_separator)[~is_boundary]
+    clause_ids = np.cumsum(is_boundary)[~is_boundary]
+    word_codes = token_codes[~is_boundary]
+
+    valence = vocab_valence[word_codes]
+    is_negator = vocab_negator[word_codes]
+    is_booster = vocab_booster[word_codes]
+    is_but = vocab_but[word_codes]
+    n_words = len(word_codes)
+
+    # Negators / boosters affect the next few tokens of the same clause
+    negated = np.zeros(n_words, dtype=bool)
+    for shift in (1, 2, 3):
+        if n_words > shift:
+            negated[shift:] |= is_negator[:-shift] & (clause_ids[shift:] == clause_ids[:-shift])
+    boosted = np.zeros(n_words, dtype=bool)
+    if n_words > 1:
+        boosted[1:] = is_booster[:-1] & (clause_ids[1:] == clause_ids[:-1])
+
+    valence = valence + np.sign(valence) * _BOOSTER_INCREMENT * boosted
+    valence = np.where(negated, valence * _NEGATION_SCALAR, valence)
+
+    # "but" rule: down-weight the text before the first "but", up-weight the text after
+    but_so_far = np.cumsum(is_but)
+    doc_start = np.searchsorted(doc_ids, doc_ids, side='left')
+    but_before_doc = np.where(doc_start > 0, but_so_far[np.maximum(doc_start - 1, 0)], 0)
+    after_but = (but_so_far - but_before_doc) > 0
+    has_but = np.bincount(doc_ids, weights=is_but, minlength=n_texts) > 0
+    weights = np.where(after_but, _BUT_AFTER, np.where(has_but[doc_ids], _BUT_BEFORE, 1.0))
+
+    raw = np.bincount(doc_ids, weights=valence * weights, minlength=n_texts)
+    positive_hits = np.bincount(doc_ids, weights=valence > 0, minlength=n_texts)
+    negative_hits = np.bincount(doc_ids, weights=valence < 0, minlength=n_texts)
+
+    # Exclamation marks amplify whatever sentiment is present
+    exclamations = np.minimum(np.fromiter((text.count('!') for text in cleaned), dtype=float, count=n_texts), 4)
+    raw = raw + np.sign(raw) * exclamations * _EXCLAMATION_INCREMENT
+
+    compound = raw / np.sqrt(raw * raw + _NORMALIZATION_ALPHA)
+    labels = np.where(compound >= POSITIVE_THRESHOLD, 'positive',
+                      np.where(compound <= NEGATIVE_THRESHOLD, 'negative', 'neutral')).astype(object)
+    ambiguous = (np.abs(compound) < AMBIGUOUS_THRESHOLD) | ((positive_hits > 0) & (negative_hits > 0))
+
+    return SentimentScores(compound, labels, ambiguous)
+
+
+def summarize_sentiment_scores(scores: SentimentScores) -> Dict[str, Any]:
+    """Counts and percentages per label plus the mean compound score"""
+    total = len(scores.compound)
+    counts = {label: int(np.count_nonzero(scores.labels == label)) for label in ('positive', 'neutral', 'negative')}
+    return {
+        "counts": counts,
+        "percentages": {label: round(count / total * 100, 1) if total else 0 for label, count in counts.items()},
+        "average_score": round(float(scores.compound.mean()), 3) if total else 0,
+        "ambiguous_count": int(scores.ambiguous.sum()),
+        "total": total
     }
+
+
+def generate_lexicon_sentiment(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Scores every text comment with the offline lexicon sentiment model.
+    Returns per-comment scores, the overall and per-column distribution, and
+    the most positive/negative comments. Ambiguous comments are flagged so the
+    Gemini path can focus on them.
+    """
+    dataset = as_dataset(data)
+    df = dataset.frame
+    
+    available_text = [col for col in TEXT_COLUMNS if col in df.columns]
+    if not available_text:
+        return {"error": "No text feedback found"}
+    
+    # Collect comments with their respondent row and column
+    texts, rows, columns = [], [], []
+    for col in available_text:
+        series = df[col]
+        valid = series.notna() & ~series.isin(list(PLACEHOLDER_TEXTS))
+        texts.extend(str(text) for text in series[valid].tolist())
+        rows.extend(np.flatnonzero(valid.to_numpy()).tolist())
+        columns.extend([col] * int(valid.sum()))
     
-    all_words = []
-    for text in texts:
-        if isinstance(text, str):
-            # Extract words (letters only, minimum length)
-            words = re.findall(r'\b[a-zA-Z]{' + str(min_length) + r',}\b', text.lower())
-            all_words.extend([word for word in words if word not in stop_words])
+    if not texts:
+        return {"error": "No text feedback found"}
+    
+    scores = score_sentiment(texts)
+    dataset.cache['lexicon_sentiment'] = scores
+    columns_array = np.asarray(columns, dtype=object)
+    
+    by_column = {}
+    for col in available_text:
+        mask = columns_array == col
+        by_column[col] = summarize_sentiment_scores(
+            SentimentScores(scores.compound[mask], scores.labels[mask], scores.ambiguous[mask])
+        )
     
-    word_counts = Counter(all_words)
+    order = np.argsort(scores.compound, kind='stable')
+    def _examples(indices):
+        return [
+            {"text": texts[i], "column": columns[i], "score": round(float(scores.compound[i]), 3)}
+            for i in indices
+        ]
+    
+    return {
+        "chart_type": "lexicon_sentiment",
+        "data": {
+            "distribution": summarize_sentiment_scores(scores),
+            "by_column": by_column,
+            "most_positive": _examples(order[::-1][:3]),
+            "most_negative": _examples(order[:3]),
+            
+            # Per-comment scores (row = respondent index in the uploaded data)
+            "comment_scores": [
+                {"row": int(row), "column": col, "score": round(float(score), 3), "label": label, "ambiguous": bool(amb)}
+                for row, col, score, label, amb in zip(rows, columns, scores.compound, scores.labels, scores.ambiguous)
+            ],
+            "method": "lexicon"
+        }
+    }
+
+
+def extract_common_words(texts: List[str], min_length: int = 3,
+                         deduplicate: bool = False) -> List[Dict[str, Any]]:
+    """
+    Extract common words from text feedback using the precompiled tokenizer.
+    With `deduplicate`, near-duplicate comments are counted once (cluster representative).
+    """
+    if deduplicate:
+        texts = find_near_duplicates([text for text in texts if isinstance(text, str)]).representatives()
+    word_counts = count_words(texts, min_length)
     return [
         {"word": word, "count": count}
         for word, count in word_counts.most_common()
@@ -0,0 +1,202 @@
+"""
+Offline theme clustering over all feedback comments.
+
+Pipeline (CPU only, no Gemini call): the terms of every comment (from the comment
+search index) are hashed into a fixed number of buckets, weighted with TF-IDF and
+reduced to a small dense space by a seeded random projection. Mini-batch k-means on
+the unit-normalized vectors groups comments into themes, which are labelled with
+their most distinctive terms and illustrated by the comments closest to the centroid.
+
+Functions:
+- hashed_tfidf_entries: Hashing-vectorizer view (comment, bucket, weight) of the comment index
+- project_comments: Random projection of hashed TF-IDF vectors to a dense, unit-normalized matrix
+- minibatch_kmeans: Seeded mini-batch k-means (k-means++ initialisation) on unit vectors
+- generate_theme_clusters: Themes section with sizes, labels and example quotes
+"""
+
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from backend.processing.dataset import as_dataset
+from .comment_search import get_comment_index
+from .text_processing import STOP_WORDS
+
+HASH_BUCKETS = 1 << 18
+PROJECTION_DIMENSIONS = 64
+MAX_THEMES = 8
+MIN_COMMENTS = 10
+BATCH_SIZE = 1024
+MAX_ITERATIONS = 100
+SEED = 42
+
+
+def hashed_tfidf_entries(index) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (comment, term, bucket, weight) per non-zero entry of the comment-term matrix.
+    Stop words, numbers and terms shorter than 3 letters are skipped; terms are hashed
+    (CRC32 mod HASH_BUCKETS) once per vocabulary entry, not per occurrence. Weights are
+    sublinear TF-IDF, L2-normalized per comment.
+    """
+    n_comments = len(index)
+    vocabulary = index.vocabulary
+    term_of_entry = np.repeat(np.arange(len(vocabulary)), np.diff(index.term_ptr))
+
+    usable = np.array([len(term) >= 3 and term.isalpha() and term not in STOP_WORDS for term in vocabulary],
+                      dtype=bool)
+    keep = usable[term_of_entry] if len(term_of_entry) else np.zeros(0, dtype=bool)
+    comments, terms = index.comment_ids[keep], term_of_entry[keep]
+
+    doc_freq = np.diff(index.term_ptr)
+    idf = np.log((1 + n_comments) / (1 + doc_freq)) + 1
+    weights = (1 + np.log(index.term_freqs[keep])) * idf[terms]
+    norms = np.sqrt(np.bincount(comments, weights=weights * weights, minlength=n_comments))
+    weights = weights / np.where(norms > 0, norms, 1)[comments]
+
+    buckets = np.fromiter((zlib.crc32(term.encode('utf-8')) % HASH_BUCKETS for term in vocabulary),
+                          dtype=np.int64, count=len(vocabulary))
+    return comments, terms, buckets[terms] if len(terms) else terms, weights
+
+
+def project_comments(comments: np.ndarray, buckets: np.ndarray, weights: np.ndarray, n_comments: int,
+                     dimensions: int = PROJECTION_DIMENSIONS, seed: int = SEED) -> np.ndarray:
+    """
+    Gaussian random projection of the sparse hashed vectors (only used buckets get a
+    projection row), returned unit-normalized so dot products are cosine similarities.
+    """
+    used, bucket_codes = np.unique(buckets, return_inverse=True)
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((len(used), dimensions)) / np.sqrt(dimensions)
+
+    dense = np.empty((n_comments, dimensions))
+    for j in range(dimensions):
+        dense[:, j] = np.bincount(comments, weights=weights * projection[bucket_codes.ravel(), j],
+                                  minlength=n_comments)
+
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    return dense / np.where(norms > 0, norms, 1)
+
+
+def _kmeans_plus_plus(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centers = [points[rng.integers(len(points))]]
+    closest = np.full(len(points), np.inf)
+    for _ in range(1, k):
+        distance = 2 - 2 * points @ centers[-1]  # squared distance between unit vectors
+        closest = np.minimum(closest, np.maximum(distance, 0))
+        total = closest.sum()
+        choice = rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        centers.append(points[choice])
+    return np.array(centers)
+
+
+def minibatch_kmeans(points: np.ndarray, k: int, batch_size: int = BATCH_SIZE,
+                     max_iterations: int = MAX_ITERATIONS, seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical mini-batch k-means (per-center learning rate 1 / assignments so far) on unit vectors.
+    Returns (centers, labels) with labels from a final full assignment pass.
+    """
+    rng = np.random.default_rng(seed)
+    sample = points[rng.choice(len(points), size=min(len(points), 10 * batch_size), replace=False)]
+    centers = _kmeans_plus_plus(sample, k, rng)
+    counts = np.zeros(k)
+
+    for _ in range(max_iterations):
+        batch = points[rng.integers(len(points), size=min(batch_size, len(points)))]
+        nearest = np.argmax(batch @ centers.T, axis=1)
+        previous = centers.copy()
+
+        batch_counts = np.bincount(nearest, minlength=k)
+        counts += batch_counts
+        for center in np.flatnonzero(batch_counts):
+            # Equivalent to one gradient step per point with rate 1 / count
+            batch_sum = batch[nearest == center].sum(axis=0)
+            rate = batch_counts[center] / counts[center]
+            centers[center] = (1 - rate) * centers[center] + rate * batch_sum / batch_counts[center]
+        # Spherical k-means: keep centers on the unit sphere so argmax(dot) is nearest by cosine
+        centers /= np.maximum(np.linalg.norm(centers, axis=1, keepdims=True), 1e-12)
+
+        if np.abs(centers - previous).max() < 1e-4:
+            break
+
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), 65536):
+        labels[start:start + 65536] = np.argmax(points[start:start + 65536] @ centers.T, axis=1)
+    return centers, labels
+
+
+def _theme_terms(entry_clusters: np.ndarray, terms: np.ndarray, weights: np.ndarray,
+                 sizes: np.ndarray, n_terms: int, limit: int = 5) -> List[np.ndarray]:
+    """Top terms per cluster: mean weight in the cluster minus mean weight overall"""
+    k = len(sizes)
+    cluster_weights = np.bincount(entry_clusters * n_terms + terms, weights=weights,
+                                  minlength=k * n_terms).reshape(k, n_terms)
+    overall = cluster_weights.sum(axis=0) / max(1, sizes.sum())
+    distinctive = cluster_weights / np.maximum(sizes, 1)[:, None] - overall
+    return [np.argsort(-distinctive[cluster], kind='stable')[:limit] for cluster in range(k)]
+
+
+def generate_theme_clusters(data: List[Dict[str, Any]], n_themes: Optional[int] = None,
+                            examples: int = 3) -> Dict[str, Any]:
+    """
+    Clusters every comment into themes without any API call.
+    Returns themes with size, share, top-term label, per-column counts and example quotes.
+    """
+    dataset = as_dataset(data)
+    index = get_comment_index(dataset)
+    if len(index) < MIN_COMMENTS:
+        return {"error": f"At least {MIN_COMMENTS} comments are needed for theme clustering"}
+
+    comments, terms, buckets, weights = hashed_tfidf_entries(index)
+    # Comments with no usable terms ("ok", "N/A") cannot join a theme
+    has_terms = np.bincount(comments, minlength=len(index)) > 0
+    points_all = project_comments(comments, buckets, weights, len(index))
+    clustered = np.flatnonzero(has_terms)
+    if len(clustered) < MIN_COMMENTS:
+        return {"error": "Not enough comment text for theme clustering"}
+
+    k = n_themes or int(np.clip(round(np.sqrt(len(clustered) / 2)), 2, MAX_THEMES))
+    k = min(k, len(clustered))
+    centers, cluster_labels = minibatch_kmeans(points_all[clustered], k)
+
+    # Every matrix entry belongs to a clustered comment (it has at least one usable term)
+    sizes = np.bincount(cluster_labels, minlength=k)
+    entry_clusters = cluster_labels[np.searchsorted(clustered, comments)]
+    top_terms = _theme_terms(entry_clusters, terms, weights, sizes, len(index.vocabulary))
+
+    similarity = np.einsum('ij,ij->i', points_all[clustered], centers[cluster_labels])
+    themes = []
+    for cluster in np.argsort(-sizes, kind='stable'):
+        if sizes[cluster] == 0:
+            continue
+        members = clustered[cluster_labels == cluster]
+        closest = members[np.argsort(-similarity[cluster_labels == cluster], kind='stable')]
+        quotes = list(dict.fromkeys(index.texts[i] for i in closest[:examples * 3]))[:examples]
+        column_counts = np.bincount(index.columns[members], minlength=len(index.column_names))
+        label_terms = [str(index.vocabulary[term]) for term in top_terms[cluster]]
+
+        themes.append({
+            "theme_id": int(len(themes)),
+            "label": " / ".join(label_terms[:3]),
+            "top_terms": label_terms,
+            "size": int(sizes[cluster]),
+            "percentage": round(sizes[cluster] / len(clustered) * 100, 1),
+            "columns": {
+                name: int(count) for name, count in zip(index.column_names, column_counts) if count
+            },
+            "examples": quotes
+        })
+
+    return {
+        "chart_type": "theme_clusters",
+        "data": {
+            "themes": themes,
+            "total_comments": int(len(index)),
+            "clustered_comments": int(len(clustered)),
+            "method": {
+                "vectorizer": f"hashing ({HASH_BUCKETS} buckets, tf-idf)",
+                "reduction": f"random projection ({PROJECTION_DIMENSIONS} dims)",
+                "clustering": f"mini-batch k-means (k={k})"
+            }
+        }
+    }
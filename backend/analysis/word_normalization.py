@@ -0,0 +1,198 @@
+"""
+Normalization of one-word descriptions ("Amazing", "amazing!!", "Amazingg", "AMAZING ").
+
+Every distinct raw answer goes through punctuation stripping, case folding and
+letter-run squeezing (memoized process-wide, so repeated uploads reuse the table),
+an optional spell-fold onto frequent answers within one edit, and a lightweight
+suffix stemmer. Answers sharing a stem are counted together and displayed with
+their most frequent spelling. Counting runs on the categorical codes of the
+column, so per-row work is a bincount.
+
+Functions:
+- normalize_word: Memoized punctuation/case/letter-run cleanup of one raw answer
+- stem_word: Memoized lightweight suffix stemmer
+- spell_fold: Maps rare words onto frequent words within one edit
+- count_normalized_words: Normalized counts, display labels and merged variants for a column
+- normalized_word_counts: Responses per normalized spelling of a column (mergeable across datasets)
+- fold_word_counts: Spell-folded, stemmed counts per display label from normalized spelling counts
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .grouped_stats import encode_groups
+
+# Answers that mean "no answer"
+EMPTY_ANSWERS = frozenset({'', 'no comment', 'n/a', 'na', 'none', '-'})
+
+# Suffixes removed by the stemmer, longest first; stems keep at least MIN_STEM_LENGTH letters
+STEM_SUFFIXES = ('ingly', 'edly', 'fully', 'ness', 'ing', 'ful', 'ed', 'ly', 'es', 's')
+MIN_STEM_LENGTH = 4
+
+# Words shorter than this are never spell-folded ("good" must not become "food")
+MIN_SPELL_FOLD_LENGTH = 5
+# A word must be this many times rarer than its correction to be folded onto it
+SPELL_FOLD_RATIO = 3
+
+_EDGE_PUNCTUATION = re.compile(r"^[\W_]+|[\W_]+$")
+_INNER_SPACES = re.compile(r'\s+')
+_LETTER_RUNS = re.compile(r'([a-z])\1{2,}')
+_ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+class NormalizedCounts(NamedTuple):
+    labels: List[str]                 # display label per normalized word, most frequent first
+    counts: np.ndarray                # responses per label
+    variants: Dict[str, List[str]]    # label -> distinct raw answers merged into it (only merges)
+    spell_folded: int                 # responses whose answer was spell-folded
+
+
+@lru_cache(maxsize=65536)
+def normalize_word(raw: str) -> str:
+    """Strips surrounding punctuation/whitespace, case-folds and squeezes runs of 3+ letters to one"""
+    word = _EDGE_PUNCTUATION.sub('', _INNER_SPACES.sub(' ', raw.strip().casefold()))
+    return _LETTER_RUNS.sub(r'\1', word)
+
+
+@lru_cache(maxsize=65536)
+def stem_word(word: str) -> str:
+    """Removes one common suffix (and a trailing e) so inflections share a key: inspired/inspiring -> inspir"""
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith('e') and len(word) > MIN_STEM_LENGTH:
+        word = word[:-1]
+    # Doubled final consonant from inflection: "planned" -> "plann" -> "plan"
+    if len(word) > MIN_STEM_LENGTH and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        word = word[:-1]
+    return word
+
+
+def _edits(word: str) -> set:
+    """All strings one deletion, transposition, substitution or insertion away"""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = {left + right[1:] for left, right in splits if right}
+    transposes = {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+    replaces = {left + c + right[1:] for left, right in splits if right for c in _ALPHABET}
+    inserts = {left + c + right for left, right in splits for c in _ALPHABET}
+    return deletes | transposes | replaces | inserts
+
+
+def spell_fold(word_counts: Dict[str, int]) -> Dict[str, str]:
+    """
+    Maps each rare word to the most frequent word one edit away, if that word is at
+    least SPELL_FOLD_RATIO times more common ("amazingg" -> "amazing"). Runs on the
+    distinct words only.
+    """
+    folds = {}
+    for word, count in word_counts.items():
+        if len(word) < MIN_SPELL_FOLD_LENGTH or not word.isalpha():
+            continue
+        candidates = [
+            (word_counts[other], other) for other in _edits(word)
+            if word_counts.get(other, 0) >= SPELL_FOLD_RATIO * count
+        ]
+        if candidates:
+            folds[word] = max(candidates)[1]
+    return folds
+
+
+def count_normalized_words(series: pd.Series, stem: bool = True,
+                           fold_spelling: bool = True) -> Optional[NormalizedCounts]:
+    """
+    Counts answers of a one-word column after normalization. Work is done once per
+    distinct raw answer; rows only contribute through their category codes.
+    Ties are ordered by first appearance. Returns None if there are no valid answers.
+    """
+    codes, raw_labels = encode_groups(series)
+    raw_labels = [str(label) for label in raw_labels]
+    normalized = [normalize_word(label) for label in raw_labels]
+
+    raw_counts = np.bincount(codes[codes >= 0], minlength=len(raw_labels))
+    valid_raw = np.array([word not in EMPTY_ANSWERS for word in normalized], dtype=bool) & (raw_counts > 0)
+    if not valid_raw.any():
+        return None
+
+    # Spell-fold on the normalized words, weighted by how many responses used them
+    word_counts: Dict[str, int] = {}
+    for word, count, valid in zip(normalized, raw_counts.tolist(), valid_raw):
+        if valid:
+            word_counts[word] = word_counts.get(word, 0) + count
+    folds = spell_fold(word_counts) if fold_spelling else {}
+    folded = [folds.get(word, word) for word in normalized]
+    keys = [stem_word(word) if stem else word for word in folded]
+
+    # Raw category code -> normalized key code (-1 for empty/missing answers)
+    key_codes, key_values = pd.factorize(pd.Series(keys, dtype=object), sort=False)
+    raw_to_key = np.where(valid_raw, key_codes, -1)
+    row_keys = np.where(codes >= 0, raw_to_key[np.maximum(codes, 0)], -1)
+    valid_rows = row_keys >= 0
+
+    n_keys = len(key_values)
+    counts = np.bincount(row_keys[valid_rows], minlength=n_keys)
+    first_row = np.full(n_keys, len(row_keys))
+    np.minimum.at(first_row, row_keys[valid_rows], np.flatnonzero(valid_rows))
+    order = [key for key in np.lexsort((first_row, -counts)) if counts[key] > 0]
+
+    # Display label: the most used normalized spelling of each key, title-cased
+    spelling_counts: Dict[int, Dict[str, int]] = {}
+    merged_raw: Dict[int, List[str]] = {}
+    for raw, word, key, count in zip(raw_labels, folded, raw_to_key.tolist(), raw_counts.tolist()):
+        if key < 0:
+            continue
+        spelling_counts.setdefault(key, {})
+        spelling_counts[key][word] = spelling_counts[key].get(word, 0) + count
+        merged_raw.setdefault(key, []).append(raw)
+
+    labels, variants = [], {}
+    for key in order:
+        spellings = spelling_counts[key]
+        label = max(spellings, key=spellings.get).title()
+        labels.append(label)
+        distinct_raw = sorted(set(raw.strip() for raw in merged_raw[key]))
+        if len(distinct_raw) > 1:
+            variants[label] = distinct_raw
+
+    folded_responses = int(sum(count for word, count in word_counts.items() if word in folds))
+    return NormalizedCounts(labels, counts[order], variants, folded_responses)
+
+
+def normalized_word_counts(series: pd.Series) -> Dict[str, int]:
+    """
+    Responses per normalized spelling (before spell-folding and stemming), empty answers
+    excluded. Counts of several datasets can be added and passed to fold_word_counts.
+    """
+    codes, raw_labels = encode_groups(series)
+    raw_counts = np.bincount(codes[codes >= 0], minlength=len(raw_labels))
+    word_counts: Dict[str, int] = {}
+    for label, count in zip(raw_labels, raw_counts.tolist()):
+        word = normalize_word(str(label))
+        if count and word not in EMPTY_ANSWERS:
+            word_counts[word] = word_counts.get(word, 0) + count
+    return word_counts
+
+
+def fold_word_counts(word_counts: Dict[str, int], stem: bool = True,
+                     fold_spelling: bool = True) -> Dict[str, int]:
+    """
+    Applies the spell-fold and stemming of count_normalized_words to normalized spelling
+    counts. Returns responses per display label (most used spelling, ties alphabetical).
+    """
+    folds = spell_fold(word_counts) if fold_spelling else {}
+    spellings: Dict[str, Dict[str, int]] = {}
+    for word, count in word_counts.items():
+        folded = folds.get(word, word)
+        key = stem_word(folded) if stem else folded
+        spellings.setdefault(key, {})
+        spellings[key][folded] = spellings[key].get(folded, 0) + count
+
+    labelled: Dict[str, int] = {}
+    for key_spellings in spellings.values():
+        label = min(key_spellings, key=lambda word: (-key_spellings[word], word)).title()
+        labelled[label] = labelled.get(label, 0) + sum(key_spellings.values())
+    return labelled
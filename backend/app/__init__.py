@@ -1,5 +1,9 @@
 # Flask application
 from .main import app
 from . import csv_handling
+from . import columnar
+from . import upload_handling
+from . import dataset_registry
+from . import live_ingest
 
-__all__ = ["app", "csv_handling"]
\ No newline at end of file
+__all__ = ["app", "csv_handling", "columnar", "upload_handling", "dataset_registry", "live_ingest"]
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Columnar wire format for row-oriented chart payloads.
+
+Several analysis sections ship arrays of homogeneous objects (session matrix rows,
+discovery channels, word clouds...) that repeat every key on every element.
+Clients can opt in to a columnar encoding where each of those arrays is replaced by
+a schema header plus one parallel array per field. Existing clients are unaffected:
+the encoding is only applied when requested via `?format=columnar` or an
+`Accept: application/vnd.feedback.columnar+json` header.
+
+Functions:
+- wants_columnar: Checks whether the current request negotiated the columnar format
+- to_columnar: Converts a list of records into the columnar representation
+- from_columnar: Converts a columnar payload back into a list of records
+- encode_columnar_sections: Applies the columnar encoding to the known row-oriented sections of a report
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.feedback.columnar+json'
+COLUMNAR_FORMAT_NAME = 'columnar'
+
+# Paths (relative to a report dict) of the row-oriented arrays worth encoding
+COLUMNAR_SECTIONS: List[Tuple[str, ...]] = [
+    ('data',),
+    ('session_matrix', 'sessions'),
+    ('discovery_channels', 'channels'),
+    ('time_preferences', 'data', 'distribution'),
+    ('venue_preferences', 'data', 'venue_distribution'),
+    ('one_word_descriptions', 'data', 'word_cloud'),
+    ('feedback', 'data', 'word_frequency'),
+    ('feedback', 'data', 'word_frequency_deduplicated'),
+    ('lexicon_sentiment', 'data', 'comment_scores'),
+]
+
+
+def wants_columnar(req) -> bool:
+    """
+    Checks whether a Flask request negotiated the columnar wire format.
+    Query parameter takes precedence over the Accept header.
+    """
+    requested_format = req.args.get('format')
+    if requested_format:
+        return requested_format.lower() == COLUMNAR_FORMAT_NAME
+    return COLUMNAR_MEDIA_TYPE in req.headers.get('Accept', '')
+
+
+def _value_type(value: Any) -> str:
+    """Maps a Python value to the schema type name used in the header"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, (list, tuple)):
+        return 'list'
+    if isinstance(value, dict):
+        return 'object'
+    # numpy scalars and other numerics
+    return 'number' if hasattr(value, '__float__') else 'string'
+
+
+def to_columnar(records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Converts a list of homogeneous dicts into parallel arrays plus a schema header.
+    Keys missing from individual records are filled with None.
+    """
+    field_names: List[str] = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                field_names.append(key)
+
+    columns = [[record.get(name) for record in records] for name in field_names]
+
+    schema = []
+    for name, values in zip(field_names, columns):
+        value_types = {_value_type(v) for v in values} - {'null'}
+        if len(value_types) == 1:
+            field_type = value_types.pop()
+        elif not value_types:
+            field_type = 'null'
+        else:
+            field_type = 'mixed'
+        schema.append({"name": name, "type": field_type, "nullable": any(v is None for v in values)})
+
+    return {
+        "encoding": COLUMNAR_FORMAT_NAME,
+        "length": len(records),
+        "schema": schema,
+        "columns": columns
+    }
+
+
+def from_columnar(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Converts a columnar payload back into a list of records"""
+    names = [field["name"] for field in payload.get("schema", [])]
+    columns = payload.get("columns", [])
+    return [dict(zip(names, row)) for row in zip(*columns)] if columns else [{} for _ in range(payload.get("length", 0))]
+
+
+def _is_record_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def encode_columnar_sections(report: Dict[str, Any],
+                             sections: Optional[List[Tuple[str, ...]]] = None) -> Dict[str, Any]:
+    """
+    Returns a copy of the report with the row-oriented sections columnar-encoded.
+    Only the containers along each path are copied; everything else is shared.
+    Sections that are missing or errored are left untouched.
+    """
+    encoded = dict(report)
+    for path in sections or COLUMNAR_SECTIONS:
+        parent = encoded
+        for key in path[:-1]:
+            child = parent.get(key)
+            if not isinstance(child, dict):
+                parent = None
+                break
+            parent[key] = dict(child)
+            parent = parent[key]
+
+        if parent is not None and _is_record_list(parent.get(path[-1])):
+            parent[path[-1]] = to_columnar(parent[path[-1]])
+
+    encoded["wire_format"] = COLUMNAR_FORMAT_NAME
+    return encoded
@@ -3,41 +3,63 @@ Web API version of the data extractor for Next.js integration.
 This module provides clean functions for web endpoints without CLI interface.
 """
 
-import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union, IO, Tuple
 import os
 import json
 from datetime import datetime
 import tempfile
 import io
-from backend.processing.feedback_service import extract_feedback_data
+import zipfile
+from backend.processing.feedback_service import extract_feedback_data, sniff_csv_header
+from backend.processing.table_export import build_export_tables, write_export_tables, EXPORT_FORMATS
 # Import the summary and analysis functions from the analysis package
-from backend.analysis import generate_initial_summary, generate_comprehensive_report
+from backend.analysis import (
+    generate_initial_summary, generate_comprehensive_report, get_comment_index, get_cube, get_bitmap_index,
+    summarize_snapshot
+)
+from backend.app.dataset_registry import register_dataset
+from backend.app.upload_handling import SPOOL_MEMORY_BYTES
+from backend.storage import get_event_store
 
 
-def validate_csv_content(file_content: bytes) -> Dict[str, Any]:
+CSVSource = Union[bytes, IO[bytes]]
+
+
+def _as_buffer(file_content: CSVSource) -> IO[bytes]:
     """
-    Validates CSV content from uploaded file bytes.
-    Returns validation result without requiring file system access.
+    Returns a readable binary buffer positioned at the start of the CSV.
+    Raw bytes are wrapped once; file handles (spooled uploads, memory maps) are rewound and reused.
     """
-    try:
-        # Use an in-memory buffer to validate the CSV without writing to disk
-        pd.read_csv(io.BytesIO(file_content), nrows=1)
-        return {"valid": True, "message": "File content is valid CSV"}
-    except Exception as e:
-        return {"valid": False, "message": f"Invalid CSV format: {str(e)}"}
+    if isinstance(file_content, (bytes, bytearray)):
+        return io.BytesIO(file_content)
+    file_content.seek(0)
+    return file_content
 
 
-def process_feedback_csv(file_content: bytes) -> Dict[str, Any]:
+def validate_csv_content(file_content: CSVSource) -> Dict[str, Any]:
+    """
+    Validates CSV content from uploaded file bytes or an open binary handle.
+    Only the header and first few KB are read (no pandas parse); the result
+    carries the detected `read_options` for process_feedback_csv and the
+    specific missing columns when the header is incomplete.
     """
-    Processes CSV file content for web API.
+    validation = sniff_csv_header(_as_buffer(file_content))
+    if not validation["valid"] and not validation.get("missing_columns"):
+        validation["message"] = f"Invalid CSV format: {validation['message']}"
+    return validation
+
+
+def process_feedback_csv(file_content: CSVSource, read_options: Optional[Dict[str, Any]] = None,
+                         event_name: Optional[str] = None, event_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Processes CSV file content (bytes or an open binary handle) for web API.
+    `read_options` from validate_csv_content are reused so the file is parsed once.
+    With an `event_name` the cleaned responses are also saved to the multi-event store.
     Returns standardized response with success/error status and data.
     """
     try:
-        # Create an in-memory file-like object for pandas
-        file_buffer = io.BytesIO(file_content)
         # Process the buffer using the existing logic
-        extracted_data = extract_feedback_data(file_buffer)
+        extracted_data = extract_feedback_data(_as_buffer(file_content), read_options)
 
         # Generate summary statistics for the frontend
         summary = generate_initial_summary(extracted_data)
@@ -45,6 +67,22 @@ def process_feedback_csv(file_content: bytes) -> Dict[str, Any]:
         # Generate comprehensive analysis for charts
         comprehensive_analysis = generate_comprehensive_report(extracted_data)
         
+        # Build the comment search index, OLAP cube and bitmap indexes now and keep them with the registered dataset
+        get_comment_index(extracted_data)
+        get_cube(extracted_data)
+        get_bitmap_index(extracted_data)
+        dataset_id = register_dataset(extracted_data)
+        
+        # Persist the cleaned responses for cross-event trends
+        event = None
+        if event_name:
+            try:
+                event = get_event_store().save_event(extracted_data, event_name, event_date)
+                print(f"DEBUG: Saved event {event['event_id']} ({event['response_count']} responses)")
+            except Exception as e:
+                print(f"DEBUG: Error saving event: {e}")
+                event = {"error": f"Failed to save event: {str(e)}"}
+        
         # Debug logging to see what we're returning
         print(f"DEBUG: Generated comprehensive analysis with keys: {comprehensive_analysis.keys()}")
         print(f"DEBUG: NPS analysis: {comprehensive_analysis.get('nps', {}).get('data', {})}")
@@ -54,6 +92,8 @@ def process_feedback_csv(file_content: bytes) -> Dict[str, Any]:
             "success": True,
             "message": "CSV processed successfully",
             "data": extracted_data,
+            "dataset_id": dataset_id,
+            **({"event": event} if event else {}),
             "summary": summary,
             "timestamp": datetime.now().isoformat(),
             **comprehensive_analysis  # Spread comprehensive analysis at root level
@@ -76,6 +116,56 @@ def process_feedback_csv(file_content: bytes) -> Dict[str, Any]:
         }   
 
 
+def refresh_feedback_csv(file_content: CSVSource, event_id: int,
+                         read_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Re-processes a grown CSV of a stored event incrementally: row fingerprints find the new
+    (or changed) responses, only those are stored and aggregated, and the report is rebuilt
+    from the updated event snapshot instead of re-running every analyzer.
+    """
+    try:
+        extracted_data = extract_feedback_data(_as_buffer(file_content), read_options)
+        refresh = get_event_store().refresh_event(event_id, extracted_data)
+        if refresh is None:
+            return {
+                "success": False,
+                "error": "Event not found",
+                "message": f"No stored event with id {event_id}",
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        delta = refresh["delta"]
+        print(f"DEBUG: Refreshed event {event_id}: {delta['added']} added, {delta['removed']} removed, "
+              f"{delta['unchanged']} unchanged (snapshot {delta['snapshot']})")
+        
+        # Indexes for the query endpoints are built lazily on first use
+        dataset_id = register_dataset(extracted_data)
+        
+        return {
+            "success": True,
+            "message": "Event refreshed",
+            "dataset_id": dataset_id,
+            "event": refresh["event"],
+            "delta": delta,
+            "report": summarize_snapshot(refresh["snapshot"]),
+            "timestamp": datetime.now().isoformat()
+        }
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": "Data validation error", 
+            "message": str(e),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "Processing error",
+            "message": f"Failed to refresh event: {str(e)}",
+            "timestamp": datetime.now().isoformat()
+        }
+
+
 def save_processed_data(data: List[Dict[str, Any]], filename_prefix: str = "processed") -> str:
     """
     Saves processed data to temporary location for download.
@@ -95,4 +185,32 @@ def save_processed_data(data: List[Dict[str, Any]], filename_prefix: str = "proc
             "data": data
         }, f, indent=2, ensure_ascii=False)
     
-    return file_path
\ No newline at end of file
+    return file_path
+
+
+def export_feedback_tables(file_content: CSVSource, file_format: str = 'arrow',
+                           compression: Optional[str] = None) -> Tuple[IO[bytes], str]:
+    """
+    Exports the cleaned dataset and per-section tables of an uploaded CSV
+    as Arrow IPC or Parquet files bundled in a zip archive.
+    Returns the archive as a spooled file object (rewound) and its download name;
+    the intermediate table files are deleted before returning.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}. Use one of {sorted(EXPORT_FORMATS)}")
+
+    extracted_data = extract_feedback_data(_as_buffer(file_content))
+    tables = build_export_tables(extracted_data, generate_comprehensive_report(extracted_data))
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    archive = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, mode='w+b')
+    with tempfile.TemporaryDirectory(prefix=f"feedback_export_{timestamp}_") as export_dir:
+        written = write_export_tables(tables, export_dir, file_format, compression)
+
+        # Files are already binary/compressed, so store them without zip deflate
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_STORED) as zipped:
+            for path in written:
+                zipped.write(path, arcname=os.path.basename(path))
+
+    archive.seek(0)
+    return archive, f"feedback_{file_format}_{timestamp}.zip"
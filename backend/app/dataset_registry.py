@@ -0,0 +1,54 @@
+"""
+In-memory registry of uploaded datasets.
+
+Uploads return a `dataset_id`; query endpoints (search, ...) look the dataset up
+instead of receiving every response again, so indexes built at upload time are
+reused across requests. The registry keeps the most recently used datasets only.
+
+The registry is process memory: the server must run as a single process (with threads,
+see render.yaml). Ids carry the id of the registering process, so a lookup that lands in
+another process (e.g. a multi-worker deploy) is reported instead of failing silently.
+
+Functions:
+- register_dataset: Stores a dataset and returns its id
+- get_dataset: Returns a registered dataset (None if unknown or evicted)
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from backend.processing.dataset import FeedbackDataset, as_dataset
+
+# Datasets kept in memory at once (least recently used are evicted first)
+MAX_REGISTERED_DATASETS = int(os.getenv('MAX_REGISTERED_DATASETS', '8'))
+
+_datasets: 'OrderedDict[str, FeedbackDataset]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def register_dataset(data: List[Dict[str, Any]]) -> str:
+    """Stores a dataset (wrapped as FeedbackDataset) and returns its new id"""
+    dataset_id = f"{os.getpid():x}-{uuid.uuid4().hex}"
+    with _lock:
+        _datasets[dataset_id] = as_dataset(data)
+        while len(_datasets) > MAX_REGISTERED_DATASETS:
+            _datasets.popitem(last=False)
+    return dataset_id
+
+
+def get_dataset(dataset_id: str) -> Optional[FeedbackDataset]:
+    """Returns a registered dataset and marks it as recently used"""
+    with _lock:
+        dataset = _datasets.get(dataset_id)
+        if dataset is not None:
+            _datasets.move_to_end(dataset_id)
+            return dataset
+
+    owner = str(dataset_id).split('-', 1)[0]
+    if '-' in str(dataset_id) and owner != f"{os.getpid():x}":
+        print(f"DEBUG: dataset {dataset_id} was registered by process {owner}, not {os.getpid():x}; "
+              f"run the server as a single worker process")
+    return None
@@ -0,0 +1,315 @@
+"""
+Live ingestion of individual responses pushed by a form webhook.
+
+Submissions are validated and queued per stream in O(1); a background worker per
+stream drains the queue in micro-batches (every LIVE_BATCH_INTERVAL seconds, or as
+soon as LIVE_BATCH_SIZE responses are waiting). Each batch is cleaned like a CSV
+upload, reduced to a mergeable aggregate snapshot and merged into the stream's
+running snapshot, so the cost per batch depends on the batch, not on everything
+received so far. Every merge publishes the summarized report to the stream's
+server-sent-event subscribers.
+
+State is in memory per server process: run a single worker process (with threads)
+when using live streams.
+
+Functions / classes:
+- LiveStream: Pending queue, running snapshot, micro-batch worker and subscribers of one stream
+- get_live_stream: Returns the stream of a name, optionally creating it (up to LIVE_MAX_STREAMS)
+- normalize_response: Validates one webhook record against the renamed-column schema
+- format_sse: Formats one server-sent event
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import ASPECT_SUFFIX, build_dataset
+from backend.processing.feedback_service import COLUMN_RENAME_MAP, clean_feedback_frame
+from backend.analysis.snapshots import build_snapshot, merge_snapshots, summarize_snapshot
+
+# Micro-batching: flush after this many queued responses or this many seconds, whichever comes first
+LIVE_BATCH_SIZE = int(os.getenv('LIVE_BATCH_SIZE', '200'))
+LIVE_BATCH_INTERVAL = float(os.getenv('LIVE_BATCH_INTERVAL', '0.5'))
+# Submissions are refused (503) while this many responses wait for the worker
+LIVE_MAX_PENDING = int(os.getenv('LIVE_MAX_PENDING', '50000'))
+# Optional shared secret expected in the X-Webhook-Token header
+LIVE_WEBHOOK_TOKEN = os.getenv('LIVE_WEBHOOK_TOKEN', '')
+# Live streams per process (each runs a worker thread for the life of the process)
+LIVE_MAX_STREAMS = int(os.getenv('LIVE_MAX_STREAMS', '16'))
+# Open SSE connections per process (each holds a server thread); more are refused with 503
+LIVE_MAX_SUBSCRIBERS = int(os.getenv('LIVE_MAX_SUBSCRIBERS', '8'))
+# Reports buffered per subscriber; slow subscribers skip to the newest report
+SUBSCRIBER_QUEUE_SIZE = 8
+HEARTBEAT_SECONDS = 15
+
+STREAM_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+RESPONSE_FIELDS = frozenset(COLUMN_RENAME_MAP.values())
+REQUIRED_FIELDS = ['satisfaction', 'recommendation_score']
+TEXT_FIELDS = sorted(RESPONSE_FIELDS - set(REQUIRED_FIELDS) - {'sessions_attended'})
+ASPECT_RATING_RANGE = (1, 5)
+ASPECT_FIELD_PATTERN = re.compile(r'^[a-z0-9_]+' + re.escape(ASPECT_SUFFIX) + '$')
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(number) else number
+
+
+def normalize_response(record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Checks one response in the renamed-column schema of extract_feedback_data.
+    Returns (row, None) or (None, reason). Text answers must be strings, aspect ratings numbers
+    from 1 to 5; sessions may be a list or a comma-separated string.
+    """
+    if not isinstance(record, dict):
+        return None, "Response must be a JSON object"
+    unknown = [key for key in record if key not in RESPONSE_FIELDS and not ASPECT_FIELD_PATTERN.match(str(key))]
+    if unknown:
+        return None, f"Unknown field(s): {', '.join(map(str, unknown))}"
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        return None, f"Missing required field(s): {', '.join(missing)}"
+
+    satisfaction = _number(record['satisfaction'])
+    if satisfaction is None or not 1 <= satisfaction <= 5:
+        return None, "satisfaction must be a number from 1 to 5"
+    recommendation = _number(record['recommendation_score'])
+    if recommendation is None or not 0 <= recommendation <= 10:
+        return None, "recommendation_score must be a number from 0 to 10"
+
+    for field in TEXT_FIELDS:
+        if record.get(field) is not None and not isinstance(record[field], str):
+            return None, f"{field} must be a string"
+    sessions = record.get('sessions_attended')
+    if sessions is not None and not isinstance(sessions, str) and not (
+            isinstance(sessions, list) and all(isinstance(session, str) for session in sessions)):
+        return None, "sessions_attended must be a string or a list of strings"
+
+    row = dict(record)
+    row['satisfaction'] = satisfaction
+    row['recommendation_score'] = recommendation
+    low, high = ASPECT_RATING_RANGE
+    for field in [key for key in record if ASPECT_FIELD_PATTERN.match(str(key))]:
+        if record[field] in (None, ''):
+            row[field] = None
+            continue
+        rating = _number(record[field])
+        if rating is None or not low <= rating <= high:
+            return None, f"{field} must be a number from {low} to {high}"
+        row[field] = rating
+    if isinstance(sessions, list):
+        row['sessions_attended'] = ', '.join(sessions)
+    return row, None
+
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class LiveStream:
+    """Running aggregate report of one live stream, updated by micro-batches"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.received = 0
+        self.batches = 0
+        self.dropped = 0
+        self.latest: Optional[Dict[str, Any]] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._apply_lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+        self._subscribers_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=f"live-{name}", daemon=True)
+        self._worker.start()
+
+    # --- Ingestion ---
+
+    def submit(self, rows: List[Dict[str, Any]]) -> bool:
+        """Queues validated rows for the next micro-batch; False when the queue is full"""
+        with self._condition:
+            if len(self._pending) + len(rows) > LIVE_MAX_PENDING:
+                return False
+            self._pending.extend(rows)
+            self.received += len(rows)
+            # Wakes the worker for the first response of a batch and when the batch is full
+            self._condition.notify()
+        return True
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Waits for responses, then up to LIVE_BATCH_INTERVAL for the batch to fill"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + LIVE_BATCH_INTERVAL
+            while len(self._pending) < LIVE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._pending = self._pending, []
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            self._apply_safely(self._next_batch())
+
+    def _apply_safely(self, rows: List[Dict[str, Any]]) -> None:
+        """Applies a batch; when it fails, bisects it so only the rows that fail are dropped"""
+        try:
+            self.apply_batch(rows)
+        except Exception as e:
+            if len(rows) > 1:
+                middle = len(rows) // 2
+                self._apply_safely(rows[:middle])
+                self._apply_safely(rows[middle:])
+                return
+            with self._apply_lock:
+                self.dropped += 1
+            print(f"DEBUG: Live stream {self.name} dropped a response: {e}")
+
+    def apply_batch(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Cleans a batch, merges its snapshot into the running one and publishes the new report"""
+        started = time.perf_counter()
+        frame = pd.DataFrame(rows)
+        aspect_columns = [col for col in frame.columns if ASPECT_FIELD_PATTERN.match(str(col))]
+        dataset = build_dataset(clean_feedback_frame(frame, aspect_columns))
+        batch_snapshot = build_snapshot(dataset)
+        with self._apply_lock:
+            self.snapshot = batch_snapshot if self.snapshot is None else \
+                {**merge_snapshots([self.snapshot, batch_snapshot]), "events": 1}
+            self.batches += 1
+            self.latest = {
+                "stream": self.name,
+                "version": self.batches,
+                "responses": self.snapshot["responses"],
+                "batch": {
+                    "size": len(rows),
+                    "processing_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "processed_at": datetime.now().isoformat()
+                },
+                "report": summarize_snapshot(self.snapshot)
+            }
+            latest = self.latest
+        self._publish(latest)
+        return latest
+
+    def reset(self) -> None:
+        """Discards queued responses and the running report (subscribers stay connected)"""
+        with self._condition:
+            self._pending = []
+            self.received = 0
+        with self._apply_lock:
+            self.snapshot, self.latest, self.batches, self.dropped = None, None, 0, 0
+
+    # --- Subscribers ---
+
+    def _publish(self, update: Dict[str, Any]) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(update)
+            except queue.Full:
+                # Drop the oldest report so the subscriber catches up with the newest
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(update)
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """New subscriber queue, or None when the process already serves LIVE_MAX_SUBSCRIBERS"""
+        if not _subscriber_slots.acquire(blocking=False):
+            return None
+        subscriber: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Idempotent: frees the subscriber's slot once"""
+        with self._subscribers_lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.remove(subscriber)
+        _subscriber_slots.release()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._subscribers_lock:
+            return len(self._subscribers)
+
+    def events(self, subscriber: queue.Queue, sections: Optional[List[str]] = None):
+        """
+        Server-sent events for a subscriber from subscribe(): the current report, then every
+        update (only the requested report sections), with heartbeat comments while idle.
+        """
+        try:
+            if self.latest is not None:
+                yield format_sse("report", _select_sections(self.latest, sections))
+            while True:
+                try:
+                    update = subscriber.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse("report", _select_sections(update, sections))
+        finally:
+            self.unsubscribe(subscriber)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "stream": self.name,
+            "received": self.received,
+            "processed": self.snapshot["responses"] if self.snapshot else 0,
+            "pending": self.pending,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "subscribers": self.subscriber_count
+        }
+
+
+def _select_sections(update: Dict[str, Any], sections: Optional[List[str]]) -> Dict[str, Any]:
+    if not sections:
+        return update
+    report = update["report"]
+    return {**update, "report": {key: value for key, value in report.items()
+                                 if key in sections or key in ('responses', 'events')}}
+
+
+_streams: Dict[str, LiveStream] = {}
+_streams_lock = threading.Lock()
+_subscriber_slots = threading.BoundedSemaphore(LIVE_MAX_SUBSCRIBERS)
+
+
+def get_live_stream(name: str, create: bool = False) -> Optional[LiveStream]:
+    """
+    Returns the stream of a name. With create=True an unknown stream (and its worker) is
+    started, unless LIVE_MAX_STREAMS streams already exist; None when no stream is returned.
+    """
+    if not STREAM_NAME_PATTERN.match(name):
+        raise ValueError("Stream names use 1-64 letters, digits, '-' or '_'")
+    with _streams_lock:
+        if name not in _streams and create and len(_streams) < LIVE_MAX_STREAMS:
+            _streams[name] = LiveStream(name)
+        return _streams.get(name)
@@ -3,17 +3,60 @@ Main API entry point for the Feedback Form Analyzer.
 This creates a simple Flask API that your frontend can call.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
+import hmac
 
-from backend.app.csv_handling import process_feedback_csv, validate_csv_content
-from backend.analysis import generate_comprehensive_report
+from backend.app.csv_handling import (
+    process_feedback_csv, refresh_feedback_csv, validate_csv_content, export_feedback_tables
+)
+from backend.app.columnar import wants_columnar, encode_columnar_sections
+from backend.app.upload_handling import configure_upload_limits, open_upload
+from backend.analysis import (
+    generate_comprehensive_report, generate_segment_keywords, query_segment_keywords, search_comments,
+    generate_theme_clusters, query_cube, generate_filtered_report, compare_cohorts
+)
+from backend.app.dataset_registry import get_dataset, register_dataset
+from backend.app.live_ingest import get_live_stream, normalize_response, LIVE_WEBHOOK_TOKEN
+from backend.storage import get_event_store
 from backend.utils.file_helpers import get_default_csv_path
 from backend.gemini.gemini_service import get_gemini_service
 
 app = Flask(__name__)
 CORS(app)  # Allow frontend to call this API
+configure_upload_limits(app)  # Stream uploads into spooled temp files, reject oversized bodies early
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Rejects request bodies above the configured upload limit"""
+    return jsonify({
+        "success": False,
+        "error": "File too large",
+        "message": f"Uploads are limited to {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"
+    }), 413
+
+def _request_dataset(params, allow_data: bool = True):
+    """
+    Dataset of a query request: the registered `dataset_id` (from /api/upload or /api/test)
+    or, when allowed, inline `data`. Returns (dataset, None) or (None, error response).
+    """
+    if params.get('dataset_id'):
+        dataset = get_dataset(params['dataset_id'])
+        if dataset is None:
+            return None, (jsonify({
+                "success": False,
+                "error": "Dataset not found",
+                "message": "The dataset expired or was never uploaded; upload the CSV again"
+            }), 404)
+        return dataset, None
+    if allow_data and params.get('data'):
+        return params['data'], None
+    return None, (jsonify({
+        "success": False,
+        "error": "No dataset_id or data provided"
+    }), 400)
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -53,26 +96,77 @@ def upload_csv():
                 "error": "File must be a CSV"
             }), 400
         
-        # Read file content
-        file_content = file.read()
+        # Hand the spooled upload (or its memory map) to the parsers without copying it
+        with open_upload(file) as file_content:
+            # Cheap header pre-flight: fails fast on missing columns, detects encoding/delimiter
+            validation = validate_csv_content(file_content)
+            if not validation["valid"]:
+                return jsonify({
+                    "success": False,
+                    "error": validation["message"],
+                    "missing_columns": validation.get("missing_columns", [])
+                }), 400
+            
+            # Process the CSV with the detected read options (optionally saving it as a named event)
+            result = process_feedback_csv(file_content, validation.get("read_options"),
+                                          event_name=request.form.get('event_name', '').strip() or None,
+                                          event_date=request.form.get('event_date') or None)
         
-        # Validate CSV content
-        validation = validate_csv_content(file_content)
-        if not validation["valid"]:
+        # Opt-in columnar encoding for row-oriented sections
+        if result.get('success') and wants_columnar(request):
+            result = encode_columnar_sections(result)
+        
+        return jsonify(result)
+    
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Server error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/export', methods=['POST'])
+def export_tables():
+    """
+    Exports the cleaned dataset and analysis tables (sessions, channels, pacing groups...)
+    of an uploaded CSV as Arrow IPC or Parquet files in a zip archive.
+    Form fields: format ('arrow' | 'parquet'), compression ('zstd' | 'none').
+    """
+    try:
+        if 'file' not in request.files or request.files['file'].filename == '':
             return jsonify({
                 "success": False,
-                "error": validation["message"]
+                "error": "No file uploaded"
             }), 400
         
-        # Process the CSV
-        result = process_feedback_csv(file_content)
+        file_format = request.form.get('format', 'arrow').lower()
+        compression = request.form.get('compression', 'none').lower()
         
-        return jsonify(result)
+        with open_upload(request.files['file']) as file_content:
+            archive, archive_name = export_feedback_tables(
+                file_content,
+                file_format=file_format,
+                compression=None if compression == 'none' else compression
+            )
+        
+        # send_file closes the spooled archive once the response is sent
+        return send_file(archive, mimetype='application/zip', as_attachment=True,
+                         download_name=archive_name)
     
+    except RequestEntityTooLarge:
+        raise
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": "Invalid export request",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
-            "error": "Server error",
+            "error": "Export failed",
             "message": str(e)
         }), 500
 
@@ -95,6 +189,10 @@ def analyze_data():
         # Generate comprehensive analysis
         analysis = generate_comprehensive_report(data['data'])
         
+        # Opt-in columnar encoding for row-oriented sections
+        if wants_columnar(request):
+            analysis = encode_columnar_sections(analysis)
+        
         return jsonify({
             "success": True,
             "analysis": analysis
@@ -107,6 +205,589 @@ def analyze_data():
             "message": str(e)
         }), 500
 
+@app.route('/api/segment-keywords', methods=['POST'])
+def segment_keywords():
+    """
+    Returns the most distinctive comment terms per segment (TF-IDF).
+    With `column` and `segment`, queries a single segment (e.g. one session or channel);
+    otherwise returns every segment of the session, channel, pacing and venue columns.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'data' not in data:
+            return jsonify({
+                "success": False,
+                "error": "No data provided"
+            }), 400
+        
+        limit = int(data.get('limit', 10))
+        
+        if data.get('column') and data.get('segment'):
+            result = query_segment_keywords(data['data'], data['column'], str(data['segment']), limit)
+        else:
+            result = generate_segment_keywords(data['data'], data.get('columns'), limit)
+        
+        if 'error' in result:
+            return jsonify({
+                "success": False,
+                "error": result['error']
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "segment_keywords": result
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Segment keyword analysis failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/search', methods=['GET', 'POST'])
+def search_feedback():
+    """
+    Full-text search over all comments of a dataset (AND of the query words, `word*` for prefixes).
+    GET: ?dataset_id=...&q=...&page=1&page_size=20&column=... (dataset from /api/upload or /api/test).
+    POST: JSON with the same fields, or `data` instead of `dataset_id`.
+    Returns paginated matches with highlight spans and the respondent's scores.
+    """
+    try:
+        params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+        query = params.get('q', '')
+        
+        if not query.strip():
+            return jsonify({
+                "success": False,
+                "error": "No search query provided"
+            }), 400
+        
+        dataset, error_response = _request_dataset(params, allow_data=request.method == 'POST')
+        if error_response:
+            return error_response
+        
+        if request.method == 'POST':
+            columns = params.get('columns')
+        else:
+            columns = request.args.getlist('column') or None
+        
+        result = search_comments(
+            dataset, query,
+            page=int(params.get('page', 1)),
+            page_size=int(params.get('page_size', 20)),
+            columns=columns
+        )
+        
+        if 'error' in result:
+            return jsonify({
+                "success": False,
+                "error": result['error']
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "search": result
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": "Invalid search parameters",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Search failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/cube', methods=['POST'])
+def query_feedback_cube():
+    """
+    Slice-and-dice of satisfaction, NPS and aspect ratings from the pre-aggregated cube.
+    Expects JSON: {"dataset_id": "...", "filters": {"event_discovery": ["Instagram"], "sessions": ["Keynote"]},
+    "group_by": "pacing", "measures": [...]} (or `data` instead of `dataset_id`).
+    Filter values are OR-ed within a dimension and AND-ed across dimensions.
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        
+        dataset, error_response = _request_dataset(params)
+        if error_response:
+            return error_response
+        
+        result = query_cube(
+            dataset,
+            filters=params.get('filters'),
+            group_by=params.get('group_by'),
+            measures=params.get('measures')
+        )
+        
+        if 'error' in result:
+            return jsonify({
+                "success": False,
+                "error": result['error']
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "cube": result
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Cube query failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/filter', methods=['POST'])
+def filter_feedback():
+    """
+    Ad-hoc drill-down: selects responses matching every condition and recomputes report sections on them.
+    Expects JSON: {"dataset_id": "...", "conditions": [{"column": "satisfaction", "op": "<=", "value": 2},
+    {"column": "improvement_feedback", "op": "contains", "value": "sound"}], "sections": ["nps", "pacing"]}
+    (or `data` instead of `dataset_id`). Operators: ==, !=, in, not_in, <, <=, >, >=, between, contains.
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        
+        dataset, error_response = _request_dataset(params)
+        if error_response:
+            return error_response
+        
+        result = generate_filtered_report(dataset, params.get('conditions') or [], params.get('sections'))
+        
+        if 'error' in result:
+            return jsonify({
+                "success": False,
+                "error": result['error']
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            **result
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Filter failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/compare', methods=['POST'])
+def compare_feedback_cohorts():
+    """
+    Compares two cohorts of one dataset (e.g. online vs in-person attendees).
+    Expects JSON: {"dataset_id": "...", "cohorts": [{"name": "Online", "conditions": [{"column": "modality",
+    "op": "==", "value": "Online"}]}, {"name": "In-Person", "conditions": [...]}]} (or `data` instead of `dataset_id`).
+    Conditions use the /api/filter syntax. Returns per-metric values, deltas (second - first) and significance.
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        
+        dataset, error_response = _request_dataset(params)
+        if error_response:
+            return error_response
+        
+        result = compare_cohorts(dataset, params.get('cohorts'))
+        
+        if 'error' in result:
+            return jsonify({
+                "success": False,
+                "error": result['error']
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "comparison": result
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Cohort comparison failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/events', methods=['GET', 'POST'])
+def feedback_events():
+    """
+    Multi-event store. GET lists the stored events in date order.
+    POST saves an uploaded dataset as an event: {"dataset_id": "...", "name": "Spring Summit", "event_date": "2025-04-12"}
+    (or `data` instead of `dataset_id`). CSV uploads can also be saved directly with the `event_name` form field.
+    """
+    try:
+        store = get_event_store()
+        if request.method == 'GET':
+            return jsonify({
+                "success": True,
+                "events": store.list_events()
+            })
+        
+        params = request.get_json(silent=True) or {}
+        name = str(params.get('name') or '').strip()
+        
+        if not name:
+            return jsonify({
+                "success": False,
+                "error": "No event name provided"
+            }), 400
+        
+        dataset, error_response = _request_dataset(params)
+        if error_response:
+            return error_response
+        
+        return jsonify({
+            "success": True,
+            "event": store.save_event(dataset, name, params.get('event_date') or None)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Event store error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/events/<int:event_id>', methods=['GET', 'DELETE'])
+def feedback_event(event_id):
+    """
+    GET reloads a stored event without its CSV: registers it like an upload and returns its
+    `dataset_id` (for /api/search, /api/cube, /api/filter, /api/compare) and the full report.
+    DELETE removes the event and its responses.
+    """
+    try:
+        store = get_event_store()
+        if request.method == 'DELETE':
+            if not store.delete_event(event_id):
+                return jsonify({
+                    "success": False,
+                    "error": "Event not found"
+                }), 404
+            return jsonify({
+                "success": True,
+                "message": f"Event {event_id} deleted"
+            })
+        
+        dataset = store.load_event(event_id)
+        if dataset is None:
+            return jsonify({
+                "success": False,
+                "error": "Event not found"
+            }), 404
+        
+        result = {
+            "success": True,
+            "event_id": event_id,
+            "dataset_id": register_dataset(dataset),
+            **generate_comprehensive_report(dataset)
+        }
+        if wants_columnar(request):
+            result = encode_columnar_sections(result)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Event store error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/events/<int:event_id>/refresh', methods=['POST'])
+def refresh_event(event_id):
+    """
+    Incremental re-upload: the grown CSV of a stored event (multipart `file`) is diffed against the
+    stored responses by row fingerprint, and only new/changed responses are stored and aggregated.
+    Returns the row delta and the updated event report (from its aggregate snapshot).
+    """
+    try:
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({
+                "success": False,
+                "error": "No file uploaded"
+            }), 400
+        
+        with open_upload(request.files['file']) as file_content:
+            validation = validate_csv_content(file_content)
+            if not validation["valid"]:
+                return jsonify({
+                    "success": False,
+                    "error": validation["message"],
+                    "missing_columns": validation.get("missing_columns", [])
+                }), 400
+            
+            result = refresh_feedback_csv(file_content, event_id, validation.get("read_options"))
+        
+        if not result.get('success'):
+            return jsonify(result), 404 if result.get('error') == "Event not found" else 400
+        
+        return jsonify(result)
+    
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Server error",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/trends', methods=['GET'])
+def feedback_trends():
+    """
+    Cross-event trends from the event store: per-event NPS and satisfaction (with change from
+    the previous event), discovery channel mix and session results across events.
+    Query: ?event_ids=1,2,3&start_date=2025-01-01&end_date=2025-12-31&session=Keynote (all optional).
+    """
+    try:
+        store = get_event_store()
+        event_ids = [int(event_id) for event_id in request.args.get('event_ids', '').split(',') if event_id.strip()]
+        window = {
+            "event_ids": event_ids or None,
+            "start_date": request.args.get('start_date') or None,
+            "end_date": request.args.get('end_date') or None
+        }
+        
+        return jsonify({
+            "success": True,
+            "trends": {
+                "events": store.event_trends(**window),
+                "channels": store.channel_trends(**window),
+                "sessions": store.session_trends(request.args.getlist('session') or None, **window)
+            }
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": "Invalid trend parameters",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Trend query failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/rollup', methods=['GET'])
+def feedback_rollup():
+    """
+    Multi-event report merged from the stored per-event snapshots (no response rows are read):
+    satisfaction, NPS, aspects, sessions, channels, pacing, time/venue, top words and correlations,
+    plus rolling-window satisfaction/NPS per event.
+    Query: ?event_ids=1,2,3&start_date=2025-01-01&end_date=2025-12-31&window=3 (all optional).
+    """
+    try:
+        event_ids = [int(event_id) for event_id in request.args.get('event_ids', '').split(',') if event_id.strip()]
+        result = get_event_store().rollup(
+            event_ids=event_ids or None,
+            start_date=request.args.get('start_date') or None,
+            end_date=request.args.get('end_date') or None,
+            window=int(request.args.get('window', 3))
+        )
+        
+        if result is None:
+            return jsonify({
+                "success": False,
+                "error": "No stored events match the selection"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "rollup": result
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": "Invalid rollup parameters",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Rollup failed",
+            "message": str(e)
+        }), 500
+
+# Responses accepted per webhook call ("single responses or small batches")
+LIVE_MAX_REQUEST_RESPONSES = 1000
+
+def _webhook_token_error():
+    """401 response when LIVE_WEBHOOK_TOKEN is configured and the request lacks it (else None)"""
+    if LIVE_WEBHOOK_TOKEN and not hmac.compare_digest(request.headers.get('X-Webhook-Token', ''),
+                                                      LIVE_WEBHOOK_TOKEN):
+        return jsonify({
+            "success": False,
+            "error": "Invalid webhook token"
+        }), 401
+    return None
+
+@app.route('/api/live/<stream>/responses', methods=['POST'])
+def live_responses(stream):
+    """
+    Webhook for live responses in the renamed-column schema of the CSV extraction
+    (satisfaction, recommendation_score, sessions_attended, ..., <aspect>_rating).
+    Body: one response object, a list of them, or {"responses": [...]}. Valid responses are
+    queued for the next micro-batch (202); invalid ones are reported by index.
+    Send the X-Webhook-Token header when LIVE_WEBHOOK_TOKEN is configured.
+    """
+    try:
+        token_error = _webhook_token_error()
+        if token_error:
+            return token_error
+        
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and isinstance(payload.get('responses'), list):
+            payload = payload['responses']
+        records = payload if isinstance(payload, list) else [payload] if isinstance(payload, dict) else None
+        
+        if not records:
+            return jsonify({
+                "success": False,
+                "error": "No responses provided"
+            }), 400
+        
+        if len(records) > LIVE_MAX_REQUEST_RESPONSES:
+            return jsonify({
+                "success": False,
+                "error": f"At most {LIVE_MAX_REQUEST_RESPONSES} responses per request"
+            }), 400
+        
+        rows, rejected = [], []
+        for index, record in enumerate(records):
+            row, error = normalize_response(record)
+            if error:
+                rejected.append({"index": index, "error": error})
+            else:
+                rows.append(row)
+        
+        if not rows:
+            return jsonify({
+                "success": False,
+                "error": "No valid responses",
+                "rejected": rejected
+            }), 400
+        
+        live_stream = get_live_stream(stream, create=True)
+        if live_stream is None:
+            return jsonify({
+                "success": False,
+                "error": "Too many live streams"
+            }), 503
+        
+        if not live_stream.submit(rows):
+            return jsonify({
+                "success": False,
+                "error": "Live stream is busy, retry shortly"
+            }), 503, {"Retry-After": "1"}
+        
+        return jsonify({
+            "success": True,
+            "accepted": len(rows),
+            "rejected": rejected,
+            "pending": live_stream.pending
+        }), 202
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Live ingestion failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/live/<stream>', methods=['GET', 'DELETE'])
+def live_report(stream):
+    """
+    GET: counters and the latest rolling report of a live stream (polling alternative to /events).
+    DELETE: resets the stream's report and queue (needs X-Webhook-Token like the webhook).
+    """
+    try:
+        if request.method == 'DELETE':
+            token_error = _webhook_token_error()
+            if token_error:
+                return token_error
+        
+        live_stream = get_live_stream(stream)
+        if live_stream is None:
+            return jsonify({
+                "success": False,
+                "error": "Live stream not found"
+            }), 404
+        
+        if request.method == 'DELETE':
+            live_stream.reset()
+            return jsonify({
+                "success": True,
+                "message": f"Live stream {stream} reset"
+            })
+        
+        return jsonify({
+            "success": True,
+            "status": live_stream.status(),
+            "latest": live_stream.latest
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Live report failed",
+            "message": str(e)
+        }), 500
+
+@app.route('/api/live/<stream>/events', methods=['GET'])
+def live_events(stream):
+    """
+    Server-sent events: a `report` event with the rolling report after every micro-batch
+    (the current one first). The stream must exist (created by its first webhook POST). ?sections=nps,sessions limits the report sections sent.
+    """
+    try:
+        live_stream = get_live_stream(stream)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    if live_stream is None:
+        return jsonify({
+            "success": False,
+            "error": "Live stream not found"
+        }), 404
+    
+    subscriber = live_stream.subscribe()
+    if subscriber is None:
+        return jsonify({
+            "success": False,
+            "error": "Too many open live dashboards, retry later"
+        }), 503, {"Retry-After": "30"}
+    
+    sections = [section for section in request.args.get('sections', '').split(',') if section] or None
+    response = Response(
+        stream_with_context(live_stream.events(subscriber, sections)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Frees the slot even if the client disconnects before the stream starts
+    response.call_on_close(lambda: live_stream.unsubscribe(subscriber))
+    return response
+
 @app.route('/api/test', methods=['GET'])
 def test_with_sample():
     """
@@ -128,17 +809,18 @@ def test_with_sample():
                 "error": "No sample CSV file found in test_data folder"
             }), 404
         
-        # Read CSV file content
-        with open(csv_path, 'rb') as f:
-            file_content = f.read()
-        
-        # Process using same pipeline as upload endpoint
-        result = process_feedback_csv(file_content)
+        # Process using same pipeline as upload endpoint (parsers read the handle directly)
+        with open(csv_path, 'rb') as file_content:
+            result = process_feedback_csv(file_content)
         
         # Add test indicator
         if result.get('success'):
             result['test_mode'] = True
             result['message'] = f"✨ Quick Test loaded with {result['summary']['total_responses']} sample responses"
+            
+            # Opt-in columnar encoding for row-oriented sections
+            if wants_columnar(request):
+                result = encode_columnar_sections(result)
         
         return jsonify(result)
     
@@ -174,7 +856,9 @@ def ai_enhanced_analysis():
         ai_results = {}
         
         # Sentiment analysis
-        ai_results['sentiment'] = gemini_service.generate_sentiment_analysis(feedback_data)
+        ai_results['sentiment'] = gemini_service.generate_sentiment_analysis(
+            feedback_data, ambiguous_only=bool(data.get('ambiguous_only', False))
+        )
         
         # Theme extraction
         ai_results['themes'] = gemini_service.generate_theme_extraction(feedback_data)
@@ -277,6 +961,50 @@ def generate_marketing_insights():
         }), 500
 
 
+@app.route('/api/ai/theme-names', methods=['POST'])
+def generate_theme_names():
+    """
+    Names the offline theme clusters with Gemini.
+    Accepts `themes` (the theme_clusters section's themes) or `data` to cluster first.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not (data.get('themes') or data.get('data')):
+            return jsonify({
+                "success": False,
+                "error": "No themes or data provided"
+            }), 400
+        
+        themes = data.get('themes')
+        if not themes:
+            clusters = generate_theme_clusters(data['data'])
+            if 'error' in clusters:
+                return jsonify({
+                    "success": False,
+                    "error": clusters['error']
+                }), 400
+            themes = clusters['data']['themes']
+        
+        # Initialize Gemini service
+        gemini_service = get_gemini_service()
+        
+        # Only cluster summaries are sent for naming
+        ai_insights = gemini_service.name_theme_clusters(themes)
+        
+        return jsonify({
+            "success": True,
+            "insights": ai_insights
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": "Failed to name themes",
+            "message": str(e)
+        }), 500
+
+
 @app.route('/api/ai/aspect-insights', methods=['POST'])
 def generate_aspect_insights():
     """
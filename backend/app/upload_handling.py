@@ -0,0 +1,81 @@
+"""
+Streaming, size-limited upload handling for CSV endpoints.
+
+The multipart body is streamed straight into a spooled temporary file (kept in
+memory while small, rolled over to disk once it grows) and oversized requests are
+rejected before the body is read. Parsers receive a file handle - or a read-only
+memory map once the upload lives on disk - instead of several bytes copies.
+
+Functions / classes:
+- SpooledUploadRequest: Flask request class that spools uploaded files with our threshold
+- configure_upload_limits: Installs the request class and size limit on a Flask app
+- open_upload: Returns a parser-ready binary handle for an uploaded file
+"""
+
+import io
+import os
+import mmap
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+from flask import Request
+
+# Hard limit for a single request body (default 50 MB, overridable via env)
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', '50')) * 1024 * 1024
+
+# Uploads up to this size stay in memory; larger ones roll over to a temp file
+SPOOL_MEMORY_BYTES = int(os.getenv('UPLOAD_SPOOL_KB', '1024')) * 1024
+
+
+class SpooledUploadRequest(Request):
+    """Request class whose multipart file parts stream into a spooled temporary file"""
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, mode='rb+')
+
+
+def configure_upload_limits(flask_app, max_bytes: int = MAX_UPLOAD_BYTES) -> None:
+    """
+    Enables spooled uploads and the request size limit on a Flask app.
+    Werkzeug rejects requests whose declared Content-Length exceeds the limit
+    before reading the body, and caps streamed bodies without one.
+    """
+    flask_app.request_class = SpooledUploadRequest
+    flask_app.config['MAX_CONTENT_LENGTH'] = max_bytes
+
+
+def _disk_file(stream) -> Optional[IO[bytes]]:
+    """Returns the on-disk file behind a stream, or None if it is memory-backed"""
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        return stream._file if getattr(stream, '_rolled', False) else None  # type: ignore[attr-defined]
+    if isinstance(stream, io.BytesIO):
+        return None
+    try:
+        stream.fileno()
+        return stream
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+@contextmanager
+def open_upload(file_storage) -> Iterator[IO[bytes]]:
+    """
+    Yields a binary handle positioned at the start of an uploaded file.
+    Disk-backed uploads are exposed as a read-only memory map so pandas reads
+    the page cache directly; in-memory uploads are handed over as-is.
+    """
+    stream = file_storage.stream
+    stream.seek(0)
+
+    disk_file = _disk_file(stream)
+    if disk_file is None or os.fstat(disk_file.fileno()).st_size == 0:
+        yield stream
+        return
+
+    mapped = mmap.mmap(disk_file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped  # type: ignore[misc]
+    finally:
+        mapped.close()
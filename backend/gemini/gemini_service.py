@@ -5,11 +5,14 @@ This service uses Google's Gemini API to analyze feedback text and generate acti
 """
 
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import json
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from backend.analysis.textual_analytics import score_sentiment, summarize_sentiment_scores
+from backend.analysis.near_duplicates import find_near_duplicates
+
 # Load environment variables
 load_dotenv()
 
@@ -29,9 +32,12 @@ class GeminiAnalysisService:
         if self.dev_mode:
             print("🚀 Gemini service running in DEVELOPMENT mode (smaller samples, faster responses)")
     
-    def generate_sentiment_analysis(self, feedback_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def generate_sentiment_analysis(self, feedback_data: List[Dict[str, Any]],
+                                    ambiguous_only: bool = False) -> Dict[str, Any]:
         """
         Analyze sentiment across all feedback text fields.
+        Every comment is first scored locally with the lexicon model; with
+        `ambiguous_only`, Gemini only receives the weak/mixed comments it flagged.
         Returns overall sentiment trends and specific insights.
         """
         try:
@@ -48,15 +54,38 @@ class GeminiAnalysisService:
             if not text_fields:
                 return {"error": "No text feedback available for analysis"}
             
+            # Local lexicon pass over every comment (milliseconds, no API call)
+            local_scores = score_sentiment([field['text'] for field in text_fields])
+            candidate_fields = text_fields
+            if ambiguous_only:
+                candidate_fields = [field for field, ambiguous in zip(text_fields, local_scores.ambiguous) if ambiguous]
+                if not candidate_fields:
+                    return {
+                        "chart_type": "sentiment_analysis",
+                        "data": {},
+                        "local_sentiment": summarize_sentiment_scores(local_scores),
+                        "total_analyzed": len(text_fields),
+                        "sample_analyzed": 0,
+                        "ambiguous_only": True,
+                        "dev_mode": self.dev_mode
+                    }
+            
+            # Send each near-duplicate cluster once, annotated with its size
+            candidate_count = len(candidate_fields)
+            candidate_fields = [
+                dict(field, similar=similar)
+                for field, similar in self._collapse_near_duplicates(candidate_fields, key='text')
+            ]
+            
             if self.dev_mode:
-                sample_size = min(10, len(text_fields))  # Limit to 10 for dev testing
-                sample_fields = text_fields[:sample_size]
+                sample_size = min(10, len(candidate_fields))  # Limit to 10 for dev testing
+                sample_fields = candidate_fields[:sample_size]
             else:
-                sample_size = min(50, len(text_fields))  # Production: up to 50
-                sample_fields = text_fields[:sample_size]
+                sample_size = min(50, len(candidate_fields))  # Production: up to 50
+                sample_fields = candidate_fields[:sample_size]
             
             # Prepare prompt for Gemini
-            prompt = self._create_sentiment_prompt(sample_fields)
+            prompt = self._create_sentiment_prompt(sample_fields, ambiguous_only)
             
             # Generate analysis with Gemini
             response = self.model.generate_content(prompt)
@@ -65,8 +94,11 @@ class GeminiAnalysisService:
             return {
                 "chart_type": "sentiment_analysis",
                 "data": analysis,
+                "local_sentiment": summarize_sentiment_scores(local_scores),
                 "total_analyzed": len(text_fields),
                 "sample_analyzed": sample_size,
+                "near_duplicates_collapsed": candidate_count - len(candidate_fields),
+                "ambiguous_only": ambiguous_only,
                 "dev_mode": self.dev_mode
             }
             
@@ -102,13 +134,23 @@ class GeminiAnalysisService:
                 )
             )
 
+            # Collapse copy-pasted/templated answers so the sample covers distinct comments
+            distinct_positive = [
+                self._with_similar_count(text, similar)
+                for text, similar in self._collapse_near_duplicates(positive_feedback)
+            ]
+            distinct_improvement = [
+                self._with_similar_count(text, similar)
+                for text, similar in self._collapse_near_duplicates(improvement_feedback)
+            ]
+
             # 🚀 DEVELOPMENT MODE: Use smaller samples for faster testing
             if self.dev_mode:
-                sample_positive = positive_feedback[:8]  # Limit to 8 for dev
-                sample_improvement = improvement_feedback[:8]  # Limit to 8 for dev
+                sample_positive = distinct_positive[:8]  # Limit to 8 for dev
+                sample_improvement = distinct_improvement[:8]  # Limit to 8 for dev
             else:
-                sample_positive = positive_feedback[:25]  # Production: up to 25
-                sample_improvement = improvement_feedback[:25]
+                sample_positive = distinct_positive[:25]  # Production: up to 25
+                sample_improvement = distinct_improvement[:25]
             
             # Generate theme analysis
             prompt = self._create_theme_prompt(sample_positive, sample_improvement)
@@ -124,7 +166,9 @@ class GeminiAnalysisService:
                     # `unique_responses` counts responses that contained any analyzable
                     # text (positive or improvement). This avoids double-counting when
                     # a single response has both positive and improvement comments.
-                    "unique_responses": unique_responses_count
+                    "unique_responses": unique_responses_count,
+                    "distinct_positive": len(distinct_positive),
+                    "distinct_improvement": len(distinct_improvement)
                 },
                 "sample_analyzed": {
                     "positive": len(sample_positive),
@@ -169,12 +213,19 @@ class GeminiAnalysisService:
         except Exception as e:
             return {"error": f"Insights generation failed: {str(e)}"}
     
-    def _create_sentiment_prompt(self, text_fields: List[Dict[str, str]]) -> str:
+    def _create_sentiment_prompt(self, text_fields: List[Dict[str, str]], ambiguous_only: bool = False) -> str:
         """Create prompt for sentiment analysis"""
-        texts = "\n".join([f"[{field['type']}]: {field['text']}" for field in text_fields[:50]])  # Limit to 50 for API limits
+        texts = "\n".join([
+            f"[{field['type']}]: {self._with_similar_count(field['text'], field.get('similar', 1))}"
+            for field in text_fields[:50]  # Limit to 50 for API limits
+        ])
+        focus = (
+            "These responses were flagged as ambiguous (weak or mixed polarity) by a keyword-based scorer. "
+            "Focus on nuance: sarcasm, mixed praise/criticism and implied complaints.\n        "
+        ) if ambiguous_only else ""
         
         return f"""
-        Analyze the sentiment of the following event feedback responses. Return your analysis in JSON format with these fields:
+        {focus}Analyze the sentiment of the following event feedback responses. Return your analysis in JSON format with these fields:
         
         1. overall_sentiment: "positive", "neutral", or "negative"
         2. confidence_score: 0-100 indicating confidence in the analysis
@@ -260,16 +311,38 @@ class GeminiAnalysisService:
         return metrics
     
     def _get_representative_feedback(self, feedback_data: List[Dict[str, Any]], limit: int = 15) -> List[str]:
-        """Get a representative sample of feedback for context"""
-        feedback_samples = []
-        
-        for response in feedback_data[:limit]:  # Configurable limit
+        """Get a representative sample of feedback for context (one comment per near-duplicate cluster)"""
+        comments = []
+        for row, response in enumerate(feedback_data):
             for field in ['positive_feedback', 'improvement_feedback', 'additional_comments']:
                 if field in response and response[field] and response[field] != 'No comment':
-                    feedback_samples.append(f"[{field}]: {response[field]}")
+                    comments.append({'row': row, 'type': field, 'text': response[field]})
+        
+        feedback_samples = []
+        sampled_rows = set()
+        for comment, similar in self._collapse_near_duplicates(comments, key='text'):
+            if comment['row'] not in sampled_rows and len(sampled_rows) >= limit:  # Configurable limit
+                break
+            sampled_rows.add(comment['row'])
+            feedback_samples.append(f"[{comment['type']}]: {self._with_similar_count(comment['text'], similar)}")
         
         return feedback_samples
     
+    @staticmethod
+    def _collapse_near_duplicates(items: List[Any], key: Optional[str] = None) -> List[Tuple[Any, int]]:
+        """
+        Keeps the first item of each near-duplicate cluster (in original order) with the cluster size.
+        `key` selects the text field when items are dicts.
+        """
+        texts = [str(item[key]) if key else str(item) for item in items]
+        clusters = find_near_duplicates(texts)
+        return [(items[i], int(clusters.sizes[label])) for label, i in enumerate(clusters.representative_index)]
+    
+    @staticmethod
+    def _with_similar_count(text: str, similar: int) -> str:
+        """Annotates a representative comment with how many responses said (nearly) the same"""
+        return f"{text} (x{similar} similar responses)" if similar > 1 else text
+    
     def _parse_gemini_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Gemini's JSON response with error handling"""
         try:
@@ -456,9 +529,11 @@ RESPOND WITH ONLY VALID JSON, NO ADDITIONAL TEXT."""
             if not aspects:
                 return {"error": "No aspect data available for analysis"}
             
-            # Categorize aspects
-            strengths = [a for a in aspects if a.get('difference', 0) > 0.1]
-            weaknesses = [a for a in aspects if a.get('difference', 0) < -0.1]
+            # Categorize aspects (biggest deltas first, so long aspect lists lead with what matters)
+            strengths = sorted((a for a in aspects if a.get('difference', 0) > 0.1),
+                               key=lambda a: a['difference'], reverse=True)
+            weaknesses = sorted((a for a in aspects if a.get('difference', 0) < -0.1),
+                                key=lambda a: a['difference'])
             adequate = [a for a in aspects if abs(a.get('difference', 0)) <= 0.1]
             
             prompt = f"""You are an event quality analyst specializing in attendee experience optimization.
@@ -514,6 +589,67 @@ RESPOND WITH ONLY VALID JSON, NO ADDITIONAL TEXT."""
         except Exception as e:
             return {"error": f"Failed to generate aspect insights: {str(e)}"}
 
+    def name_theme_clusters(self, themes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Names locally computed theme clusters (see generate_theme_clusters).
+        Only each cluster's top terms, size and a few example quotes are sent, never the full corpus.
+        """
+        try:
+            if not themes:
+                return {"error": "No theme clusters available for naming"}
+            
+            theme_lines = []
+            for theme in themes[:12]:  # Local clustering yields at most a handful of themes
+                examples = "; ".join(f'"{quote[:120]}"' for quote in theme.get('examples', [])[:3])
+                theme_lines.append(
+                    f"- id {theme['theme_id']}: {theme['size']} comments, top terms: "
+                    f"{', '.join(theme.get('top_terms', []))}. Examples: {examples}"
+                )
+            
+            prompt = f"""Event feedback comments were grouped into themes by a local clustering model.
+Give each theme a short human-readable name and a one-sentence summary.
+
+THEMES:
+{chr(10).join(theme_lines)}
+
+CRITICAL RULES:
+- Names must be 2-4 words (e.g., "Wi-Fi reliability", "Catering quality")
+- Summaries must be ONE sentence, grounded in the example quotes
+- Keep the given ids
+
+JSON FORMAT:
+{{
+  "themes": [
+    {{"theme_id": 0, "name": "Short theme name", "summary": "One-sentence summary", "sentiment": "positive|neutral|negative|mixed"}}
+  ]
+}}
+
+RESPOND WITH ONLY VALID JSON, NO ADDITIONAL TEXT."""
+
+            response = self.model.generate_content(prompt)
+            names = self._parse_gemini_response(response.text)
+            if 'error' in names:
+                return names
+            
+            # Merge names back onto the local clusters (unnamed themes keep their term label)
+            named = {item.get('theme_id'): item for item in names.get('themes', []) if isinstance(item, dict)}
+            return {
+                "chart_type": "theme_clusters",
+                "themes": [
+                    {
+                        **theme,
+                        "name": named.get(theme['theme_id'], {}).get('name', theme.get('label')),
+                        "summary": named.get(theme['theme_id'], {}).get('summary'),
+                        "sentiment": named.get(theme['theme_id'], {}).get('sentiment')
+                    }
+                    for theme in themes
+                ],
+                "dev_mode": self.dev_mode
+            }
+            
+        except Exception as e:
+            return {"error": f"Failed to name theme clusters: {str(e)}"}
+
 def get_gemini_service() -> GeminiAnalysisService:
     """Get configured Gemini service instance"""
     return GeminiAnalysisService()
\ No newline at end of file
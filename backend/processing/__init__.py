@@ -1,7 +1,11 @@
 # Import main data processing functions
-from .feedback_service import extract_feedback_data, validate_csv_file
+from .feedback_service import extract_feedback_data, validate_csv_file, clean_feedback_frame
+from .dataset import FeedbackDataset, as_dataset
 
 __all__ = [
     "extract_feedback_data",
     "validate_csv_file",
+    "clean_feedback_frame",
+    "FeedbackDataset",
+    "as_dataset",
 ]
\ No newline at end of file
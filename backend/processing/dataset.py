@@ -0,0 +1,203 @@
+"""
+Dictionary-encoded storage for a cleaned feedback dataset.
+
+`FeedbackDataset` is still a plain list of response dicts (so the API, JSON output
+and every analyzer keep working), but it also carries a DataFrame in which the
+low-cardinality survey columns are pandas categoricals, plus an integer encoding
+of the attended sessions. Row dicts share the category string objects instead of
+holding one string per row, and grouped analyses run on the integer codes.
+
+Functions / classes:
+- FeedbackDataset: List of response dicts with encoded columnar storage attached
+- SessionEncoding: Flat integer encoding of the multi-valued sessions column
+- AspectMatrix: All aspect rating columns as one numeric matrix
+- aspect_columns: Aspect rating columns of a frame, in chart order
+- aspect_label: Display label for an aspect rating column
+- build_dataset: Builds a FeedbackDataset from a cleaned DataFrame (used at ingestion)
+- subset_dataset: FeedbackDataset of selected rows (filtered drill-downs)
+- row_fingerprints: 64-bit content hash per response (incremental re-uploads)
+- as_dataset: Returns the FeedbackDataset for any list of responses (wraps plain lists)
+"""
+
+from typing import Dict, Any, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+# Survey columns with a few dozen distinct values repeated across every row
+CATEGORICAL_COLUMNS = ['pacing', 'preferred_time', 'preferred_venue', 'event_discovery', 'one_word_desc']
+
+# Aspect ratings ("Please rate the following aspects of the event [X]") end with this suffix
+ASPECT_SUFFIX = '_rating'
+# Original three aspects keep their names and come first, in this order
+LEGACY_ASPECT_COLUMNS = ['venue_rating', 'speaker_rating', 'content_rating']
+
+
+class SessionEncoding(NamedTuple):
+    """Exploded sessions_attended: one entry per (response, session) pair"""
+    codes: np.ndarray       # session code per entry
+    row_index: np.ndarray   # response row per entry
+    categories: List[str]   # session name per code, in first-appearance order
+
+
+class AspectMatrix(NamedTuple):
+    """Aspect ratings as one (responses x aspects) float matrix, NaN where unanswered"""
+    columns: List[str]      # short column names (e.g. 'venue_rating', 'wi_fi_rating')
+    labels: List[str]       # display labels (e.g. 'Venue', 'Wi-Fi')
+    values: np.ndarray
+
+
+class FeedbackDataset(list):
+    """
+    List of response dicts with dictionary-encoded columnar storage attached.
+    `frame` must be treated as read-only: it is shared by every analyzer.
+    `cache` holds derived structures (indexes, engines) built once per dataset.
+    """
+
+    def __init__(self, records=(), frame: Optional[pd.DataFrame] = None,
+                 aspect_labels: Optional[Dict[str, str]] = None):
+        super().__init__(records)
+        self._frame = frame
+        self._sessions: Optional[SessionEncoding] = None
+        self._aspects: Optional[AspectMatrix] = None
+        # Labels from the CSV question text, keyed by column; others are derived from the name
+        self.aspect_labels: Dict[str, str] = dict(aspect_labels or {})
+        self.cache: Dict[str, Any] = {}
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = encode_categoricals(pd.DataFrame(list(self)))
+        return self._frame
+
+    @property
+    def sessions(self) -> SessionEncoding:
+        if self._sessions is None:
+            self._sessions = encode_sessions(self.frame)
+        return self._sessions
+
+    @property
+    def aspects(self) -> AspectMatrix:
+        if self._aspects is None:
+            df = self.frame
+            columns = aspect_columns(df)
+            values = np.column_stack([
+                pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) for col in columns
+            ]) if columns else np.empty((len(df), 0))
+            labels = [self.aspect_labels.get(col) or aspect_label(col) for col in columns]
+            self._aspects = AspectMatrix(columns, labels, values)
+        return self._aspects
+
+
+def aspect_columns(df: pd.DataFrame) -> List[str]:
+    """Aspect rating columns of a frame: the legacy three first, then the others in CSV order"""
+    legacy = [col for col in LEGACY_ASPECT_COLUMNS if col in df.columns]
+    return legacy + [
+        col for col in df.columns
+        if isinstance(col, str) and col.endswith(ASPECT_SUFFIX) and col not in legacy
+    ]
+
+
+def aspect_label(column: str) -> str:
+    """Display label derived from a column name ('speaker_rating' -> 'Speaker', 'wi_fi_rating' -> 'Wi Fi')"""
+    return column[:-len(ASPECT_SUFFIX)].replace('_', ' ').title() if column.endswith(ASPECT_SUFFIX) \
+        else column.replace('_', ' ').title()
+
+
+def encode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the low-cardinality survey columns of a DataFrame to categoricals (in place)"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def encode_sessions(df: pd.DataFrame) -> SessionEncoding:
+    """Encodes the sessions_attended lists as flat integer codes with their owning row"""
+    if 'sessions_attended' not in df.columns:
+        return SessionEncoding(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64), [])
+
+    names, rows = [], []
+    for row, sessions in enumerate(df['sessions_attended']):
+        if isinstance(sessions, str):
+            sessions = [s.strip() for s in sessions.split(',') if s.strip()]
+        elif not isinstance(sessions, list):
+            continue
+        for session in sessions:
+            names.append(session.strip())
+            rows.append(row)
+
+    codes, categories = pd.factorize(pd.Series(names, dtype=object), sort=False)
+    return SessionEncoding(codes.astype(np.int32), np.asarray(rows, dtype=np.int64), list(categories))
+
+
+def _column_values(series: pd.Series) -> List[Any]:
+    """Python values for one column; categorical values reuse one object per category"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.tolist() + [np.nan]
+        return [categories[code] for code in series.cat.codes.tolist()]
+    return series.tolist()
+
+
+def build_dataset(df: pd.DataFrame, aspect_labels: Optional[Dict[str, str]] = None) -> FeedbackDataset:
+    """
+    Builds a FeedbackDataset from a cleaned DataFrame.
+    Low-cardinality columns are dictionary-encoded before the row dicts are materialized,
+    so every row references the same category strings.
+    `aspect_labels` maps aspect rating columns to the labels found in the CSV questions.
+    """
+    df = encode_categoricals(df)
+    names = [str(col) for col in df.columns]
+    columns = [_column_values(df[col]) for col in df.columns]
+    records = [dict(zip(names, values)) for values in zip(*columns)]
+    return FeedbackDataset(records, frame=df, aspect_labels=aspect_labels)
+
+
+def subset_dataset(dataset: 'FeedbackDataset', rows: np.ndarray) -> FeedbackDataset:
+    """
+    FeedbackDataset of the given row positions, sharing the row dicts of the parent.
+    Categoricals drop categories that no selected row uses; aspect labels are kept.
+    """
+    frame = dataset.frame.iloc[rows].reset_index(drop=True)
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].cat.remove_unused_categories()
+    return FeedbackDataset([dataset[row] for row in rows.tolist()], frame=frame,
+                           aspect_labels=dataset.aspect_labels)
+
+
+def _fingerprint_hashes(series: pd.Series):
+    """Hash of each value of a column (canonical form) and the mask of non-missing entries"""
+    if series.name == 'sessions_attended':
+        values = series.map(lambda sessions: ', '.join(sessions) if isinstance(sessions, list)
+                            else (sessions if isinstance(sessions, str) else ''))
+        return pd.util.hash_array(values.to_numpy(dtype=object)), (values != '').to_numpy()
+    present = series.notna().to_numpy()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Hash each category once
+        category_hashes = pd.util.hash_array(series.cat.categories.astype(str).to_numpy(dtype=object))
+        return category_hashes[np.maximum(series.cat.codes.to_numpy(), 0)] if len(category_hashes) \
+            else np.zeros(len(series), dtype=np.uint64), present
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return pd.util.hash_array(series.to_numpy(dtype=float)), present
+    return pd.util.hash_array(series.where(series.notna(), '').astype(str).to_numpy(dtype=object)), present
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """
+    uint64 content hash per response over every cleaned column. Column order, integer vs
+    float scores and absent vs all-missing columns do not change it, so a response hashes the
+    same whether it comes from a CSV upload or the event store.
+    """
+    fingerprints = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        hashed, present = _fingerprint_hashes(df[col])
+        # Keying each value hash by its column keeps equal values in different columns apart
+        hashed = hashed ^ pd.util.hash_array(np.array([str(col)], dtype=object))[0]
+        fingerprints += np.where(present, hashed, np.uint64(0))
+    return fingerprints
+
+
+def as_dataset(data: List[Dict[str, Any]]) -> FeedbackDataset:
+    """Returns data itself if it is already a FeedbackDataset, otherwise wraps it (encoding lazily)"""
+    return data if isinstance(data, FeedbackDataset) else FeedbackDataset(data)
@@ -1,64 +1,225 @@
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 import os
+import re
+import csv
+import codecs
 import pprint
 import json
 from datetime import datetime
+from backend.processing.dataset import build_dataset, ASPECT_SUFFIX
+
+# Convert long survey question columns to short, code-friendly names
+COLUMN_RENAME_MAP = {
+    'Overall Satisfaction': 'satisfaction',
+    'How likely are you to recommend our events to a friend or colleague?': 'recommendation_score',
+    'Which sessions did you attend?': 'sessions_attended',
+    'What did you like most about the event?': 'positive_feedback',
+    'What could be improved?': 'improvement_feedback',
+    'Any additional comments?': 'additional_comments',
+    'Preferred Time Slot': 'preferred_time',
+    'Preferred Venue': 'preferred_venue',
+    'Pacing': 'pacing',
+    'Event Discovery Channel': 'event_discovery',
+    'One-Word Description': 'one_word_desc'
+}
+
+# Aspect rating questions: any number of "Please rate the following aspects of the event [X]" columns
+ASPECT_QUESTION_PATTERN = re.compile(r'^\s*Please rate the following aspects(?: of the event)?\s*\[(?P<aspect>[^\]]+)\]\s*$')
+ASPECT_QUESTION_TEMPLATE = 'Please rate the following aspects of the event [{}]'
+
+# The original three aspects keep their historical column names
+LEGACY_ASPECT_NAMES = {
+    'Venue': 'venue_rating',
+    'Speakers': 'speaker_rating',
+    'Content Relevance': 'content_rating'
+}
+
+# Pre-flight sniffing only looks at the start of the file
+SNIFF_SAMPLE_BYTES = 64 * 1024
+SNIFF_DELIMITERS = [',', ';', '\t', '|']
 
 # --- HELPER & VALIDATION FUNCTIONS ---
 
+def aspect_column_name(aspect: str) -> str:
+    """Short column name for an aspect label ('Wi-Fi' -> 'wi_fi_rating'; legacy aspects keep their names)"""
+    aspect = aspect.strip()
+    if aspect in LEGACY_ASPECT_NAMES:
+        return LEGACY_ASPECT_NAMES[aspect]
+    slug = re.sub(r'[^a-z0-9]+', '_', aspect.casefold()).strip('_') or 'aspect'
+    return slug + ASPECT_SUFFIX
+
+
+def discover_aspect_columns(header: Sequence[str]) -> Dict[str, str]:
+    """
+    Maps every bracketed aspect question in a header to its short column name, in header order.
+    Name collisions ("Wi-Fi" and "WiFi " both -> ...) get a numeric suffix.
+    """
+    aspects: Dict[str, str] = {}
+    used = set(COLUMN_RENAME_MAP.values())
+    for question in header:
+        match = ASPECT_QUESTION_PATTERN.match(str(question))
+        if not match or question in aspects:
+            continue
+        name = aspect_column_name(match.group('aspect'))
+        base, suffix = name[:-len(ASPECT_SUFFIX)], 2
+        while name in used:
+            name = f"{base}_{suffix}{ASPECT_SUFFIX}"
+            suffix += 1
+        used.add(name)
+        aspects[question] = name
+    return aspects
+
+
+def aspect_labels(aspect_map: Dict[str, str]) -> Dict[str, str]:
+    """Display labels from the question text for new aspects (legacy aspects keep their chart labels)"""
+    return {
+        column: ASPECT_QUESTION_PATTERN.match(question).group('aspect').strip()
+        for question, column in aspect_map.items()
+        if ASPECT_QUESTION_PATTERN.match(question).group('aspect').strip() not in LEGACY_ASPECT_NAMES
+    }
+
+
+def _detect_encoding(sample: bytes) -> str:
+    """Detects the text encoding of a byte sample (BOM first, then UTF-8, then cp1252)"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # Incremental decode so a multi-byte character cut at the sample boundary is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _read_sample(file_path_or_buffer) -> bytes:
+    """Reads the first SNIFF_SAMPLE_BYTES of a path or binary buffer, rewinding buffers afterwards"""
+    if isinstance(file_path_or_buffer, (str, os.PathLike)):
+        with open(file_path_or_buffer, 'rb') as f:
+            return f.read(SNIFF_SAMPLE_BYTES)
+    start = file_path_or_buffer.tell()
+    sample = file_path_or_buffer.read(SNIFF_SAMPLE_BYTES)
+    file_path_or_buffer.seek(start)
+    return sample
+
+
+def sniff_csv_header(file_path_or_buffer) -> Dict[str, Any]:
+    """
+    Cheap pre-flight check that reads only the first few KB of a CSV.
+    Detects encoding and delimiter, parses the header row and checks required columns.
+    Returns validation status, the missing question columns (if any) and the
+    `read_options` to pass to extract_feedback_data so the file is parsed only once.
+    """
+    try:
+        sample = _read_sample(file_path_or_buffer)
+    except Exception as e:
+        return {"valid": False, "message": f"Cannot read CSV file: {str(e)}", "missing_columns": []}
+
+    if not sample.strip():
+        return {"valid": False, "message": "CSV file is empty", "missing_columns": []}
+
+    encoding = _detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=False)
+    lines = text.splitlines()
+
+    # Pick the delimiter whose header row matches the most expected question columns
+    best = None
+    for delimiter in SNIFF_DELIMITERS:
+        try:
+            header = next(csv.reader(lines, delimiter=delimiter), [])
+        except csv.Error:
+            continue
+        matches = len(set(header) & set(COLUMN_RENAME_MAP)) + len(discover_aspect_columns(header))
+        if best is None or matches > best[0]:
+            best = (matches, delimiter, header)
+
+    if best is None:
+        return {"valid": False, "message": "Cannot parse CSV header row", "missing_columns": []}
+
+    _, delimiter, header = best
+    missing_columns = [question for question in COLUMN_RENAME_MAP if question not in header]
+    aspect_map = discover_aspect_columns(header)
+    if not aspect_map:
+        # At least one aspect rating is required; report the canonical form
+        missing_columns.append(ASPECT_QUESTION_TEMPLATE.format('<aspect>'))
+    if missing_columns:
+        return {
+            "valid": False,
+            "message": f"Missing required columns in the CSV: {missing_columns}",
+            "missing_columns": missing_columns,
+        }
+
+    return {
+        "valid": True,
+        "message": "File is valid",
+        "missing_columns": [],
+        "columns": header,
+        "aspects": [
+            {"question": question, "column": column} for question, column in aspect_map.items()
+        ],
+        "read_options": {"encoding": encoding, "sep": delimiter}
+    }
+
+
 def validate_csv_file(file_path: str) -> Dict[str, Any]:
     """
-    Checks if a CSV file exists and can be read before attempting full processing.
+    Checks if a CSV file exists and has the expected header before attempting full processing.
     Returns a dictionary with validation status and error message if invalid.
     """
     if not file_path: return {"valid": False, "message": "No file path provided"}
     if not os.path.exists(file_path): return {"valid": False, "message": f"File not found: {file_path}"}
     if not file_path.lower().endswith('.csv'): return {"valid": False, "message": "File must be a CSV file"}
-    try:
-        pd.read_csv(file_path, nrows=1)
-        return {"valid": True, "message": "File is valid"}
-    except Exception as e:
-        return {"valid": False, "message": f"Cannot read or parse CSV file: {str(e)}"}
+    return sniff_csv_header(file_path)
 
 # --- CORE DATA PROCESSING ---
-def extract_feedback_data(file_path_or_buffer) -> List[Dict[str, Any]]:
+def extract_feedback_data(file_path_or_buffer, read_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """
     Main processing function: reads CSV, renames columns to shorter names,
     validates required columns exist, and cleans the data.
+    Every bracketed aspect question becomes a numeric `<aspect>_rating` column.
+    `read_options` (encoding/sep from sniff_csv_header) are forwarded to pandas;
+    only the survey columns we use are parsed.
     Returns a list of dictionaries (one per survey response).
     """
-    df = pd.read_csv(file_path_or_buffer)
-
-    # Convert long survey question columns to short, code-friendly names
-    rename_map = {
-        'Overall Satisfaction': 'satisfaction',
-        'How likely are you to recommend our events to a friend or colleague?': 'recommendation_score',
-        'Which sessions did you attend?': 'sessions_attended',
-        'Please rate the following aspects of the event [Venue]': 'venue_rating',
-        'Please rate the following aspects of the event [Speakers]': 'speaker_rating',
-        'Please rate the following aspects of the event [Content Relevance]': 'content_rating',
-        'What did you like most about the event?': 'positive_feedback',
-        'What could be improved?': 'improvement_feedback',
-        'Any additional comments?': 'additional_comments',
-        'Preferred Time Slot': 'preferred_time',
-        'Preferred Venue': 'preferred_venue',
-        'Pacing': 'pacing',
-        'Event Discovery Channel': 'event_discovery',
-        'One-Word Description': 'one_word_desc'
-    }
+    df = pd.read_csv(
+        file_path_or_buffer,
+        usecols=lambda col: col in COLUMN_RENAME_MAP or ASPECT_QUESTION_PATTERN.match(str(col)) is not None,
+        **(read_options or {})
+    )
+
+    aspect_map = discover_aspect_columns(df.columns)
+    rename_map = {**COLUMN_RENAME_MAP, **aspect_map}
     df.rename(columns=rename_map, inplace=True)
 
     # Check that all expected columns exist in the CSV after renaming
-    required_columns = set(rename_map.values())
+    required_columns = set(COLUMN_RENAME_MAP.values())
     missing_columns = required_columns - set(df.columns)
     if missing_columns:
         raise ValueError(f"Missing required columns in the CSV: {sorted(list(missing_columns))}")
+    if not aspect_map:
+        raise ValueError("Missing aspect rating columns in the CSV: expected at least one "
+                         f"'{ASPECT_QUESTION_TEMPLATE.format('<aspect>')}' column")
 
-    extracted_df = df[list(required_columns)].copy()
+    extracted_df = df[list(required_columns) + list(aspect_map.values())].copy()
 
-    # --- Data Cleaning & Transformation ---
-    
+    # Dictionary-encode low-cardinality columns and convert to a list of dicts (one per row).
+    # The returned FeedbackDataset keeps the encoded frame for the analyzers.
+    return build_dataset(clean_feedback_frame(extracted_df, list(aspect_map.values())), aspect_labels(aspect_map))
+
+
+def clean_feedback_frame(extracted_df: pd.DataFrame, aspect_columns: Sequence[str]) -> pd.DataFrame:
+    """
+    Cleans responses that already use the renamed columns (CSV extraction and live webhook):
+    numeric recommendation scores and aspect ratings, session lists and comment placeholders.
+    Modifies and returns the frame.
+    """
     # Extract numbers from recommendation score text (e.g., "8 out of 10" becomes 8)
     if 'recommendation_score' in extracted_df.columns:
         extracted_df['recommendation_score'] = pd.to_numeric(
@@ -67,6 +228,10 @@ def extract_feedback_data(file_path_or_buffer) -> List[Dict[str, Any]]:
         ).fillna(0)
 
 
+    # Aspect ratings are numeric (unparseable answers become NaN)
+    for col in aspect_columns:
+        extracted_df[col] = pd.to_numeric(extracted_df[col], errors='coerce')
+
     # Convert comma-separated session names into a list of individual sessions
     if "sessions_attended" in extracted_df.columns:
         extracted_df["sessions_attended"] = (
@@ -80,11 +245,7 @@ def extract_feedback_data(file_path_or_buffer) -> List[Dict[str, Any]]:
         if col in extracted_df.columns:
             extracted_df[col] = extracted_df[col].fillna('No comment')
 
-    # Convert DataFrame to list of dictionaries (one dict per row)
-    return [
-        {str(k): v for k, v in row.items()}
-        for row in extracted_df.to_dict(orient='records')
-    ]
+    return extracted_df
 
 
 def save_extracted_data(data: List[Dict[str, Any]], original_file_path: str):
@@ -146,6 +307,16 @@ def main():
         if input("\nSave extracted data to JSON? (y/n): ").lower() == 'y':
             save_extracted_data(extracted_data, file_path)
 
+        # Offer binary export for BI tooling (Arrow IPC / Parquet)
+        export_choice = input("\nExport tables to Arrow IPC or Parquet? (a/p/n): ").strip().lower()
+        if export_choice in ('a', 'p'):
+            from backend.processing.table_export import build_export_tables, write_export_tables
+            output_dir = os.path.join(os.path.dirname(file_path), f"{os.path.splitext(os.path.basename(file_path))[0]}_export")
+            compression = 'zstd' if input("Use zstd compression? (y/n): ").lower() == 'y' else None
+            for path in write_export_tables(build_export_tables(extracted_data), output_dir,
+                                            'arrow' if export_choice == 'a' else 'parquet', compression):
+                print(f"Wrote {path}")
+
     # Handle expected errors (missing columns, data format issues)
     except (ValueError, KeyError) as e:
         print(f"Data Processing Error: {e}")
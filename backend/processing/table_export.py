@@ -0,0 +1,136 @@
+"""
+Binary export of the cleaned dataset and per-section analysis tables.
+
+Writes Arrow IPC (.arrow) or Parquet (.parquet) files, optionally zstd-compressed,
+so BI tooling can memory-map the data instead of parsing pretty-printed JSON.
+Note that uncompressed Arrow IPC files are the only variant that can be
+memory-mapped without a decode step.
+
+Functions:
+- build_export_tables: Builds Arrow tables for the dataset and analysis sections
+- write_export_tables: Writes tables to Arrow IPC or Parquet files
+- export_feedback_csv: CSV-to-files convenience wrapper used by the CLI
+"""
+
+import os
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from backend.processing.feedback_service import extract_feedback_data
+
+EXPORT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+EXPORT_COMPRESSIONS = (None, 'zstd')
+
+# Table name -> path of the record list inside a comprehensive report
+SECTION_TABLES = {
+    'sessions': ('session_matrix', 'sessions'),
+    'channels': ('discovery_channels', 'channels'),
+    'pacing_groups': ('pacing', 'data', 'chart_data'),
+    'time_slots': ('time_preferences', 'data', 'distribution'),
+    'venues': ('venue_preferences', 'data', 'venue_distribution'),
+}
+
+
+def _require_pyarrow():
+    """Imports pyarrow lazily so the rest of the API works without it"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError as e:
+        raise RuntimeError("Binary export requires pyarrow (pip install pyarrow)") from e
+
+
+def _section_records(report: Dict[str, Any], path) -> List[Dict[str, Any]]:
+    """Walks a report path and returns the record list, or [] if the section is missing/errored"""
+    node: Any = report
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return []
+        node = node[key]
+    return node if isinstance(node, list) else []
+
+
+def build_export_tables(data: List[Dict[str, Any]], analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Builds Arrow tables for the cleaned responses and the row-oriented analysis sections.
+    If no precomputed analysis is passed, the comprehensive report is generated here.
+    Returns a dict of table name -> pyarrow.Table (empty sections are skipped).
+    """
+    pa = _require_pyarrow()
+
+    if analysis is None:
+        from backend.analysis import generate_comprehensive_report
+        analysis = generate_comprehensive_report(data)
+
+    tables = {"responses": pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False)}
+
+    for table_name, path in SECTION_TABLES.items():
+        records = _section_records(analysis, path)
+        if records:
+            tables[table_name] = pa.Table.from_pandas(pd.DataFrame(records), preserve_index=False)
+
+    return tables
+
+
+def write_export_tables(tables: Dict[str, Any], output_dir: str, file_format: str = 'arrow',
+                        compression: Optional[str] = None) -> List[str]:
+    """
+    Writes each table to `<output_dir>/<name>.<ext>` in Arrow IPC file format or Parquet.
+    Returns the list of written file paths.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}. Use one of {sorted(EXPORT_FORMATS)}")
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression}. Use 'zstd' or none")
+
+    pa = _require_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    for name, table in tables.items():
+        path = os.path.join(output_dir, f"{name}{EXPORT_FORMATS[file_format]}")
+        if file_format == 'arrow':
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+        else:
+            pa.parquet.write_table(table, path, compression=compression or 'none')
+        written.append(path)
+
+    return written
+
+
+def export_feedback_csv(csv_path: str, output_dir: Optional[str] = None, file_format: str = 'arrow',
+                        compression: Optional[str] = None) -> List[str]:
+    """
+    Extracts a feedback CSV and writes the dataset and section tables next to it
+    (or into output_dir). Returns the list of written file paths.
+    """
+    data = extract_feedback_data(csv_path)
+    if output_dir is None:
+        base_name = os.path.splitext(os.path.basename(csv_path))[0]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = os.path.join(os.path.dirname(csv_path), f"{base_name}_export_{timestamp}")
+    return write_export_tables(build_export_tables(data), output_dir, file_format, compression)
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Export cleaned feedback data and analysis tables")
+    parser.add_argument("csv_path", help="Path to the feedback CSV file")
+    parser.add_argument("--format", dest="file_format", choices=sorted(EXPORT_FORMATS), default="arrow")
+    parser.add_argument("--compression", choices=["zstd", "none"], default="none")
+    parser.add_argument("--output-dir", default=None, help="Directory for the exported files")
+    args = parser.parse_args()
+
+    compression = None if args.compression == "none" else args.compression
+    for path in export_feedback_csv(args.csv_path, args.output_dir, args.file_format, compression):
+        print(f"Wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+# Persistent storage across uploads
+
+# Multi-event response store (SQLite)
+from .event_store import (
+    EventStore,
+    get_event_store
+)
+
+__all__ = [
+    "EventStore",
+    "get_event_store",
+]
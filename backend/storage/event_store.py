@@ -0,0 +1,550 @@
+"""
+Persistent multi-event store for cleaned feedback responses (embedded SQLite).
+
+Each saved event keeps its cleaned responses as rows of `responses` (one per survey
+response), with the multi-valued sessions and the aspect ratings in long tables
+keyed by (event_id, row_number). Indexes on event, session and discovery channel
+let the trend queries aggregate NPS, satisfaction and channel mix across events in
+SQL, without re-parsing any CSV; `load_event` rebuilds a FeedbackDataset so every
+analyzer can also run on a stored event. Each event also keeps its mergeable aggregate
+snapshot, so multi-event and rolling-window reports merge one small state per event.
+Responses carry a content fingerprint: re-uploading a grown CSV for an event only
+writes the new rows and folds their snapshot into the stored one (`refresh_event`).
+
+The database file is local to the server (EVENT_STORE_PATH); every call opens its own
+connection, so the store is safe to use from threaded and multi-process servers.
+
+Functions / classes:
+- EventStore: Save, refresh, list, load and delete events, cross-event trend queries and snapshot rollups
+- get_event_store: Shared EventStore for the configured database path
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.processing.dataset import FeedbackDataset, as_dataset, build_dataset, subset_dataset, row_fingerprints
+from backend.analysis.snapshots import (
+    SNAPSHOT_VERSION, build_snapshot, merge_snapshots, summarize_snapshot, rolling_summaries
+)
+from backend.utils.file_helpers import get_default_event_store_path
+
+EVENT_STORE_PATH = os.getenv('EVENT_STORE_PATH', get_default_event_store_path())
+
+# Single-valued response columns stored as-is (scores are REAL, everything else TEXT)
+SCORE_COLUMNS = ['satisfaction', 'recommendation_score']
+TEXT_COLUMNS = ['event_discovery', 'pacing', 'preferred_venue', 'preferred_time', 'one_word_desc',
+                'positive_feedback', 'improvement_feedback', 'additional_comments']
+RESPONSE_COLUMNS = SCORE_COLUMNS + TEXT_COLUMNS
+NOT_SPECIFIED = 'Not Specified'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    event_date TEXT,
+    created_at TEXT NOT NULL,
+    response_count INTEGER NOT NULL,
+    aspect_labels TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS responses (
+    event_id INTEGER NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+    row_number INTEGER NOT NULL,
+    fingerprint INTEGER,
+    satisfaction REAL,
+    recommendation_score REAL,
+    event_discovery TEXT,
+    pacing TEXT,
+    preferred_venue TEXT,
+    preferred_time TEXT,
+    one_word_desc TEXT,
+    positive_feedback TEXT,
+    improvement_feedback TEXT,
+    additional_comments TEXT,
+    PRIMARY KEY (event_id, row_number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS response_sessions (
+    event_id INTEGER NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+    row_number INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    session TEXT NOT NULL,
+    PRIMARY KEY (event_id, row_number, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS response_aspects (
+    event_id INTEGER NOT NULL REFERENCES events(event_id) ON DELETE CASCADE,
+    row_number INTEGER NOT NULL,
+    aspect TEXT NOT NULL,
+    rating REAL NOT NULL,
+    PRIMARY KEY (event_id, row_number, aspect)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS event_snapshots (
+    event_id INTEGER PRIMARY KEY REFERENCES events(event_id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    snapshot TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(event_date, event_id);
+CREATE INDEX IF NOT EXISTS idx_responses_channel ON responses(event_discovery, event_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_session ON response_sessions(session, event_id);
+"""
+
+# Per-group score aggregates shared by the trend queries (r = responses alias)
+_SCORE_AGGREGATES = """
+    COUNT(*) AS responses,
+    AVG(r.satisfaction) AS average_satisfaction,
+    COUNT(r.recommendation_score) AS nps_responses,
+    SUM(r.recommendation_score >= 9) AS promoters,
+    SUM(r.recommendation_score <= 6) AS detractors
+"""
+
+
+def _text_values(series: pd.Series) -> List[Optional[str]]:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _score_values(series: pd.Series) -> List[Optional[float]]:
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    return [None if np.isnan(value) else float(value) for value in values.tolist()]
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None else round(float(value), digits)
+
+
+def _nps(promoters: Optional[int], detractors: Optional[int], n: int) -> Optional[float]:
+    return round(((promoters or 0) - (detractors or 0)) / n * 100, 1) if n else None
+
+
+def _event_filter(event_ids: Optional[Sequence[int]], start_date: Optional[str],
+                  end_date: Optional[str], alias: str = 'e') -> Tuple[str, List[Any]]:
+    """WHERE clause (possibly empty) restricting events by id list and date range"""
+    clauses, params = [], []
+    if event_ids:
+        clauses.append(f"{alias}.event_id IN ({', '.join('?' * len(event_ids))})")
+        params.extend(int(event_id) for event_id in event_ids)
+    if start_date:
+        clauses.append(f"{alias}.event_date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append(f"{alias}.event_date <= ?")
+        params.append(end_date)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+class EventStore:
+    """Cleaned responses of many events in one SQLite file, with indexed trend queries"""
+
+    def __init__(self, path: str = EVENT_STORE_PATH):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connect(self):
+        """Connection with foreign keys on; commits on success, rolls back on error"""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    directory = os.path.dirname(os.path.abspath(self.path))
+                    os.makedirs(directory, exist_ok=True)
+                    with sqlite3.connect(self.path) as setup:
+                        setup.execute("PRAGMA journal_mode=WAL")
+                        setup.executescript(SCHEMA)
+                        # Stores created before row fingerprints get the column (filled on first refresh)
+                        columns = [row[1] for row in setup.execute("PRAGMA table_info(responses)")]
+                        if 'fingerprint' not in columns:
+                            setup.execute("ALTER TABLE responses ADD COLUMN fingerprint INTEGER")
+                    self._initialized = True
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    # --- Writing ---
+
+    def _insert_responses(self, connection: sqlite3.Connection, event_id: int, dataset: FeedbackDataset,
+                          first_row: int = 0) -> None:
+        """Inserts every response of a dataset (with sessions, aspects and fingerprints) from row `first_row` on"""
+        df = dataset.frame
+        n_rows = len(df)
+        rows = list(range(first_row, first_row + n_rows))
+        fingerprints = row_fingerprints(df).view(np.int64).tolist()
+
+        columns = []
+        for col in RESPONSE_COLUMNS:
+            if col not in df.columns:
+                columns.append([None] * n_rows)
+            elif col in SCORE_COLUMNS:
+                columns.append(_score_values(df[col]))
+            else:
+                columns.append(_text_values(df[col]))
+
+        # Sessions keep their order within a response through a per-row position
+        sessions = dataset.sessions
+        session_names = np.asarray(sessions.categories, dtype=object)
+        starts = np.flatnonzero(np.r_[True, np.diff(sessions.row_index) != 0]) if len(sessions.codes) else np.empty(0, int)
+        positions = np.arange(len(sessions.codes)) - np.repeat(starts, np.diff(np.r_[starts, len(sessions.codes)]))
+        session_rows = zip((sessions.row_index + first_row).tolist(), positions.tolist(),
+                           session_names[sessions.codes].tolist()) if len(sessions.codes) else []
+
+        aspects = dataset.aspects
+        answered_rows, answered_aspects = np.nonzero(~np.isnan(aspects.values))
+        aspect_rows = zip((answered_rows + first_row).tolist(),
+                          np.asarray(aspects.columns, dtype=object)[answered_aspects].tolist(),
+                          aspects.values[answered_rows, answered_aspects].tolist()) if len(answered_rows) else []
+
+        placeholders = ', '.join('?' * (len(RESPONSE_COLUMNS) + 3))
+        connection.executemany(
+            f"INSERT INTO responses (event_id, row_number, fingerprint, {', '.join(RESPONSE_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            ((event_id, row, fingerprint, *values) for row, fingerprint, *values in zip(rows, fingerprints, *columns))
+        )
+        connection.executemany(
+            "INSERT INTO response_sessions (event_id, row_number, position, session) VALUES (?, ?, ?, ?)",
+            ((event_id, row, position, session) for row, position, session in session_rows)
+        )
+        connection.executemany(
+            "INSERT INTO response_aspects (event_id, row_number, aspect, rating) VALUES (?, ?, ?, ?)",
+            ((event_id, row, aspect, rating) for row, aspect, rating in aspect_rows)
+        )
+
+    def save_event(self, data: List[Dict[str, Any]], name: str, event_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Persists the cleaned responses of one event in a single transaction.
+        Returns the stored event ({"event_id", "name", "event_date", "response_count", ...}).
+        """
+        dataset = as_dataset(data)
+        aspects = dataset.aspects
+        snapshot = build_snapshot(dataset)
+
+        created_at = datetime.now().isoformat()
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO events (name, event_date, created_at, response_count, aspect_labels) VALUES (?, ?, ?, ?, ?)",
+                (name, event_date, created_at, len(dataset), json.dumps(dict(zip(aspects.columns, aspects.labels))))
+            )
+            event_id = cursor.lastrowid
+            self._insert_responses(connection, event_id, dataset)
+            self._store_snapshot(connection, event_id, snapshot)
+
+        return {
+            "event_id": event_id,
+            "name": name,
+            "event_date": event_date,
+            "created_at": created_at,
+            "response_count": len(dataset),
+            "aspects": aspects.labels
+        }
+
+    def refresh_event(self, event_id: int, data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Brings a stored event in line with a re-uploaded (grown) dataset using row fingerprints:
+        only new responses are inserted and responses no longer present are removed. Appends
+        update the stored snapshot by merging a snapshot of the new rows; removals rebuild it.
+        Returns {"event", "delta", "snapshot"} (None if the event does not exist).
+        """
+        dataset = as_dataset(data)
+        event_id = int(event_id)
+        stored_rows, stored_fingerprints = self._event_fingerprints(event_id)
+        if stored_rows is None:
+            return None
+
+        # Multiset difference: the k-th copy of a fingerprint matches the k-th stored copy
+        fingerprints = row_fingerprints(dataset.frame).view(np.int64)
+        incoming_keys = pd.MultiIndex.from_arrays(
+            [fingerprints, pd.Series(fingerprints).groupby(fingerprints).cumcount().to_numpy()])
+        stored_keys = pd.MultiIndex.from_arrays(
+            [stored_fingerprints, pd.Series(stored_fingerprints).groupby(stored_fingerprints).cumcount().to_numpy()])
+        added = np.flatnonzero(~incoming_keys.isin(stored_keys))
+        removed = stored_rows[~stored_keys.isin(incoming_keys)]
+
+        delta = {
+            "added": int(len(added)),
+            "removed": int(len(removed)),
+            "unchanged": int(len(dataset) - len(added)),
+            "snapshot": "unchanged"
+        }
+        snapshot = None
+        if len(added) or len(removed):
+            new_rows = subset_dataset(dataset, added)
+            if len(removed):
+                snapshot, delta["snapshot"] = build_snapshot(dataset), "rebuilt"
+            else:
+                stored = self.event_snapshots([event_id])[0]["snapshot"]
+                snapshot = {**merge_snapshots([stored, build_snapshot(new_rows)]), "events": stored.get("events", 1)}
+                delta["snapshot"] = "merged"
+
+            with self.connect() as connection:
+                event = connection.execute("SELECT aspect_labels FROM events WHERE event_id = ?", (event_id,)).fetchone()
+                aspect_labels = {**json.loads(event['aspect_labels']),
+                                 **dict(zip(dataset.aspects.columns, dataset.aspects.labels))}
+                for table in ('response_aspects', 'response_sessions', 'responses'):
+                    connection.executemany(f"DELETE FROM {table} WHERE event_id = ? AND row_number = ?",
+                                           ((event_id, int(row)) for row in removed))
+                first_row = int(stored_rows.max()) + 1 if len(stored_rows) else 0
+                self._insert_responses(connection, event_id, new_rows, first_row)
+                connection.execute("UPDATE events SET response_count = ?, aspect_labels = ? WHERE event_id = ?",
+                                   (len(dataset), json.dumps(aspect_labels), event_id))
+                self._store_snapshot(connection, event_id, snapshot)
+
+        if snapshot is None:
+            snapshot = self.event_snapshots([event_id])[0]["snapshot"]
+        event = next(event for event in self.list_events() if event["event_id"] == event_id)
+        return {"event": event, "delta": delta, "snapshot": snapshot}
+
+    def _event_fingerprints(self, event_id: int):
+        """(row numbers, int64 fingerprints) of a stored event; fills in fingerprints missing from older stores"""
+        with self.connect() as connection:
+            if connection.execute("SELECT 1 FROM events WHERE event_id = ?", (event_id,)).fetchone() is None:
+                return None, None
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute("SELECT row_number, fingerprint FROM responses WHERE event_id = ? "
+                                  "ORDER BY row_number", (event_id,)).fetchall()
+        row_numbers = np.array([row for row, _ in rows], dtype=np.int64)
+        if any(fingerprint is None for _, fingerprint in rows):
+            fingerprints = row_fingerprints(self.load_event(event_id).frame).view(np.int64)
+            with self.connect() as connection:
+                connection.executemany(
+                    "UPDATE responses SET fingerprint = ? WHERE event_id = ? AND row_number = ?",
+                    zip(fingerprints.tolist(), [event_id] * len(rows), row_numbers.tolist())
+                )
+            return row_numbers, fingerprints
+        return row_numbers, np.array([fingerprint for _, fingerprint in rows], dtype=np.int64)
+
+    def _store_snapshot(self, connection: sqlite3.Connection, event_id: int, snapshot: Dict[str, Any]) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO event_snapshots (event_id, version, snapshot) VALUES (?, ?, ?)",
+            (event_id, SNAPSHOT_VERSION, json.dumps(snapshot))
+        )
+
+    def delete_event(self, event_id: int) -> bool:
+        """Removes an event and all of its responses; False if it does not exist"""
+        with self.connect() as connection:
+            return connection.execute("DELETE FROM events WHERE event_id = ?", (int(event_id),)).rowcount > 0
+
+    # --- Reading ---
+
+    def list_events(self) -> List[Dict[str, Any]]:
+        """Stored events in chronological order (undated events last)"""
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT event_id, name, event_date, created_at, response_count, aspect_labels FROM events "
+                "ORDER BY event_date IS NULL, event_date, event_id"
+            ).fetchall()
+        return [
+            {**{key: row[key] for key in ('event_id', 'name', 'event_date', 'created_at', 'response_count')},
+             "aspects": list(json.loads(row['aspect_labels']).values())}
+            for row in rows
+        ]
+
+    def load_event(self, event_id: int) -> Optional[FeedbackDataset]:
+        """Rebuilds the cleaned dataset of a stored event (None if unknown)"""
+        with self.connect() as connection:
+            event = connection.execute("SELECT aspect_labels FROM events WHERE event_id = ?",
+                                       (int(event_id),)).fetchone()
+            if event is None:
+                return None
+            df = pd.read_sql_query(
+                f"SELECT row_number, {', '.join(RESPONSE_COLUMNS)} FROM responses WHERE event_id = ? ORDER BY row_number",
+                connection, params=(int(event_id),)
+            )
+            sessions = connection.execute(
+                "SELECT row_number, session FROM response_sessions WHERE event_id = ? ORDER BY row_number, position",
+                (int(event_id),)
+            ).fetchall()
+            aspects = pd.read_sql_query(
+                "SELECT row_number, aspect, rating FROM response_aspects WHERE event_id = ?",
+                connection, params=(int(event_id),)
+            )
+
+        aspect_labels = json.loads(event['aspect_labels'])
+        # Row numbers can have gaps once responses were removed by refresh_event
+        row_numbers = pd.Index(df.pop('row_number'))
+        for col in SCORE_COLUMNS:
+            # Whole-number scores come back as integers, like freshly extracted data
+            if df[col].notna().all():
+                df[col] = df[col].astype(np.int64)
+        df = df.dropna(axis=1, how='all')
+
+        attended = [[] for _ in range(len(df))]
+        positions = row_numbers.get_indexer([row for row, _ in sessions])
+        for position, (_, session) in zip(positions.tolist(), sessions):
+            attended[position].append(session)
+        df['sessions_attended'] = attended
+
+        if aspect_labels:
+            ratings = aspects.pivot(index='row_number', columns='aspect', values='rating') \
+                .reindex(index=row_numbers, columns=list(aspect_labels))
+            for col in aspect_labels:
+                values = ratings[col]
+                df[col] = values.to_numpy().astype(np.int64) if values.notna().all() else values.to_numpy()
+
+        return build_dataset(df, aspect_labels)
+
+    # --- Aggregate snapshots ---
+
+    def event_snapshots(self, event_ids: Optional[Sequence[int]] = None, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Chronological {"event_id", "name", "event_date", "snapshot"} of the selected events.
+        Missing or outdated snapshots are rebuilt once from the stored responses.
+        """
+        where, params = _event_filter(event_ids, start_date, end_date)
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT e.event_id, e.name, e.event_date, s.version, s.snapshot "
+                f"FROM events e LEFT JOIN event_snapshots s ON s.event_id = e.event_id {where} "
+                "ORDER BY e.event_date IS NULL, e.event_date, e.event_id",
+                params
+            ).fetchall()
+
+        events = []
+        for row in rows:
+            if row['version'] == SNAPSHOT_VERSION:
+                snapshot = json.loads(row['snapshot'])
+            else:
+                snapshot = build_snapshot(self.load_event(row['event_id']))
+                with self.connect() as connection:
+                    self._store_snapshot(connection, row['event_id'], snapshot)
+            events.append({**{key: row[key] for key in ('event_id', 'name', 'event_date')}, "snapshot": snapshot})
+        return events
+
+    def rollup(self, event_ids: Optional[Sequence[int]] = None, start_date: Optional[str] = None,
+               end_date: Optional[str] = None, window: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Report over all selected events from their merged snapshots, plus rolling-window
+        headline metrics per event (None when no event matches).
+        """
+        events = self.event_snapshots(event_ids, start_date, end_date)
+        if not events:
+            return None
+        return {
+            "events": [{key: event[key] for key in ('event_id', 'name', 'event_date')} for event in events],
+            "report": summarize_snapshot(merge_snapshots([event["snapshot"] for event in events])),
+            "window": window,
+            "rolling": rolling_summaries(events, window)
+        }
+
+    # --- Cross-event trends ---
+
+    def event_trends(self, event_ids: Optional[Sequence[int]] = None, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per event: responses, average satisfaction and NPS, with the change from the previous event"""
+        where, params = _event_filter(event_ids, start_date, end_date)
+        with self.connect() as connection:
+            rows = connection.execute(
+                f"SELECT e.event_id, e.name, e.event_date, {_SCORE_AGGREGATES} "
+                f"FROM events e JOIN responses r ON r.event_id = e.event_id {where} "
+                "GROUP BY e.event_id ORDER BY e.event_date IS NULL, e.event_date, e.event_id",
+                params
+            ).fetchall()
+
+        trends, previous = [], None
+        for row in rows:
+            point = {
+                "event_id": row['event_id'],
+                "name": row['name'],
+                "event_date": row['event_date'],
+                "responses": row['responses'],
+                "average_satisfaction": _round(row['average_satisfaction']),
+                "nps_score": _nps(row['promoters'], row['detractors'], row['nps_responses']),
+                "promoters": row['promoters'] or 0,
+                "detractors": row['detractors'] or 0
+            }
+            if previous is not None:
+                for metric in ('average_satisfaction', 'nps_score'):
+                    if point[metric] is not None and previous[metric] is not None:
+                        point[f"{metric}_change"] = round(point[metric] - previous[metric], 2)
+            trends.append(point)
+            previous = point
+        return trends
+
+    def channel_trends(self, event_ids: Optional[Sequence[int]] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per discovery channel: share of responses, satisfaction and NPS in every event"""
+        where, params = _event_filter(event_ids, start_date, end_date)
+        with self.connect() as connection:
+            rows = connection.execute(
+                f"SELECT e.event_id, e.name, e.event_date, COALESCE(r.event_discovery, '{NOT_SPECIFIED}') AS channel, "
+                f"{_SCORE_AGGREGATES}, e.response_count "
+                f"FROM events e JOIN responses r ON r.event_id = e.event_id {where} "
+                "GROUP BY e.event_id, channel ORDER BY e.event_date IS NULL, e.event_date, e.event_id",
+                params
+            ).fetchall()
+
+        channels: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            channels.setdefault(row['channel'], []).append({
+                "event_id": row['event_id'],
+                "name": row['name'],
+                "event_date": row['event_date'],
+                "responses": row['responses'],
+                "percentage": round(row['responses'] / row['response_count'] * 100, 1) if row['response_count'] else 0.0,
+                "average_satisfaction": _round(row['average_satisfaction']),
+                "nps_score": _nps(row['promoters'], row['detractors'], row['nps_responses'])
+            })
+        trends = [
+            {"channel": channel, "total_responses": sum(point["responses"] for point in points), "events": points}
+            for channel, points in channels.items()
+        ]
+        trends.sort(key=lambda trend: trend["total_responses"], reverse=True)
+        return trends
+
+    def session_trends(self, sessions: Optional[Sequence[str]] = None, event_ids: Optional[Sequence[int]] = None,
+                       start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per session name: attendance, satisfaction and NPS in every event it ran in"""
+        where, params = _event_filter(event_ids, start_date, end_date)
+        if sessions:
+            where = f"{where} {'AND' if where else 'WHERE'} s.session IN ({', '.join('?' * len(sessions))})"
+            params = params + [str(session) for session in sessions]
+        with self.connect() as connection:
+            rows = connection.execute(
+                f"SELECT e.event_id, e.name, e.event_date, s.session, {_SCORE_AGGREGATES} "
+                "FROM response_sessions s JOIN events e ON e.event_id = s.event_id "
+                f"JOIN responses r ON r.event_id = s.event_id AND r.row_number = s.row_number {where} "
+                "GROUP BY e.event_id, s.session ORDER BY e.event_date IS NULL, e.event_date, e.event_id",
+                params
+            ).fetchall()
+
+        by_session: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_session.setdefault(row['session'], []).append({
+                "event_id": row['event_id'],
+                "name": row['name'],
+                "event_date": row['event_date'],
+                "attendees": row['responses'],
+                "average_satisfaction": _round(row['average_satisfaction']),
+                "nps_score": _nps(row['promoters'], row['detractors'], row['nps_responses'])
+            })
+        trends = [
+            {"session": session, "events_held": len(points), "events": points}
+            for session, points in by_session.items()
+        ]
+        trends.sort(key=lambda trend: trend["events_held"], reverse=True)
+        return trends
+
+
+_stores: Dict[str, EventStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_event_store(path: Optional[str] = None) -> EventStore:
+    """Returns the EventStore of a database path (EVENT_STORE_PATH by default), creating it once"""
+    path = path or EVENT_STORE_PATH
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = EventStore(path)
+        return _stores[path]
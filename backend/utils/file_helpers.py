@@ -8,3 +8,11 @@ def get_default_csv_path() -> str:
     script_dir = os.path.dirname(__file__)
     project_root = os.path.dirname(os.path.dirname(script_dir))
     return os.path.join(project_root, 'test_data/feedback_forms-1.csv')
+
+def get_default_event_store_path() -> str:
+    """
+    Path of the local multi-event SQLite store: data/feedback_events.db under the project root.
+    """
+    script_dir = os.path.dirname(__file__)
+    project_root = os.path.dirname(os.path.dirname(script_dir))
+    return os.path.join(project_root, 'data/feedback_events.db')
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Replays a feedback CSV against the live ingestion webhook, one response (or small batch)
+at a time, to exercise /api/live/<stream>/responses and the rolling SSE report.
+
+Usage (server running on localhost:5000):
+    python debug/replay_live_responses.py test_data/feedback_forms-1.csv --rate 200 --repeat 20 --watch
+"""
+
+import sys
+import os
+import argparse
+import json
+import math
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from backend.processing.feedback_service import extract_feedback_data
+
+BASE_URL = "http://localhost:5000"
+
+
+def load_responses(csv_path):
+    """Rows of the CSV in the webhook schema (renamed columns, JSON-safe values)"""
+    responses = []
+    for row in extract_feedback_data(csv_path):
+        responses.append({
+            key: None if isinstance(value, float) and math.isnan(value) else value
+            for key, value in row.items()
+        })
+    return responses
+
+
+def watch_events(url, stream, stop):
+    """Prints a line per `report` server-sent event until stop is set"""
+    try:
+        with requests.get(f"{url}/api/live/{stream}/events", params={"sections": "nps,satisfaction"},
+                          stream=True, timeout=(5, None)) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if stop.is_set():
+                    break
+                if not line or not line.startswith('data: '):
+                    continue
+                update = json.loads(line[len('data: '):])
+                nps = update["report"].get("nps", {}).get("nps_score")
+                print(f"  [sse] version {update['version']}: {update['responses']} responses, "
+                      f"batch of {update['batch']['size']} in {update['batch']['processing_ms']} ms, NPS {nps}")
+    except requests.RequestException as e:
+        print(f"  [sse] stream closed: {e}")
+
+
+def replay(args):
+    responses = load_responses(args.csv) * args.repeat
+    print(f"Replaying {len(responses)} responses to stream '{args.stream}' at ~{args.rate}/s")
+
+    headers = {"X-Webhook-Token": args.token} if args.token else {}
+    session = requests.Session()
+    endpoint = f"{args.url}/api/live/{args.stream}/responses"
+
+    stop = threading.Event()
+    watching = False
+
+    accepted = rejected = throttled = 0
+    interval = args.batch_size / args.rate if args.rate > 0 else 0
+    started = time.perf_counter()
+    for i in range(0, len(responses), args.batch_size):
+        batch = responses[i:i + args.batch_size]
+        body = batch[0] if args.batch_size == 1 else batch
+        result = session.post(endpoint, json=body, headers=headers)
+        if result.status_code == 202:
+            payload = result.json()
+            accepted += payload["accepted"]
+            rejected += len(payload["rejected"])
+            # The first accepted POST creates the stream, so subscribe after it
+            if args.watch and not watching:
+                threading.Thread(target=watch_events, args=(args.url, args.stream, stop), daemon=True).start()
+                watching = True
+        elif result.status_code == 503:
+            throttled += len(batch)
+            time.sleep(float(result.headers.get("Retry-After", 1)))
+        else:
+            rejected += len(batch)
+            print(f"  HTTP {result.status_code}: {result.text[:200]}")
+
+        # Pace submissions to the requested rate
+        ahead = started + (i // args.batch_size + 1) * interval - time.perf_counter()
+        if ahead > 0:
+            time.sleep(ahead)
+
+    elapsed = time.perf_counter() - started
+    print(f"Sent {len(responses)} responses in {elapsed:.2f}s ({len(responses) / elapsed:.0f}/s): "
+          f"{accepted} accepted, {rejected} rejected, {throttled} throttled")
+
+    time.sleep(1)
+    status = session.get(f"{args.url}/api/live/{args.stream}").json()
+    print("Stream status:", json.dumps(status.get("status"), indent=2))
+    stop.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a feedback CSV against the live ingestion webhook")
+    parser.add_argument("csv", nargs="?", default="test_data/feedback_forms-1.csv")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--stream", default="replay")
+    parser.add_argument("--rate", type=float, default=100, help="responses per second (0 = as fast as possible)")
+    parser.add_argument("--batch-size", type=int, default=1, help="responses per request")
+    parser.add_argument("--repeat", type=int, default=1, help="times to replay the CSV")
+    parser.add_argument("--token", default=os.getenv("LIVE_WEBHOOK_TOKEN", ""))
+    parser.add_argument("--watch", action="store_true", help="print the SSE report updates")
+    replay(parser.parse_args())
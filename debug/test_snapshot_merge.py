@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Debug script to verify that aggregate snapshots merge exactly:
+the merged snapshots of a split dataset must summarize to the same report as one
+snapshot of the whole dataset (apart from the `events` count), and the one-word
+summary must match the upload report's normalized one-word descriptions.
+
+Heavy-hitter sketches (comment words/phrases, one-word descriptions) are exact until
+they hold more distinct items than SKETCH_CAPACITY; past that, merged counts may
+overestimate by at most the per-item error the sketch stores. Sections backed by an
+overflowed sketch are therefore checked against those error bounds instead of equality.
+"""
+
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath('.'))
+
+from backend.processing.feedback_service import extract_feedback_data
+from backend.processing.dataset import as_dataset
+from backend.analysis.snapshots import build_snapshot, merge_snapshots, summarize_snapshot
+from backend.analysis.sketches import SpaceSaving
+from backend.analysis import generate_one_word_descriptions
+
+TEST_FILES = ["test_data/feedback_forms-1.csv", "test_data/feedback_forms-3.csv"]
+# Section -> sketch states it summarizes
+SKETCH_SECTIONS = {"feedback": ["words", "phrases"], "one_word_descriptions": ["sketch"]}
+
+
+def summary_without_events(snapshot):
+    """JSON-normalized summary with the event count removed"""
+    report = json.loads(json.dumps(summarize_snapshot(snapshot), default=str))
+    report.pop("events", None)
+    return report
+
+
+def sketch_within_bounds(single_state, merged_state):
+    """
+    Every merged estimate must bracket the true count: estimate - error <= true <= estimate.
+    The single-pass sketch is built from exact counts, so its counters are the true counts;
+    items it dropped occurred at most its smallest tracked count times.
+    """
+    single = SpaceSaving.from_dict(single_state)
+    merged = SpaceSaving.from_dict(merged_state)
+    floor = min(single.counts.values()) if len(single) >= single.capacity else 0
+    for item, estimate in merged.counts.items():
+        error = merged.errors[item]
+        if item in single.counts:
+            if not estimate - error <= single.counts[item] <= estimate:
+                return False, item
+        elif estimate - error > floor:
+            return False, item
+    return True, None
+
+
+def split_points(n):
+    """Split layouts to try: halves, thirds, a single first row, and every row on its own"""
+    return [[n // 2], [n // 3, 2 * n // 3], [1], list(range(1, n))]
+
+
+def test_merge_matches_single_pass(csv_path):
+    data = extract_feedback_data(csv_path)
+    rows = list(data)
+    single_snapshot = build_snapshot(data)
+    expected = summary_without_events(single_snapshot)
+    ok = True
+
+    for points in split_points(len(rows)):
+        bounds = [0] + points + [len(rows)]
+        parts = [as_dataset(rows[start:stop]) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+        merged_snapshot = merge_snapshots([build_snapshot(part) for part in parts])
+        merged = summary_without_events(merged_snapshot)
+        differing = [key for key in expected if expected[key] != merged.get(key)]
+
+        # Overflowed sketches are approximate by design: accept them when within their error bounds
+        approximate = []
+        for key in list(differing):
+            sketch_keys = SKETCH_SECTIONS.get(key, [])
+            states = [(single_snapshot["sections"][key][name], merged_snapshot["sections"][key][name])
+                      for name in sketch_keys]
+            if not states or all(SpaceSaving.from_dict(merged_state).is_exact for _, merged_state in states):
+                continue
+            checks = [sketch_within_bounds(*pair) for pair in states]
+            exact_parts = {k: v for k, v in expected[key].items() if k == "comments"} if key == "feedback" else {}
+            if all(ok for ok, _ in checks) and all(merged[key].get(k) == v for k, v in exact_parts.items()):
+                differing.remove(key)
+                approximate.append(key)
+            else:
+                print(f"   sketch bound violated in {key}: {[item for ok, item in checks if not ok]}")
+
+        if differing:
+            ok = False
+            print(f"   FAIL {len(parts)} parts: sections differ: {differing}")
+            for key in differing:
+                print(f"      single: {json.dumps(expected[key])[:300]}")
+                print(f"      merged: {json.dumps(merged.get(key))[:300]}")
+        else:
+            note = f" (within sketch error bounds: {', '.join(approximate)})" if approximate else ""
+            print(f"   OK   {len(parts)} parts{note}")
+    return ok
+
+
+def test_one_word_matches_report(csv_path):
+    data = extract_feedback_data(csv_path)
+    report = generate_one_word_descriptions(data)
+    if 'error' in report:
+        print(f"   SKIP {report['error']}")
+        return True
+    expected = sorted((item["word"], item["count"]) for item in report["data"]["word_cloud"])
+    summary = summarize_snapshot(build_snapshot(data))["one_word_descriptions"]
+    actual = sorted((item["word"], item["count"]) for item in summary)
+    # The snapshot lists the top TOP_ITEMS words only
+    if len(expected) <= len(actual) and expected != actual or not set(actual) <= set(expected):
+        print(f"   FAIL one-word summary differs from the upload report")
+        print(f"      report:   {expected[:10]}")
+        print(f"      snapshot: {actual[:10]}")
+        return False
+    print("   OK   one-word summary matches the upload report")
+    return True
+
+
+def test_normalized_variants():
+    """Variants that the upload report merges must also merge in (merged) snapshots"""
+    rows = [{"satisfaction": 5, "recommendation_score": 9, "one_word_desc": word}
+            for word in ["Amazing", "amazing!!", "Amazingg", "AMAZING."]]
+    whole = summarize_snapshot(build_snapshot(as_dataset(rows)))["one_word_descriptions"]
+    merged = summarize_snapshot(merge_snapshots([build_snapshot(as_dataset([row])) for row in rows]))
+    expected = [{"word": "Amazing", "count": 4}]
+    ok = whole == expected and merged["one_word_descriptions"] == expected
+    print(f"   {'OK  ' if ok else 'FAIL'} variants: single {whole}, merged {merged['one_word_descriptions']}")
+    return ok
+
+
+if __name__ == "__main__":
+    print("=== DEBUG: Snapshot merge consistency ===")
+    results = []
+    for csv_path in TEST_FILES:
+        if not os.path.exists(csv_path):
+            print(f"\nTest CSV not found: {csv_path}")
+            continue
+        print(f"\n{csv_path}")
+        results.append(test_merge_matches_single_pass(csv_path))
+        results.append(test_one_word_matches_report(csv_path))
+    print("\nNormalized one-word variants")
+    results.append(test_normalized_variants())
+
+    print(f"\n=== {'ALL CHECKS PASSED' if all(results) else 'SOME CHECKS FAILED'} ===")
+    sys.exit(0 if all(results) else 1)